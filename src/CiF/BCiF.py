@@ -1,11 +1,22 @@
 from dataclasses import dataclass, field
-from typing import List, Dict, Sequence
+from typing import List, Dict, Optional, Sequence
+
+from src.belief.BeliefTensor import BeliefTensor
+from src.CiF.ObservationScope import IBObservationScope
+from src.npc.BNPC import BNPC
+from src.signal_interpolation.SignalInterpolation import actions_seen_by, observe_exchanges
+from src.utils.kernels import KernelBackend, get_backend
 
 from src.social_exchange.BSocialExchange import BSocialExchange
 from src.social_exchange.BSocialExchangeTemplate import BSocialExchangeTemplate
 from src.types.NPCTypes import BNPCType
 
 
+def _observes_itself(npc: BNPCType) -> bool:
+    # NPC types with their own update_beliefs_from_observation, which the batched update would skip
+    return type(npc).update_beliefs_from_observation is not BNPC.update_beliefs_from_observation
+
+
 @dataclass
 class BCiF:
     NPCs: List[BNPCType]
@@ -15,21 +26,63 @@ class BCiF:
     actions_done: List[BSocialExchange] = field(default_factory=list)
     trait_opposites: Dict[str, Sequence[str]] = field(default_factory=dict)
     relationship_opposites: Dict[str, Sequence[str]] = field(default_factory=dict)
+    compaction_interval: int = 0  # compact sparse belief stores every N iterations (0 = never)
+    tick: int = 0
+    # set when the NPCs' belief stores are views into one world-level tensor
+    belief_tensor: Optional[BeliefTensor] = None
+    # array kernel backend: "numpy", "numba" (falls back to numpy when not installed) or "auto";
+    # passed down to desire formation and observation, so worlds with different backends coexist
+    backend: str = "numpy"
+    # update every observer at once per action; worlds with NPC types that override
+    # update_beliefs_from_observation always use the per-observer loop
+    batched_observation: bool = True
+    # who observes each exchange (None = every NPC except the participants), see ObservationScope
+    observation_scope: Optional[IBObservationScope] = None
+
+    def __post_init__(self):
+        self.kernels  # resolved up front so an unavailable backend is reported here
+
+    def __getstate__(self):
+        # the resolved kernels belong to this process
+        return {name: value for name, value in self.__dict__.items() if name != "_kernels"}
+
+    @property
+    def kernels(self) -> KernelBackend:
+        cached = self.__dict__.get("_kernels")
+        if cached is None or cached[0] != self.backend:
+            cached = self._kernels = (self.backend, get_backend(self.backend))
+        return cached[1]
 
     def iteration(self):
+        kernels = self.kernels
         actions_done: List[BSocialExchange] = []
 
         for npc in self.NPCs:
-            action = npc.iteration(self.NPCs, self.actions)
+            action = npc.iteration(self.NPCs, self.actions, kernels)
 
             if action is not None:
                 actions_done.append(action)
 
-        for npc in self.NPCs:
-            npc.update_beliefs_from_observation(actions_done)
+        audiences = None
+        if self.observation_scope is not None:
+            audiences = [self.observation_scope.observers(action, self.NPCs) for action in actions_done]
+        if self.batched_observation and not any(_observes_itself(npc) for npc in self.NPCs):
+            observe_exchanges(self.NPCs, actions_done, audiences, kernels)
+        else:
+            for npc in self.NPCs:
+                npc.update_beliefs_from_observation(actions_seen_by(npc, actions_done, audiences))
 
         self.actions_done.extend(actions_done)
 
+        self.tick += 1
+        if self.compaction_interval and self.tick % self.compaction_interval == 0:
+            self.compact_beliefs()
+
+    def compact_beliefs(self) -> int:
+        if self.belief_tensor is not None:
+            return self.belief_tensor.compact()
+        return sum(npc.beliefStore.compact() for npc in self.NPCs)
+
     def get_exchanges(self, i, r):
         res = []
         for exch in self.actions_done:
@@ -47,8 +100,11 @@ class BCiF:
         if trait in self.traits:
             self.traits.remove(trait)
         self.trait_opposites.pop(trait, None)
-        for npc in self.NPCs:
-            npc.beliefStore.remove_predicate('trait', trait)
+        self._remove_predicate_everywhere('trait', trait)
+
+    def rename_trait(self, trait: str, new_name: str) -> None:
+        self._rename_in_schema(self.traits, self.trait_opposites, trait, new_name)
+        self._rename_predicate_everywhere('trait', trait, new_name)
 
     def add_relationship(self, relationship: str, opposites: Sequence[str] = ()) -> None:
         if relationship not in self.relationships:
@@ -60,5 +116,42 @@ class BCiF:
         if relationship in self.relationships:
             self.relationships.remove(relationship)
         self.relationship_opposites.pop(relationship, None)
+        self._remove_predicate_everywhere('relationship', relationship)
+
+    def rename_relationship(self, relationship: str, new_name: str) -> None:
+        self._rename_in_schema(self.relationships, self.relationship_opposites, relationship, new_name)
+        for npc in self.NPCs:
+            if relationship in npc.relation_preferences:
+                npc.relation_preferences[new_name] = npc.relation_preferences.pop(relationship)
+            for goal in npc.goals:
+                if goal.relation_type == relationship:
+                    goal.relation_type = new_name
+        self._rename_predicate_everywhere('relationship', relationship, new_name)
+
+    def _remove_predicate_everywhere(self, pred_type: str, subtype: str) -> None:
+        if self.belief_tensor is not None:
+            self.belief_tensor.remove_predicate(pred_type, subtype)
+            return
+        for npc in self.NPCs:
+            npc.beliefStore.remove_predicate(pred_type, subtype)
+
+    def _rename_predicate_everywhere(self, pred_type: str, subtype: str, new_subtype: str) -> None:
+        if self.belief_tensor is not None:
+            self.belief_tensor.rename_predicate(pred_type, subtype, new_subtype)
+            return
         for npc in self.NPCs:
-            npc.beliefStore.remove_predicate('relationship', relationship)
+            npc.beliefStore.rename_predicate(pred_type, subtype, new_subtype)
+
+    @staticmethod
+    def _rename_in_schema(names: List[str], opposites: Dict[str, Sequence[str]], old: str, new: str) -> None:
+        if old in names:
+            if new in names:
+                names.remove(old)
+            else:
+                names[names.index(old)] = new
+        if old in opposites:
+            opposites[new] = opposites.pop(old)
+        for key, values in opposites.items():
+            if isinstance(values, str):
+                values = [values]
+            opposites[key] = [new if value == old else value for value in values]
@@ -0,0 +1,75 @@
+import random
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence
+
+from src.social_exchange.BSocialExchange import BSocialExchange
+from src.types.NPCTypes import BNPCType
+
+
+def _bystanders(exchange: BSocialExchange, npcs: Sequence[BNPCType]) -> List[BNPCType]:
+    return [npc for npc in npcs if npc is not exchange.initiator and npc is not exchange.responder]
+
+
+@dataclass
+class IBObservationScope:
+    # decides who learns from an exchange; participants never update from their own exchange
+
+    def observers(self, exchange: BSocialExchange, npcs: Sequence[BNPCType]) -> List[BNPCType]:
+        raise NotImplementedError("Observation scopes must implement observers method.")
+
+
+@dataclass
+class BEveryoneScope(IBObservationScope):
+    def observers(self, exchange: BSocialExchange, npcs: Sequence[BNPCType]) -> List[BNPCType]:
+        return _bystanders(exchange, npcs)
+
+
+@dataclass
+class BWitnessScope(IBObservationScope):
+    # the exchange's own witness list; exchanges without one go to `fallback` (nobody when unset)
+    fallback: Optional[IBObservationScope] = None
+
+    def observers(self, exchange: BSocialExchange, npcs: Sequence[BNPCType]) -> List[BNPCType]:
+        if exchange.witnesses is None:
+            return self.fallback.observers(exchange, npcs) if self.fallback is not None else []
+        return [npc for npc in _bystanders(exchange, npcs) if any(npc is witness for witness in exchange.witnesses)]
+
+
+@dataclass
+class BNeighborhoodScope(IBObservationScope):
+    # NPCs related to either participant: the participant believes a relationship towards them,
+    # or they believe one towards the participant, with at least `threshold` probability
+    relationships: Sequence[str] = ()  # relationship subtypes that count (empty = any)
+    threshold: float = 0.5
+
+    def _related(self, a: BNPCType, b: BNPCType) -> bool:
+        return any(belief.probability >= self.threshold
+                   and (not self.relationships or belief.predicate.subtype in self.relationships)
+                   for belief in a.beliefStore.get_relationships_about(a, b))
+
+    def observers(self, exchange: BSocialExchange, npcs: Sequence[BNPCType]) -> List[BNPCType]:
+        participants = (exchange.initiator, exchange.responder)
+        return [npc for npc in _bystanders(exchange, npcs)
+                if any(self._related(p, npc) or self._related(npc, p) for p in participants)]
+
+
+@dataclass
+class BSampledScope(IBObservationScope):
+    # a random `fraction` of the bystanders, at most `max_observers` of them, drawn from a seeded RNG
+    fraction: float = 1.0
+    max_observers: Optional[int] = None
+    seed: Optional[int] = None
+    _rng: random.Random = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        if self.fraction < 0 or self.fraction > 1:
+            raise ValueError("Observation fraction must be within [0,1].")
+        self._rng = random.Random(self.seed)
+
+    def observers(self, exchange: BSocialExchange, npcs: Sequence[BNPCType]) -> List[BNPCType]:
+        bystanders = _bystanders(exchange, npcs)
+        k = round(self.fraction * len(bystanders))
+        if self.max_observers is not None:
+            k = min(k, self.max_observers)
+        chosen = set(self._rng.sample(range(len(bystanders)), k))
+        return [npc for n, npc in enumerate(bystanders) if n in chosen]
@@ -1,9 +1,12 @@
 import itertools
 from dataclasses import dataclass, field
 from random import random, shuffle
-from typing import Dict, List, Sequence
+from typing import Callable, Dict, List, Sequence
 
+from src.belief.BeliefStore import BeliefStore
+from src.belief.BeliefTensor import BeliefTensor
 from src.CiF.BCiF import BCiF
+from src.CiF.ObservationScope import IBObservationScope
 from src.NamesDB.NamesDB import Names
 from src.npc.BNPC import BNPC
 from src.predicates.PredicateTemplate import PredicateTemplate
@@ -21,6 +24,15 @@ class CiFBuilder:
     trait_opposites: Dict[str, Sequence[str]] = field(default_factory=dict)
     relationship_opposites: Dict[str, Sequence[str]] = field(default_factory=dict)
     NPCs: List[BNPCType] = field(default_factory=list)
+    belief_store_factory: Callable[[], BeliefStore] = BeliefStore  # e.g. ColumnarBeliefStore
+    compaction_interval: int = 0
+    use_belief_tensor: bool = False  # keep all beliefs in one world-level BeliefTensor
+    log_odds: bool = False  # the BeliefTensor stores log-odds (for other stores pass a configured factory)
+    compile_templates: bool = False  # NPCs score exchanges with generated code
+    backend: str = "numpy"  # array kernel backend, see src.utils.kernels
+    observation_scope: IBObservationScope | None = None  # who observes each exchange (None = everyone)
+    # templates built once per builder and shared by every belief
+    _templates: Dict[tuple[str, str, bool], PredicateTemplate] = field(default_factory=dict, init=False, repr=False)
 
     def build(self):
         if len(self.names) < self.n:
@@ -34,12 +46,22 @@ class CiFBuilder:
         if self.n < 1:
             raise ValueError("At least one NPC must be created.")
 
+        belief_tensor = None
         if self.NPCs:
             npcs = self.NPCs
-        else:
+        elif self.use_belief_tensor:
             npcs = [BNPC(i, self.names[i]) for i in range(self.n)]
+            belief_tensor = BeliefTensor(npcs, log_odds=self.log_odds)
+            belief_tensor.attach()
+            npcs = self.initialize_beliefs(npcs)
+        else:
+            npcs = [BNPC(i, self.names[i], beliefStore=self.belief_store_factory()) for i in range(self.n)]
             npcs = self.initialize_beliefs(npcs)
 
+        if self.compile_templates:
+            for npc in npcs:
+                npc.compiled_templates = True
+
         return BCiF(
             NPCs=npcs,
             actions=self.exchanges,
@@ -47,6 +69,10 @@ class CiFBuilder:
             relationships=[relationship for relationship, _ in self.relationships],
             trait_opposites=self.trait_opposites.copy(),
             relationship_opposites=self.relationship_opposites.copy(),
+            compaction_interval=self.compaction_interval,
+            belief_tensor=belief_tensor,
+            backend=self.backend,
+            observation_scope=self.observation_scope,
         )
 
     def initialize_beliefs(self, npcs: List[BNPCType]):
@@ -58,12 +84,18 @@ class CiFBuilder:
 
         return npcs
 
+    def _template(self, pred_type: str, subtype: str, is_single: bool) -> PredicateTemplate:
+        template = self._templates.get((pred_type, subtype, is_single))
+        if template is None:
+            template = PredicateTemplate(pred_type=pred_type, subtype=subtype, is_single=is_single)
+            self._templates[(pred_type, subtype, is_single)] = template
+        return template
+
     def get_trait_templates(self):
         templates: List[tuple[PredicateTemplate, float]] = []
 
         for trait, probability in self.traits:
-            template = PredicateTemplate(pred_type="trait", subtype=trait, is_single=True)
-            templates.append((template, probability))
+            templates.append((self._template("trait", trait, True), probability))
 
         return templates
 
@@ -71,8 +103,7 @@ class CiFBuilder:
         templates: List[tuple[PredicateTemplate, float]] = []
 
         for relationship, probability in self.relationships:
-            template = PredicateTemplate(pred_type="relationship", subtype=relationship, is_single=False)
-            templates.append((template, probability))
+            templates.append((self._template("relationship", relationship, False), probability))
 
         return templates
 
@@ -86,9 +117,7 @@ class CiFBuilder:
 
             skip = False
             for opp in opp_names:
-                opp_template = PredicateTemplate(
-                    pred_type="trait", subtype=opp, is_single=True
-                )
+                opp_template = self._template("trait", opp, True)
                 if npc.beliefStore.get_probability(opp_template, npc, None) > 0.5:
                     skip = True
                     break
@@ -110,9 +139,7 @@ class CiFBuilder:
 
             skip = False
             for opp in opp_names:
-                opp_template = PredicateTemplate(
-                    pred_type="relationship", subtype=opp, is_single=False
-                )
+                opp_template = self._template("relationship", opp, False)
                 if npc1.beliefStore.get_probability(opp_template, npc1, npc2) > 0.5:
                     skip = True
                     break
@@ -4,11 +4,30 @@ from src.predicates.Predicate import Predicate
 from src.predicates.PredicateTemplate import PredicateTemplate
 
 
-@dataclass
+def check_probability(probability: float) -> None:
+    # stores reject out-of-range writes, so looked-up beliefs never need a range check on read
+    if not 0.0 <= probability <= 1.0:
+        raise ValueError("Belief probabilities must be within [0,1].")
+
+
+@dataclass(slots=True)
 class Belief:
     predicate: Predicate
     probability: float
-    predicate_template: PredicateTemplate
+    predicate_template: PredicateTemplate | None = None  # defaults to predicate.template
+
+    def __post_init__(self):
+        if self.predicate_template is None:
+            self.predicate_template = self.predicate.template
+
+    def __getstate__(self):
+        return self.predicate, self.probability, self.predicate_template
+
+    def __setstate__(self, state):
+        # saves made before Belief was slotted pickled a plain __dict__
+        if isinstance(state, dict):
+            state = state["predicate"], state["probability"], state.get("predicate_template")
+        self.predicate, self.probability, self.predicate_template = state
 
     def clone(self) -> "Belief":
         return Belief(
@@ -16,4 +35,3 @@ class Belief:
             probability=self.probability,
             predicate_template=self.predicate_template
         )
-
@@ -0,0 +1,49 @@
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Iterable, Set, Tuple
+
+
+@dataclass
+class BeliefJournal:
+    # Monotonic change counter of a belief store plus an optional bounded log of changed keys.
+    max_entries: int = 0
+    version: int = 0
+    # oldest version changes_since() can still answer precisely
+    floor: int = 0
+    entries: Deque[Tuple[int, int]] = field(default_factory=deque)
+
+    def __post_init__(self):
+        self.entries = deque(self.entries, maxlen=self.max_entries)
+        if not self.max_entries:
+            self.floor = self.version
+
+    def record(self, key: int) -> None:
+        self.version += 1
+        self._append(key)
+
+    def record_many(self, keys: Iterable[int]) -> None:
+        self.version += 1
+        for key in keys:
+            self._append(key)
+
+    def invalidate_all(self) -> None:
+        # for bulk changes that are not worth logging key by key
+        self.version += 1
+        self.entries.clear()
+        self.floor = self.version
+
+    def _append(self, key: int) -> None:
+        if not self.max_entries:
+            self.floor = self.version
+            return
+        if len(self.entries) == self.max_entries:
+            self.floor = self.entries[0][0]
+        self.entries.append((self.version, key))
+
+    def changes_since(self, version: int) -> Set[int] | None:
+        # keys changed after `version`, or None when the journal no longer reaches that far back
+        if version >= self.version:
+            return set()
+        if version < self.floor:
+            return None
+        return {key for changed_at, key in self.entries if changed_at > version}
@@ -1,46 +1,151 @@
 from dataclasses import dataclass, field
-from typing import List, Dict, Tuple
+from typing import Iterable, List, Dict, Mapping, Sequence, Tuple
 
-from src.belief.Belief import Belief
+import numpy as np
+
+from src.belief.Belief import Belief, check_probability
+from src.belief.BeliefJournal import BeliefJournal
+from src.belief.CompactBelief import CompactBelief
 from src.predicates.Predicate import Predicate
+from src.predicates.PredicateRegistry import NPC_ID_BITS, NPC_ID_MASK, PAIR_MASK, TEMPLATE_SHIFT, pack_key, unpack_key
 from src.predicates.PredicateTemplate import PredicateTemplate
 from src.types.NPCTypes import BNPCType
 
+BeliefKey = int  # packed (template id, subject id, target id), see PredicateRegistry
+
+DEFAULT_PRIOR = 0.5
+
+_SECONDARY_INDEXES = ("_positions", "_by_subject", "_by_pair", "_by_type")
+
 
 @dataclass
 class BeliefStore:
     beliefs: List[Belief] = field(default_factory=list)
+    # when set, beliefs within this distance of DEFAULT_PRIOR are never created and are dropped by compact()
+    sparse_epsilon: float | None = None
+    # number of changed keys remembered for changes_since() (0 = version counter only)
+    journal_size: int = 0
 
     def __post_init__(self):
-        self._belief_index: Dict[Tuple[str, str, bool, int, int | None], Belief] = {}
+        self._journal = BeliefJournal(max_entries=self.journal_size)
+        self._belief_index: Dict[BeliefKey, Belief] = {}
         for belief in self.beliefs:
+            check_probability(belief.probability)
             key = self._key_from_predicate(belief.predicate)
             self._belief_index[key] = belief
+        self._rebuild_secondary_indexes()
+
+    def _rebuild_secondary_indexes(self) -> None:
+        # list position by belief identity, used for swap-pop removal
+        self._positions: Dict[int, int] = {id(belief): n for n, belief in enumerate(self.beliefs)}
+        # subject id, (subject id, target id) and (pred_type, subtype) -> {key: belief}
+        self._by_subject: Dict[int, Dict[BeliefKey, Belief]] = {}
+        self._by_pair: Dict[int, Dict[BeliefKey, Belief]] = {}
+        self._by_type: Dict[Tuple[str, str], Dict[BeliefKey, Belief]] = {}
+        for key, belief in self._belief_index.items():
+            self._index(key, belief)
+
+    def __getstate__(self):
+        return {name: value for name, value in self.__dict__.items() if name not in _SECONDARY_INDEXES}
+
+    def __setstate__(self, state):
+        # NPCs may still be half-restored here, so ids come from the stored keys. Template ids
+        # are per-process, so keys are re-packed (older saves used (type, subtype, single, subject, target) tuples).
+        self.__dict__.update(state)
+        index: Dict[BeliefKey, Belief] = {}
+        for key, belief in self._belief_index.items():
+            if isinstance(key, tuple):
+                subject_id, target_id = key[3], key[4]
+            else:
+                _, subject_id, target_id = unpack_key(key)
+            index[pack_key(belief.predicate.template.template_id, subject_id, target_id)] = belief
+        self._belief_index = index
+        self._rebuild_secondary_indexes()
+        # logged keys carry the old template ids
+        if "_journal" not in state:
+            self._journal = BeliefJournal(max_entries=self.journal_size)
+        self._journal.invalidate_all()
+
+    @property
+    def version(self) -> int:
+        return self._journal.version
+
+    def changes_since(self, version: int) -> set[BeliefKey] | None:
+        return self._journal.changes_since(version)
+
+    def _index(self, key: BeliefKey, belief: Belief) -> None:
+        self._belief_index[key] = belief
+        self._by_subject.setdefault((key >> NPC_ID_BITS) & NPC_ID_MASK, {})[key] = belief
+        self._by_pair.setdefault(key & PAIR_MASK, {})[key] = belief
+        self._by_type.setdefault((belief.predicate.pred_type, belief.predicate.subtype), {})[key] = belief
+
+    def _unindex(self, key: BeliefKey) -> Belief | None:
+        belief = self._belief_index.pop(key, None)
+        if belief is None:
+            return None
+        for index, bucket_key in ((self._by_subject, (key >> NPC_ID_BITS) & NPC_ID_MASK),
+                                  (self._by_pair, key & PAIR_MASK),
+                                  (self._by_type, (belief.predicate.pred_type, belief.predicate.subtype))):
+            bucket = index[bucket_key]
+            del bucket[key]
+            if not bucket:
+                del index[bucket_key]
+        return belief
+
+    def _remove_key(self, key: BeliefKey) -> Belief | None:
+        belief = self._unindex(key)
+        if belief is None:
+            return None
+        position = self._positions.pop(id(belief))
+        last = self.beliefs.pop()
+        if last is not belief:
+            self.beliefs[position] = last
+            self._positions[id(last)] = position
+        self._journal.record(key)
+        return belief
+
+    def _append(self, key: BeliefKey, belief: Belief) -> None:
+        self._positions[id(belief)] = len(self.beliefs)
+        self.beliefs.append(belief)
+        self._index(key, belief)
+        self._journal.record(key)
+
+    @staticmethod
+    def _key_from_template(template: PredicateTemplate, subject: BNPCType, target: BNPCType | None) -> BeliefKey:
+        return ((template.template_id << TEMPLATE_SHIFT) | (subject.id << NPC_ID_BITS)
+                | (target.id + 1 if target else 0))
 
     @staticmethod
-    def _key_from_template(template: PredicateTemplate, subject: BNPCType, target: BNPCType | None) -> Tuple[str, str, bool, int, int | None]:
-        return (
-            template.pred_type,
-            template.subtype,
-            template.is_single,
-            subject.id,
-            target.id if target else None,
-        )
+    def _key_from_predicate(predicate: Predicate) -> BeliefKey:
+        return ((predicate.template.template_id << TEMPLATE_SHIFT) | (predicate.subject.id << NPC_ID_BITS)
+                | (predicate.target.id + 1 if predicate.target else 0))
 
     @staticmethod
-    def _key_from_predicate(predicate: Predicate) -> Tuple[str, str, bool, int, int | None]:
-        return (
-            predicate.pred_type,
-            predicate.subtype,
-            predicate.is_single,
-            predicate.subject.id,
-            predicate.target.id if predicate.target else None,
-        )
+    def _pair_key(subject: BNPCType, target: BNPCType | None) -> int:
+        return (subject.id << NPC_ID_BITS) | (target.id + 1 if target else 0)
 
     def get_probability(self, predicate_temp: PredicateTemplate, i: BNPCType, r: BNPCType):
         key = self._key_from_template(predicate_temp, i, r)
         belief = self._belief_index.get(key)
-        return belief.probability if belief else 0.5
+        return belief.probability if belief else DEFAULT_PRIOR
+
+    @classmethod
+    def keys_for(cls, templates: Sequence[PredicateTemplate], i: BNPCType, r: BNPCType | None) -> List[BeliefKey]:
+        pair = cls._pair_key(i, r)
+        return [(template.template_id << TEMPLATE_SHIFT) | pair for template in templates]
+
+    def get_probabilities(self, keys: Sequence[BeliefKey] | np.ndarray) -> np.ndarray:
+        if isinstance(keys, np.ndarray):
+            keys = keys.tolist()
+        index = self._belief_index
+        return np.fromiter(((belief.probability if (belief := index.get(key)) else DEFAULT_PRIOR) for key in keys),
+                           dtype=np.float64, count=len(keys))
+
+    def get_probabilities_for(self, templates: Sequence[PredicateTemplate], i: BNPCType, r: BNPCType | None) -> np.ndarray:
+        return self.get_probabilities(self.keys_for(templates, i, r))
+
+    def __len__(self) -> int:
+        return len(self._belief_index)
 
     def __iter__(self):
         return iter(self.beliefs)
@@ -55,14 +160,27 @@ class BeliefStore:
         return False
 
     def update(self, predicate: Predicate, probability: float):
+        check_probability(probability)
         key = self._key_from_predicate(predicate)
         belief = self._belief_index.get(key)
         if belief:
-            belief.probability = probability
-        else:
+            if belief.probability != probability:
+                belief.probability = probability
+                self._journal.record(key)
+        elif not self._is_uninformative(probability):
             new_belief = Belief(predicate=predicate, probability=probability, predicate_template=predicate.template)
-            self.beliefs.append(new_belief)
-            self._belief_index[key] = new_belief
+            self._append(key, new_belief)
+
+    def _is_uninformative(self, probability: float) -> bool:
+        return self.sparse_epsilon is not None and abs(probability - DEFAULT_PRIOR) <= self.sparse_epsilon
+
+    def compact(self) -> int:
+        if self.sparse_epsilon is None:
+            return 0
+        stale = [key for key, belief in self._belief_index.items() if self._is_uninformative(belief.probability)]
+        for key in stale:
+            self._remove_key(key)
+        return len(stale)
 
     def add_belief(self, predicate: Predicate, probability: float = 1.0):
         if not isinstance(predicate, Predicate):
@@ -70,19 +188,53 @@ class BeliefStore:
         self.update(predicate, probability)
 
     def remove_predicate(self, pred_type: str, subtype: str) -> None:
-        to_remove = []
-        for belief in self.beliefs:
-            pred = belief.predicate
-            if pred.pred_type == pred_type and pred.subtype == subtype:
-                to_remove.append(belief)
+        bucket = self._by_type.get((pred_type, subtype))
+        if not bucket:
+            return
 
-        for belief in to_remove:
-            self.beliefs.remove(belief)
-            key = self._key_from_predicate(belief.predicate)
-            self._belief_index.pop(key, None)
+        for key in list(bucket):
+            self._remove_key(key)
+
+    def remove_belief(self, predicate: Predicate) -> None:
+        self._remove_key(self._key_from_predicate(predicate))
+
+    def rename_predicate(self, pred_type: str, subtype: str, new_subtype: str) -> None:
+        bucket = self._by_type.get((pred_type, subtype))
+        if not bucket or subtype == new_subtype:
+            return
+
+        renamed: Dict[bool, PredicateTemplate] = {}  # by is_single
+        for key in list(bucket):
+            belief = self._remove_key(key)
+            old = belief.predicate
+            template = renamed.get(old.is_single)
+            if template is None:
+                template = renamed[old.is_single] = PredicateTemplate(pred_type=pred_type, subtype=new_subtype,
+                                                                      is_single=old.is_single)
+            belief.predicate = template.instantiate(subject=old.subject, target=old.target)
+            belief.predicate_template = template
+            new_key = self._key_from_predicate(belief.predicate)
+            # a belief already stored under the new name is overwritten by the renamed one
+            self._remove_key(new_key)
+            self._append(new_key, belief)
+
+    def to_compact(self) -> List[CompactBelief]:
+        return [CompactBelief.from_belief(belief) for belief in self.beliefs]
+
+    @classmethod
+    def from_compact(cls, beliefs: Iterable[CompactBelief], npcs: Mapping[int, BNPCType], **kwargs) -> "BeliefStore":
+        return cls(beliefs=[belief.to_belief(npcs) for belief in beliefs], **kwargs)
+
+    def get_beliefs_about(self, subject: BNPCType) -> List[Belief]:
+        return list(self._by_subject.get(subject.id, {}).values())
+
+    def get_beliefs_of_type(self, pred_type: str, subtype: str) -> List[Belief]:
+        return list(self._by_type.get((pred_type, subtype), {}).values())
 
     def get_traits_about(self, subject: BNPCType) -> List[Belief]:
-        return [belief for belief in self.beliefs if belief.predicate.subject == subject and belief.predicate.is_single]
+        bucket = self._by_pair.get(self._pair_key(subject, None), {})
+        return [belief for belief in bucket.values() if belief.predicate.is_single]
 
     def get_relationships_about(self, subject: BNPCType, target: BNPCType) -> List[Belief]:
-        return [belief for belief in self.beliefs if not belief.predicate.is_single and belief.predicate.subject == subject and belief.predicate.target == target]
+        bucket = self._by_pair.get(self._pair_key(subject, target), {})
+        return [belief for belief in bucket.values() if not belief.predicate.is_single]
@@ -0,0 +1,75 @@
+from dataclasses import dataclass
+from typing import List, Sequence
+
+import numpy as np
+
+from src.belief.Belief import Belief
+from src.belief.BeliefStore import DEFAULT_PRIOR, BeliefStore
+from src.predicates.Predicate import Predicate
+from src.predicates.PredicateRegistry import NPC_ID_BITS, NPC_ID_MASK
+from src.predicates.PredicateTemplate import PredicateTemplate
+from src.types.NPCTypes import BNPCType
+
+
+@dataclass(slots=True)
+class BeliefStoreView:
+    # Read-only window on the beliefs of `store` whose subject is `subject`.
+    # Nothing is copied: lookups and iteration go straight to the underlying store.
+    store: BeliefStore
+    subject: BNPCType
+
+    def _covers(self, npc: BNPCType) -> bool:
+        return npc is not None and npc.id == self.subject.id
+
+    @property
+    def version(self) -> int:
+        return self.store.version
+
+    def changes_since(self, version: int) -> set[int] | None:
+        changed = self.store.changes_since(version)
+        if changed is None:
+            return None
+        return {key for key in changed if (key >> NPC_ID_BITS) & NPC_ID_MASK == self.subject.id}
+
+    def get_probability(self, predicate_temp: PredicateTemplate, i: BNPCType, r: BNPCType):
+        if not self._covers(i):
+            return DEFAULT_PRIOR
+        return self.store.get_probability(predicate_temp, i, r)
+
+    def get_probabilities(self, keys: Sequence[int] | np.ndarray) -> np.ndarray:
+        keys = np.asarray(keys, dtype=np.int64)
+        result = self.store.get_probabilities(keys)
+        result[((keys >> NPC_ID_BITS) & NPC_ID_MASK) != self.subject.id] = DEFAULT_PRIOR
+        return result
+
+    def get_probabilities_for(self, templates: Sequence[PredicateTemplate], i: BNPCType, r: BNPCType | None) -> np.ndarray:
+        if not self._covers(i):
+            return np.full(len(templates), DEFAULT_PRIOR)
+        return self.store.get_probabilities_for(templates, i, r)
+
+    def __len__(self) -> int:
+        return len(self.store.get_beliefs_about(self.subject))
+
+    def __iter__(self):
+        return iter(self.store.get_beliefs_about(self.subject))
+
+    def __contains__(self, item: Belief | Predicate):
+        predicate = item.predicate if isinstance(item, Belief) else item
+        if not isinstance(predicate, Predicate) or not self._covers(predicate.subject):
+            return False
+        return predicate in self.store
+
+    def update(self, predicate: Predicate, probability: float):
+        raise TypeError("BeliefStoreView is read-only.")
+
+    def add_belief(self, predicate: Predicate, probability: float = 1.0):
+        raise TypeError("BeliefStoreView is read-only.")
+
+    def get_beliefs_about(self, subject: BNPCType) -> List[Belief]:
+        return self.store.get_beliefs_about(subject) if self._covers(subject) else []
+
+    def get_traits_about(self, subject: BNPCType) -> List[Belief]:
+        return self.store.get_traits_about(subject) if self._covers(subject) else []
+
+    def get_relationships_about(self, subject: BNPCType, target: BNPCType) -> List[Belief]:
+        return self.store.get_relationships_about(subject, target) if self._covers(subject) else []
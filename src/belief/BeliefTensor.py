@@ -0,0 +1,194 @@
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from src.belief.BeliefStore import DEFAULT_PRIOR
+from src.belief.ObserverSlabs import ObserverSlabs
+from src.belief.TensorBeliefStore import TensorBeliefStore
+from src.predicates.Predicate import Predicate
+from src.predicates.PredicateRegistry import pack_key, predicate_registry
+from src.predicates.PredicateTemplate import PredicateTemplate
+from src.types.NPCTypes import BNPCType
+from src.utils import logistic
+from src.utils.sigmoid import sigmoid
+
+
+class BeliefTensor:
+    # World-level storage of every NPC's subjective beliefs, as float32 arrays with NaN marking
+    # "no belief". Target-less templates get an observer x subject chunk; relational templates get
+    # a subject x target slab per observer, allocated on that observer's first write (see
+    # ObserverSlabs), so a relationship type costs n^2 floats per observer that holds it rather
+    # than n^3 up front.
+    # NPC ids must be 0..n-1. With log_odds set the arrays hold log(p / (1 - p)) instead of p.
+
+    def __init__(self, npcs: Sequence[BNPCType], sparse_epsilon: float | None = None, journal_size: int = 0,
+                 log_odds: bool = False):
+        self.npcs: List[BNPCType] = sorted(npcs, key=lambda npc: npc.id)
+        if [npc.id for npc in self.npcs] != list(range(len(self.npcs))):
+            raise ValueError("BeliefTensor requires NPC ids 0..n-1.")
+        self.sparse_epsilon = sparse_epsilon
+        self.log_odds = log_odds
+        self.subject_chunks: Dict[int, np.ndarray] = {}
+        self.pair_chunks: Dict[int, ObserverSlabs] = {}
+        self.stores = [TensorBeliefStore(self, observer, journal_size) for observer in range(len(self.npcs))]
+
+    def __getstate__(self):
+        # template ids are per-process: persist the templates themselves and re-register on load
+        state = dict(self.__dict__)
+        for name in ("subject_chunks", "pair_chunks"):
+            state[name] = [(predicate_registry.template(code), chunk) for code, chunk in state[name].items()]
+        return state
+
+    def __setstate__(self, state):
+        state.setdefault("log_odds", False)
+        self.__dict__.update(state)
+        self.subject_chunks = {template.template_id: chunk for template, chunk in state["subject_chunks"]}
+        # older saves kept one dense observer x subject x target chunk per relational template
+        self.pair_chunks = {template.template_id: ObserverSlabs.from_dense(slabs) if isinstance(slabs, np.ndarray)
+                            else slabs for template, slabs in state["pair_chunks"]}
+
+    def __len__(self) -> int:
+        return len(self.npcs)
+
+    def attach(self) -> None:
+        for npc in self.npcs:
+            npc.beliefStore = self.stores[npc.id]
+
+    def _subject_chunk(self, template_id: int, create: bool = False) -> np.ndarray | None:
+        chunk = self.subject_chunks.get(template_id)
+        if chunk is None and create:
+            n = len(self.npcs)
+            chunk = self.subject_chunks[template_id] = np.full((n, n), np.nan, dtype=np.float32)
+        return chunk
+
+    def _pair_slabs(self, template_id: int, create: bool = False) -> ObserverSlabs | None:
+        slabs = self.pair_chunks.get(template_id)
+        if slabs is None and create:
+            slabs = self.pair_chunks[template_id] = ObserverSlabs(len(self.npcs))
+        return slabs
+
+    def row(self, template_id: int, paired: bool, observer: int, create: bool = False) -> np.ndarray | None:
+        # one observer's values of one template, by subject (x target when paired); a view that
+        # is only valid until the next relational slab of the template is allocated
+        if not paired:
+            chunk = self._subject_chunk(template_id, create)
+            return chunk[observer] if chunk is not None else None
+        slabs = self._pair_slabs(template_id, create)
+        if slabs is None:
+            return None
+        if create:
+            slabs.allocate(np.array([observer]))
+        return slabs.slab(observer)
+
+    def probabilities(self, template: PredicateTemplate, paired: bool | None = None) -> np.ndarray:
+        # observer x subject (x target) slice of one template with the prior filled in for missing
+        # beliefs; relational slices are dense n^3 arrays, so only ask for them on small worlds
+        paired = not template.is_single if paired is None else paired
+        n = len(self.npcs)
+        if paired:
+            values = np.full((n, n, n), np.nan, dtype=np.float32)
+            for observer, slab in self.pair_chunks.get(template.template_id, ()):
+                values[observer] = slab
+        else:
+            values = self._subject_chunk(template.template_id)
+            if values is None:
+                return np.full((n, n), DEFAULT_PRIOR, dtype=np.float32)
+        if self.log_odds:
+            values = logistic.sigmoid(values).astype(np.float32)
+        return np.where(np.isnan(values), np.float32(DEFAULT_PRIOR), values)
+
+    def gather(self, observers: np.ndarray, template_id: int, subject_id: int, target_id: int | None) -> np.ndarray:
+        # raw stored values (NaN = no belief) of one belief for several observers, indexed the
+        # way TensorBeliefStore.get_probability indexes them
+        if target_id is None:
+            chunk = self._subject_chunk(template_id)
+            if chunk is None:
+                return np.full(len(observers), np.nan)
+            return chunk[observers, subject_id].astype(np.float64)
+        slabs = self._pair_slabs(template_id)
+        if slabs is None:
+            return np.full(len(observers), np.nan)
+        return slabs.gather(observers, subject_id, target_id)
+
+    def scatter(self, observers: np.ndarray, predicate: Predicate, values: np.ndarray) -> None:
+        # TensorBeliefStore.update for several observers at once; `values` are stored as they are
+        # (log-odds in log-odds mode) and converted only to decide whether a new belief is uninformative
+        template_id = predicate.template.template_id
+        subject_id = predicate.subject.id
+        target_id = predicate.target.id if predicate.target is not None else None
+        current = self.gather(observers, template_id, subject_id, target_id)
+        stored = values.astype(np.float32)
+        new = np.isnan(current)
+        write = ~new & (current != stored)
+        if self.sparse_epsilon is None:
+            write |= new
+        else:
+            for n in np.flatnonzero(new).tolist():
+                probability = sigmoid(float(values[n])) if self.log_odds else float(values[n])
+                write[n] = abs(probability - DEFAULT_PRIOR) > self.sparse_epsilon
+        if not write.any():
+            return
+        if target_id is None:
+            self._subject_chunk(template_id, create=True)[observers[write], subject_id] = stored[write]
+        else:
+            self._pair_slabs(template_id, create=True).scatter(observers[write], subject_id, target_id, stored[write])
+        key = pack_key(template_id, subject_id, target_id)
+        for observer in observers[write].tolist():
+            self.stores[observer]._journal.record(key)
+
+    def _invalidate_stores(self) -> None:
+        for store in self.stores:
+            store._journal.invalidate_all()
+
+    def remove_predicate(self, pred_type: str, subtype: str) -> None:
+        removed = False
+        for code in predicate_registry.ids_of_type(pred_type, subtype):
+            removed |= self.subject_chunks.pop(code, None) is not None
+            removed |= self.pair_chunks.pop(code, None) is not None
+        if removed:
+            self._invalidate_stores()
+
+    def rename_predicate(self, pred_type: str, subtype: str, new_subtype: str) -> None:
+        if subtype == new_subtype:
+            return
+        renamed = False
+        for code in predicate_registry.ids_of_type(pred_type, subtype):
+            new_code = PredicateTemplate(pred_type=pred_type, subtype=new_subtype,
+                                         is_single=predicate_registry.template(code).is_single).template_id
+            chunk = self.subject_chunks.pop(code, None)
+            if chunk is not None:
+                renamed = True
+                existing = self.subject_chunks.get(new_code)
+                if existing is None:
+                    self.subject_chunks[new_code] = chunk
+                else:
+                    # a belief already stored under the new name is overwritten by the renamed one
+                    present = ~np.isnan(chunk)
+                    existing[present] = chunk[present]
+            slabs = self.pair_chunks.pop(code, None)
+            if slabs is not None:
+                renamed = True
+                existing = self.pair_chunks.get(new_code)
+                if existing is None:
+                    self.pair_chunks[new_code] = slabs
+                    continue
+                for observer, slab in slabs:
+                    target = self.row(new_code, True, observer, create=True)
+                    present = ~np.isnan(slab)
+                    target[present] = slab[present]
+        if renamed:
+            self._invalidate_stores()
+
+    def compact(self) -> int:
+        if self.sparse_epsilon is None:
+            return 0
+        removed = 0
+        arrays = list(self.subject_chunks.values()) + [slabs.pool[:slabs.size] for slabs in self.pair_chunks.values()]
+        for values in arrays:
+            probabilities = logistic.sigmoid(values) if self.log_odds else values
+            stale = np.abs(probabilities - DEFAULT_PRIOR) <= self.sparse_epsilon
+            removed += int(np.count_nonzero(stale))
+            values[stale] = np.nan
+        if removed:
+            self._invalidate_stores()
+        return removed
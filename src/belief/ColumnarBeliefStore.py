@@ -0,0 +1,299 @@
+from typing import Dict, Iterable, Iterator, List, Mapping, Sequence
+
+import numpy as np
+
+from src.belief.Belief import Belief, check_probability
+from src.belief.BeliefJournal import BeliefJournal
+from src.belief.BeliefStore import DEFAULT_PRIOR, BeliefStore
+from src.belief.CompactBelief import CompactBelief
+from src.belief.LogOddsMixin import LogOddsMixin
+from src.belief.PackedKeyIndex import PackedKeyIndex
+from src.predicates.Predicate import Predicate
+from src.predicates.PredicateRegistry import NPC_ID_BITS, TEMPLATE_SHIFT, pack_key, predicate_registry
+from src.predicates.PredicateTemplate import PredicateTemplate
+from src.types.NPCTypes import BNPCType
+from src.utils import logistic
+from src.utils.sigmoid import sigmoid
+
+NO_TARGET = -1
+
+
+class ColumnarBeliefStore(LogOddsMixin):
+    # Array-backed alternative to BeliefStore with the same public API.
+    # Every belief is one row in four parallel columns (int32 template id,
+    # subject id, target id and float32 probability); Belief objects are only
+    # materialised when iterating, so mutating them does not write back.
+    # With log_odds set the probability column holds log(p / (1 - p)) instead, so
+    # update_log_odds is a single addition; reads convert back to probabilities.
+
+    def __init__(self, beliefs: Iterable[Belief] = (), capacity: int = 64, sparse_epsilon: float | None = None,
+                 journal_size: int = 0, log_odds: bool = False):
+        self.sparse_epsilon = sparse_epsilon
+        self.log_odds = log_odds
+        self._journal = BeliefJournal(max_entries=journal_size)
+        self._single = np.zeros(0, dtype=bool)  # is_single by registry template id
+        self._npcs: Dict[int, BNPCType] = {}
+        self._rows = PackedKeyIndex()
+        self._size = 0
+        self._template_col = np.empty(capacity, dtype=np.int32)
+        self._subject_col = np.empty(capacity, dtype=np.int32)
+        self._target_col = np.empty(capacity, dtype=np.int32)
+        self._probability_col = np.empty(capacity, dtype=np.float32)
+
+        for belief in beliefs:
+            self.update(belief.predicate, belief.probability)
+
+    def __getstate__(self):
+        # template ids are per-process: persist the templates themselves and re-register on load
+        state = {name: value for name, value in self.__dict__.items() if name not in ("_rows", "_single")}
+        used, local = np.unique(self._template_col[:self._size], return_inverse=True)
+        state["_template_col"] = local.astype(np.int32)
+        state["_templates"] = [predicate_registry.template(int(template_id)) for template_id in used]
+        return state
+
+    def __setstate__(self, state):
+        templates = state.pop("_templates")
+        state.setdefault("log_odds", False)
+        self.__dict__.update(state)
+        ids = np.array([template.template_id for template in templates], dtype=np.int32)
+        self._template_col = ids[self._template_col] if len(ids) else self._template_col
+        self._grow(len(self._probability_col))
+        self._single = np.zeros(0, dtype=bool)
+        self._reindex()
+        # logged keys carry the old template ids
+        self._journal.invalidate_all()
+
+    @property
+    def version(self) -> int:
+        return self._journal.version
+
+    def changes_since(self, version: int) -> set[int] | None:
+        return self._journal.changes_since(version)
+
+    def _encode(self, probability: float) -> float:
+        return float(logistic.logit(probability)) if self.log_odds else probability
+
+    def _decode(self, values: np.ndarray) -> np.ndarray:
+        return logistic.sigmoid(values) if self.log_odds else values
+
+    def _single_mask(self) -> np.ndarray:
+        if len(self._single) < len(predicate_registry):
+            self._single = np.array([predicate_registry.template(template_id).is_single
+                                     for template_id in range(len(predicate_registry))], dtype=bool)
+        return self._single[self._template_col[:self._size]]
+
+    def _codes_of_type(self, pred_type: str, subtype: str) -> List[int]:
+        return predicate_registry.ids_of_type(pred_type, subtype)
+
+    def _row_of(self, predicate: Predicate) -> int | None:
+        return self._rows.get(pack_key(predicate.template.template_id, predicate.subject.id,
+                                       predicate.target.id if predicate.target else None))
+
+    def _grow(self, capacity: int | None = None) -> None:
+        capacity = capacity or max(2 * len(self._probability_col), 64)
+        for name in ("_template_col", "_subject_col", "_target_col", "_probability_col"):
+            column = getattr(self, name)
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            setattr(self, name, grown)
+
+    def _materialize(self, row: int) -> Belief:
+        template = predicate_registry.template(int(self._template_col[row]))
+        target_id = int(self._target_col[row])
+        predicate = template.instantiate(
+            subject=self._npcs[int(self._subject_col[row])],
+            target=self._npcs[target_id] if target_id != NO_TARGET else None,
+        )
+        return Belief(predicate=predicate, probability=float(self._decode(self._probability_col[row])),
+                      predicate_template=template)
+
+    def _materialize_mask(self, mask: np.ndarray) -> List[Belief]:
+        return [self._materialize(row) for row in np.flatnonzero(mask)]
+
+    @property
+    def beliefs(self) -> List[Belief]:
+        return list(self)
+
+    def get_probability(self, predicate_temp: PredicateTemplate, i: BNPCType, r: BNPCType):
+        row = self._rows.get(pack_key(predicate_temp.template_id, i.id, r.id if r else None))
+        if row is None:
+            return DEFAULT_PRIOR
+        value = float(self._probability_col[row])
+        return sigmoid(value) if self.log_odds else value
+
+    def get_log_odds(self, predicate_temp: PredicateTemplate, i: BNPCType, r: BNPCType) -> float:
+        row = self._rows.get(pack_key(predicate_temp.template_id, i.id, r.id if r else None))
+        if row is None:
+            return float(logistic.logit(DEFAULT_PRIOR))
+        value = float(self._probability_col[row])
+        return value if self.log_odds else float(logistic.logit(value))
+
+    @staticmethod
+    def keys_for(templates: Sequence[PredicateTemplate], i: BNPCType, r: BNPCType | None) -> List[int]:
+        return BeliefStore.keys_for(templates, i, r)
+
+    def get_probabilities(self, keys: Sequence[int] | np.ndarray) -> np.ndarray:
+        rows = self._rows.get_many(keys)
+        found = rows >= 0
+        result = np.full(len(rows), DEFAULT_PRIOR)
+        result[found] = self._decode(self._probability_col[rows[found]])
+        return result
+
+    def get_probabilities_for(self, templates: Sequence[PredicateTemplate], i: BNPCType, r: BNPCType | None) -> np.ndarray:
+        return self.get_probabilities(self.keys_for(templates, i, r))
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[Belief]:
+        return (self._materialize(row) for row in range(self._size))
+
+    def __contains__(self, item: Belief | Predicate):
+        if isinstance(item, Belief):
+            return self._row_of(item.predicate) is not None
+        elif isinstance(item, Predicate):
+            return self._row_of(item) is not None
+        return False
+
+    def update(self, predicate: Predicate, probability: float):
+        check_probability(probability)
+        self._write(predicate, self._encode(probability), probability)
+
+    def _write(self, predicate: Predicate, value: float, probability: float):
+        row = self._row_of(predicate)
+        if row is not None:
+            if self._probability_col[row] != np.float32(value):
+                self._probability_col[row] = value
+                self._journal.record(self._keys(row, row + 1)[0].item())
+            return
+        if self.sparse_epsilon is not None and abs(probability - DEFAULT_PRIOR) <= self.sparse_epsilon:
+            return
+
+        if self._size == len(self._probability_col):
+            self._grow()
+        code = predicate.template.template_id
+        target_id = predicate.target.id if predicate.target else NO_TARGET
+        self._npcs[predicate.subject.id] = predicate.subject
+        if predicate.target:
+            self._npcs[target_id] = predicate.target
+
+        row = self._size
+        self._template_col[row] = code
+        self._subject_col[row] = predicate.subject.id
+        self._target_col[row] = target_id
+        self._probability_col[row] = value
+        key = pack_key(code, predicate.subject.id, predicate.target.id if predicate.target else None)
+        self._rows.set(key, row)
+        self._size += 1
+        self._journal.record(key)
+
+    def add_belief(self, predicate: Predicate, probability: float = 1.0):
+        if not isinstance(predicate, Predicate):
+            raise TypeError("Only Predicate instances can be added as traits.")
+        self.update(predicate, probability)
+
+    def remove_predicate(self, pred_type: str, subtype: str) -> None:
+        codes = self._codes_of_type(pred_type, subtype)
+        if not codes:
+            return
+
+        self._compress(~np.isin(self._template_col[:self._size], codes))
+
+    def compact(self) -> int:
+        if self.sparse_epsilon is None:
+            return 0
+        before = self._size
+        self._compress(np.abs(self._decode(self._probability_col[:before]) - DEFAULT_PRIOR) > self.sparse_epsilon)
+        return before - self._size
+
+    def remove_belief(self, predicate: Predicate) -> None:
+        key = pack_key(predicate.template.template_id, predicate.subject.id,
+                       predicate.target.id if predicate.target else None)
+        row = self._rows.pop(key)
+        if row is None:
+            return
+
+        last = self._size - 1
+        if row != last:
+            for name in ("_template_col", "_subject_col", "_target_col", "_probability_col"):
+                column = getattr(self, name)
+                column[row] = column[last]
+            self._rows.set(self._keys(row, row + 1)[0].item(), row)
+        self._size = last
+        self._journal.record(key)
+
+    def rename_predicate(self, pred_type: str, subtype: str, new_subtype: str) -> None:
+        codes = self._codes_of_type(pred_type, subtype)
+        if not codes or subtype == new_subtype:
+            return
+
+        renamed_ids = {code: PredicateTemplate(pred_type=pred_type, subtype=new_subtype,
+                                               is_single=predicate_registry.template(code).is_single).template_id
+                       for code in codes}
+        remap = np.arange(len(predicate_registry), dtype=np.int32)
+        for code, renamed_id in renamed_ids.items():
+            remap[code] = renamed_id
+
+        n = self._size
+        renamed = np.isin(self._template_col[:n], codes)
+        old_keys = self._keys()[renamed]
+        self._template_col[:n] = remap[self._template_col[:n]]
+        # a belief already stored under the new name is overwritten by the renamed one
+        keys = self._keys()
+        keep = renamed | ~np.isin(keys, keys[renamed])
+        self._compress(keep, changed=np.concatenate((old_keys, keys[renamed])))
+
+    def _compress(self, keep: np.ndarray, changed: np.ndarray | None = None) -> None:
+        n = self._size
+        dropped = self._keys()[~keep]
+        if changed is not None:
+            dropped = np.concatenate((dropped, changed))
+        if len(dropped):
+            self._journal.record_many(dropped.tolist())
+        for name in ("_template_col", "_subject_col", "_target_col", "_probability_col"):
+            column = getattr(self, name)
+            kept = column[:n][keep]
+            column[:len(kept)] = kept
+        self._size = int(keep.sum())
+        self._reindex()
+
+    def _keys(self, start: int = 0, stop: int | None = None) -> np.ndarray:
+        rows = slice(start, self._size if stop is None else stop)
+        return ((self._template_col[rows].astype(np.int64) << TEMPLATE_SHIFT)
+                | (self._subject_col[rows].astype(np.int64) << NPC_ID_BITS)
+                | (self._target_col[rows].astype(np.int64) + 1))
+
+    def _reindex(self) -> None:
+        self._rows = PackedKeyIndex()
+        self._rows.rebuild(self._keys())
+
+    def to_compact(self) -> List[CompactBelief]:
+        n = self._size
+        columns = (self._template_col[:n].tolist(), self._subject_col[:n].tolist(),
+                   self._target_col[:n].tolist(), self._decode(self._probability_col[:n]).tolist())
+        return [CompactBelief(template_id, subject_id, target_id if target_id != NO_TARGET else None, probability)
+                for template_id, subject_id, target_id, probability in zip(*columns)]
+
+    @classmethod
+    def from_compact(cls, beliefs: Iterable[CompactBelief], npcs: Mapping[int, BNPCType],
+                     **kwargs) -> "ColumnarBeliefStore":
+        return cls(beliefs=(belief.to_belief(npcs) for belief in beliefs), **kwargs)
+
+    def get_beliefs_about(self, subject: BNPCType) -> List[Belief]:
+        return self._materialize_mask(self._subject_col[:self._size] == subject.id)
+
+    def get_beliefs_of_type(self, pred_type: str, subtype: str) -> List[Belief]:
+        codes = self._codes_of_type(pred_type, subtype)
+        return self._materialize_mask(np.isin(self._template_col[:self._size], codes))
+
+    def get_traits_about(self, subject: BNPCType) -> List[Belief]:
+        n = self._size
+        mask = (self._subject_col[:n] == subject.id) & self._single_mask()
+        return self._materialize_mask(mask)
+
+    def get_relationships_about(self, subject: BNPCType, target: BNPCType) -> List[Belief]:
+        n = self._size
+        mask = ((self._subject_col[:n] == subject.id)
+                & (self._target_col[:n] == (target.id if target else NO_TARGET))
+                & ~self._single_mask())
+        return self._materialize_mask(mask)
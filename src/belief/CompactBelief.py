@@ -0,0 +1,44 @@
+from dataclasses import dataclass
+from typing import Mapping
+
+from src.belief.Belief import Belief
+from src.predicates.PredicateRegistry import pack_key, predicate_registry
+from src.predicates.PredicateTemplate import PredicateTemplate
+from src.types.NPCTypes import BNPCType
+
+
+@dataclass(slots=True)
+class CompactBelief:
+    # Belief without object references: registry template id and NPC ids only.
+    template_id: int
+    subject_id: int
+    target_id: int | None
+    probability: float
+
+    @classmethod
+    def from_belief(cls, belief: Belief) -> "CompactBelief":
+        predicate = belief.predicate
+        return cls(predicate.template.template_id, predicate.subject.id,
+                   predicate.target.id if predicate.target else None, belief.probability)
+
+    @property
+    def template(self) -> PredicateTemplate:
+        return predicate_registry.template(self.template_id)
+
+    @property
+    def key(self) -> int:
+        return pack_key(self.template_id, self.subject_id, self.target_id)
+
+    def to_belief(self, npcs: Mapping[int, BNPCType]) -> Belief:
+        template = self.template
+        predicate = template.instantiate(subject=npcs[self.subject_id],
+                                         target=npcs[self.target_id] if self.target_id is not None else None)
+        return Belief(predicate=predicate, probability=self.probability, predicate_template=template)
+
+    def __getstate__(self):
+        # template ids are per-process: pickle the template and re-register on load
+        return self.template, self.subject_id, self.target_id, self.probability
+
+    def __setstate__(self, state):
+        template, self.subject_id, self.target_id, self.probability = state
+        self.template_id = template.template_id
@@ -0,0 +1,24 @@
+import math
+
+from src.predicates.Predicate import Predicate
+from src.utils.sigmoid import sigmoid
+
+
+class LogOddsMixin:
+    # Log-odds updates shared by the array-backed stores. The store provides `log_odds` (whether
+    # it keeps log-odds rather than probabilities), get_log_odds, update and
+    # _write(predicate, stored value, probability).
+
+    def update_log_odds(self, predicate: Predicate, log_likelihood_ratio: float):
+        # Bayes' rule in log-odds form: posterior = prior + log(P(obs | true) / P(obs | false))
+        prior = self.get_log_odds(predicate.template, predicate.subject, predicate.target)
+        self.set_log_odds(predicate, prior + log_likelihood_ratio)
+
+    def set_log_odds(self, predicate: Predicate, value: float):
+        # NaN (evidence impossible either way) leaves the belief untouched
+        if math.isnan(value):
+            return
+        if self.log_odds:
+            self._write(predicate, value, sigmoid(value))
+        else:
+            self.update(predicate, sigmoid(value))
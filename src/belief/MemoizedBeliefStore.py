@@ -0,0 +1,61 @@
+from typing import Dict, Sequence
+
+import numpy as np
+
+from src.belief.BeliefStore import BeliefStore
+from src.predicates.PredicateTemplate import PredicateTemplate
+from src.types.NPCTypes import BNPCType
+
+
+class MemoizedBeliefStore:
+    # Wraps a store (or view) and remembers every probability it has answered, by packed key,
+    # so conditions shared between templates and rules are looked up once per pair. The memo
+    # is dropped as soon as the wrapped store's version changes; everything else is delegated.
+
+    def __init__(self, store: BeliefStore):
+        self.store = store
+        self.misses = 0  # keys actually looked up in the wrapped store
+        self._cache: Dict[int, float] = {}
+        self._version = store.version
+
+    def __getattr__(self, name):
+        return getattr(self.store, name)
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def __iter__(self):
+        return iter(self.store)
+
+    def __contains__(self, item):
+        return item in self.store
+
+    def _sync(self) -> Dict[int, float]:
+        if self.store.version != self._version:
+            self._cache.clear()
+            self._version = self.store.version
+        return self._cache
+
+    def get_probability(self, predicate_temp: PredicateTemplate, i: BNPCType, r: BNPCType):
+        cache = self._sync()
+        key = BeliefStore._key_from_template(predicate_temp, i, r)
+        probability = cache.get(key)
+        if probability is None:
+            self.misses += 1
+            probability = cache[key] = self.store.get_probability(predicate_temp, i, r)
+        return probability
+
+    def get_probabilities(self, keys: Sequence[int] | np.ndarray) -> np.ndarray:
+        cache = self._sync()
+        if isinstance(keys, np.ndarray):
+            keys = keys.tolist()
+        try:
+            return np.array([cache[key] for key in keys], dtype=np.float64)
+        except KeyError:
+            missing = list(dict.fromkeys(key for key in keys if key not in cache))
+            self.misses += len(missing)
+            cache.update(zip(missing, self.store.get_probabilities(missing).tolist()))
+            return np.array([cache[key] for key in keys], dtype=np.float64)
+
+    def get_probabilities_for(self, templates: Sequence[PredicateTemplate], i: BNPCType, r: BNPCType | None) -> np.ndarray:
+        return self.get_probabilities(BeliefStore.keys_for(templates, i, r))
@@ -0,0 +1,71 @@
+from typing import Iterator, Tuple
+
+import numpy as np
+
+NO_SLAB = -1
+
+
+class ObserverSlabs:
+    # The subject x target float32 slabs (NaN = no belief) of one relational template in a
+    # BeliefTensor, one per observer that holds any of its beliefs. Slabs are handed out from one
+    # pool that grows as observers write, so memory follows the observers that actually hold the
+    # relationship while several observers are still read or written with a single fancy index.
+    # Growing the pool moves it: views returned by slab() are only valid until the next allocate().
+
+    def __init__(self, n: int):
+        self.n = n
+        self.slots = np.full(n, NO_SLAB, dtype=np.int64)  # pool index by observer
+        self.pool = np.empty((0, n, n), dtype=np.float32)
+        self.size = 0
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["pool"] = self.pool[:self.size]
+        return state
+
+    @classmethod
+    def from_dense(cls, chunk: np.ndarray) -> "ObserverSlabs":
+        # observer x subject x target chunk, as kept by saves from before the pool
+        slabs = cls(chunk.shape[0])
+        held = np.flatnonzero(~np.isnan(chunk).all(axis=(1, 2)))
+        slabs.allocate(held)
+        slabs.pool[slabs.slots[held]] = chunk[held]
+        return slabs
+
+    def __iter__(self) -> Iterator[Tuple[int, np.ndarray]]:
+        # (observer, slab) of every allocated slab
+        for observer in np.flatnonzero(self.slots != NO_SLAB).tolist():
+            yield observer, self.pool[self.slots[observer]]
+
+    def slab(self, observer: int) -> np.ndarray | None:
+        slot = self.slots.item(observer)
+        return self.pool[slot] if slot != NO_SLAB else None
+
+    def allocate(self, observers: np.ndarray) -> None:
+        # gives every observer in `observers` a slab, growing the pool at most once
+        missing = np.unique(observers[self.slots[observers] == NO_SLAB])
+        if not len(missing):
+            return
+        needed = self.size + len(missing)
+        if needed > len(self.pool):
+            pool = np.empty((min(self.n, max(needed, 2 * len(self.pool), 4)), self.n, self.n), dtype=np.float32)
+            pool[:self.size] = self.pool[:self.size]
+            self.pool = pool
+        self.pool[self.size:needed] = np.nan
+        self.slots[missing] = np.arange(self.size, needed)
+        self.size = needed
+
+    def gather(self, observers: np.ndarray, subject_id: int, target_id: int) -> np.ndarray:
+        slots = self.slots[observers]
+        held = slots != NO_SLAB
+        values = np.full(len(observers), np.nan)
+        values[held] = self.pool[slots[held], subject_id, target_id]
+        return values
+
+    def scatter(self, observers: np.ndarray, subject_id: int, target_id: int, values: np.ndarray) -> None:
+        self.allocate(observers)
+        self.pool[self.slots[observers], subject_id, target_id] = values
+
+    @property
+    def nbytes(self) -> int:
+        return self.pool.nbytes + self.slots.nbytes
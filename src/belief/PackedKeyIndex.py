@@ -0,0 +1,141 @@
+from typing import Sequence
+
+import numpy as np
+
+MISSING = -1
+
+_EMPTY = -1
+_REMOVED = -2
+_GOLDEN = 0x9E3779B97F4A7C15  # Fibonacci hashing multiplier
+_WORD = (1 << 64) - 1
+
+
+class PackedKeyIndex:
+    # Packed belief key -> row for ColumnarBeliefStore: an open-addressing hash table in two
+    # numpy arrays (int64 keys, int32 rows) with linear probing, about 12 / load bytes per key
+    # instead of a ~100 byte dict entry. Packed keys are never negative, so -1 / -2 mark
+    # empty and removed slots.
+
+    max_load = 0.7
+
+    def __init__(self, capacity: int = 64):
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int) -> None:
+        self._bits = max(3, (capacity - 1).bit_length())
+        self._mask = (1 << self._bits) - 1
+        self._slots = np.full(1 << self._bits, _EMPTY, dtype=np.int64)
+        self._rows = np.zeros(1 << self._bits, dtype=np.int32)
+        self._used = 0  # occupied or removed slots
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _homes(self, keys: np.ndarray) -> np.ndarray:
+        return ((keys.astype(np.uint64) * np.uint64(_GOLDEN)) >> np.uint64(64 - self._bits)).astype(np.int64)
+
+    def _find(self, key: int) -> int:
+        # slot holding `key`, or -1
+        slots = self._slots
+        slot = ((key * _GOLDEN) & _WORD) >> (64 - self._bits)
+        while True:
+            stored = slots.item(slot)
+            if stored == key:
+                return slot
+            if stored == _EMPTY:
+                return -1
+            slot = (slot + 1) & self._mask
+
+    def get(self, key: int, default=None):
+        # _find inlined: this is the scalar lookup path of every store read
+        slots = self._slots
+        mask = self._mask
+        slot = ((key * _GOLDEN) & _WORD) >> (64 - self._bits)
+        while True:
+            stored = slots.item(slot)
+            if stored == key:
+                return self._rows.item(slot)
+            if stored == _EMPTY:
+                return default
+            slot = (slot + 1) & mask
+
+    def get_many(self, keys: Sequence[int] | np.ndarray) -> np.ndarray:
+        # rows of `keys`, MISSING where absent; probes every key in lock step
+        keys = np.asarray(keys, dtype=np.int64)
+        result = np.full(len(keys), MISSING, dtype=np.int64)
+        slots = self._homes(keys)
+        pending = np.arange(len(keys))
+        while len(pending):
+            stored = self._slots[slots]
+            found = stored == keys[pending]
+            result[pending[found]] = self._rows[slots[found]]
+            probing = ~found & (stored != _EMPTY)
+            pending = pending[probing]
+            slots = (slots[probing] + 1) & self._mask
+        return result
+
+    def set(self, key: int, row: int) -> None:
+        slots = self._slots
+        slot = ((key * _GOLDEN) & _WORD) >> (64 - self._bits)
+        reusable = -1
+        while True:
+            stored = slots.item(slot)
+            if stored == key:
+                self._rows[slot] = row
+                return
+            if stored == _EMPTY:
+                break
+            if stored == _REMOVED and reusable < 0:
+                reusable = slot
+            slot = (slot + 1) & self._mask
+        if reusable >= 0:
+            slot = reusable
+        else:
+            self._used += 1
+        slots[slot] = key
+        self._rows[slot] = row
+        self._size += 1
+        if self._used > self.max_load * len(slots):
+            self._rehash(2 * len(slots) if self._size > len(slots) // 4 else len(slots))
+
+    def pop(self, key: int):
+        slot = self._find(key)
+        if slot < 0:
+            return None
+        self._slots[slot] = _REMOVED
+        self._size -= 1
+        return self._rows.item(slot)
+
+    def _rehash(self, capacity: int) -> None:
+        live = self._slots >= 0
+        keys, rows = self._slots[live], self._rows[live]
+        self._allocate(capacity)
+        self._insert_new(keys, rows)
+
+    def _insert_new(self, keys: np.ndarray, rows: np.ndarray) -> None:
+        # bulk insert of distinct keys into a table without removed slots, probing in lock step;
+        # a slot wanted by several keys goes to the first of them, the others move on
+        slots = self._homes(keys)
+        pending = np.arange(len(keys))
+        while len(pending):
+            free = self._slots[slots] == _EMPTY
+            _, first = np.unique(slots[free], return_index=True)
+            placed = np.flatnonzero(free)[first]
+            self._slots[slots[placed]] = keys[pending[placed]]
+            self._rows[slots[placed]] = rows[pending[placed]]
+            waiting = np.ones(len(pending), dtype=bool)
+            waiting[placed] = False
+            pending = pending[waiting]
+            slots = (slots[waiting] + 1) & self._mask
+        self._used += len(keys)
+        self._size += len(keys)
+
+    def rebuild(self, keys: np.ndarray) -> None:
+        # keys[row] for every row
+        self._allocate(int(len(keys) / self.max_load) + 1)
+        self._insert_new(np.asarray(keys, dtype=np.int64), np.arange(len(keys), dtype=np.int32))
+
+    @property
+    def nbytes(self) -> int:
+        return self._slots.nbytes + self._rows.nbytes
@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import math
+from typing import Iterable, Iterator, List, Sequence, TYPE_CHECKING
+
+import numpy as np
+
+from src.belief.Belief import Belief, check_probability
+from src.belief.BeliefJournal import BeliefJournal
+from src.belief.BeliefStore import DEFAULT_PRIOR, BeliefStore
+from src.belief.LogOddsMixin import LogOddsMixin
+from src.predicates.Predicate import Predicate
+from src.predicates.PredicateRegistry import NPC_ID_BITS, NPC_ID_MASK, TEMPLATE_SHIFT, pack_key, predicate_registry
+from src.predicates.PredicateTemplate import PredicateTemplate
+from src.types.NPCTypes import BNPCType
+from src.utils import logistic
+from src.utils.sigmoid import sigmoid
+
+if TYPE_CHECKING:
+    from src.belief.BeliefTensor import BeliefTensor
+
+_ANY = object()
+
+
+class TensorBeliefStore(LogOddsMixin):
+    # One observer's slice of a BeliefTensor, with the same public API as BeliefStore.
+    # Beliefs live in the tensor's arrays; Belief objects are only materialised when iterating.
+
+    def __init__(self, tensor: BeliefTensor, observer: int, journal_size: int = 0):
+        self.tensor = tensor
+        self.observer = observer
+        self._journal = BeliefJournal(max_entries=journal_size)
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # logged keys carry the old template ids
+        self._journal.invalidate_all()
+
+    @property
+    def sparse_epsilon(self) -> float | None:
+        return self.tensor.sparse_epsilon
+
+    @property
+    def log_odds(self) -> bool:
+        return self.tensor.log_odds
+
+    @property
+    def version(self) -> int:
+        return self._journal.version
+
+    def changes_since(self, version: int) -> set[int] | None:
+        return self._journal.changes_since(version)
+
+    def _row(self, template_id: int, paired: bool) -> np.ndarray | None:
+        return self.tensor.row(template_id, paired, self.observer)
+
+    def _is_uninformative(self, probability: float) -> bool:
+        return self.sparse_epsilon is not None and abs(probability - DEFAULT_PRIOR) <= self.sparse_epsilon
+
+    def _entries(self, codes: Iterable[int] | None = None, subject_id: int | None = None, target=_ANY):
+        # (template id, subject id, target id or None, probability) of every stored belief matching the filters
+        for paired, chunks in ((False, self.tensor.subject_chunks), (True, self.tensor.pair_chunks)):
+            if target is not _ANY and (target is not None) != paired:
+                continue
+            for template_id in (chunks if codes is None else codes):
+                if template_id not in chunks:
+                    continue
+                row = self._row(template_id, paired)
+                if row is None:
+                    continue
+                if subject_id is not None:
+                    row = row[subject_id] if paired else row[subject_id:subject_id + 1]
+                    if paired and target is not _ANY:
+                        row = row[target:target + 1]
+                present = np.nonzero(~np.isnan(row))
+                for position in zip(*present):
+                    position = tuple(int(n) for n in position)
+                    if subject_id is None:
+                        subject, target_id = position[0], (position[1] if paired else None)
+                    else:
+                        subject = subject_id
+                        target_id = (target if target is not _ANY else position[0]) if paired else None
+                    value = float(row[position])
+                    yield template_id, subject, target_id, sigmoid(value) if self.log_odds else value
+
+    def _materialize(self, template_id: int, subject_id: int, target_id: int | None, probability: float) -> Belief:
+        template = predicate_registry.template(template_id)
+        npcs = self.tensor.npcs
+        predicate = template.instantiate(subject=npcs[subject_id],
+                                         target=npcs[target_id] if target_id is not None else None)
+        return Belief(predicate=predicate, probability=probability, predicate_template=template)
+
+    @property
+    def beliefs(self) -> List[Belief]:
+        return list(self)
+
+    def get_probability(self, predicate_temp: PredicateTemplate, i: BNPCType, r: BNPCType):
+        row = self._row(predicate_temp.template_id, r is not None)
+        if row is None:
+            return DEFAULT_PRIOR
+        value = float(row[i.id, r.id] if r is not None else row[i.id])
+        if math.isnan(value):
+            return DEFAULT_PRIOR
+        return sigmoid(value) if self.log_odds else value
+
+    def get_log_odds(self, predicate_temp: PredicateTemplate, i: BNPCType, r: BNPCType) -> float:
+        row = self._row(predicate_temp.template_id, r is not None)
+        value = math.nan if row is None else float(row[i.id, r.id] if r is not None else row[i.id])
+        if math.isnan(value):
+            return float(logistic.logit(DEFAULT_PRIOR))
+        return value if self.log_odds else float(logistic.logit(value))
+
+    @staticmethod
+    def keys_for(templates: Sequence[PredicateTemplate], i: BNPCType, r: BNPCType | None) -> List[int]:
+        return BeliefStore.keys_for(templates, i, r)
+
+    def get_probabilities(self, keys: Sequence[int] | np.ndarray) -> np.ndarray:
+        keys = np.asarray(keys, dtype=np.int64)
+        template_ids = keys >> TEMPLATE_SHIFT
+        subjects = (keys >> NPC_ID_BITS) & NPC_ID_MASK
+        targets = (keys & NPC_ID_MASK) - 1
+        result = np.full(len(keys), np.nan)
+        for template_id in np.unique(template_ids).tolist():
+            selected = template_ids == template_id
+            single = selected & (targets < 0)
+            paired = selected & (targets >= 0)
+            if single.any() and (row := self._row(template_id, False)) is not None:
+                result[single] = row[subjects[single]]
+            if paired.any() and (row := self._row(template_id, True)) is not None:
+                result[paired] = row[subjects[paired], targets[paired]]
+        if self.log_odds:
+            result = logistic.sigmoid(result)
+        result[np.isnan(result)] = DEFAULT_PRIOR
+        return result
+
+    def get_probabilities_for(self, templates: Sequence[PredicateTemplate], i: BNPCType, r: BNPCType | None) -> np.ndarray:
+        return self.get_probabilities(self.keys_for(templates, i, r))
+
+    def __len__(self) -> int:
+        return sum(int(np.count_nonzero(~np.isnan(row)))
+                   for paired, chunks in ((False, self.tensor.subject_chunks), (True, self.tensor.pair_chunks))
+                   for template_id in chunks
+                   if (row := self._row(template_id, paired)) is not None)
+
+    def __iter__(self) -> Iterator[Belief]:
+        return (self._materialize(*entry) for entry in self._entries())
+
+    def __contains__(self, item: Belief | Predicate):
+        predicate = item.predicate if isinstance(item, Belief) else item
+        if not isinstance(predicate, Predicate):
+            return False
+        row = self._row(predicate.template.template_id, predicate.target is not None)
+        if row is None:
+            return False
+        value = row[predicate.subject.id, predicate.target.id] if predicate.target else row[predicate.subject.id]
+        return not np.isnan(value)
+
+    def update(self, predicate: Predicate, probability: float):
+        check_probability(probability)
+        self._write(predicate, float(logistic.logit(probability)) if self.log_odds else probability, probability)
+
+    def _write(self, predicate: Predicate, value: float, probability: float):
+        template_id = predicate.template.template_id
+        paired = predicate.target is not None
+        position = (predicate.subject.id, predicate.target.id) if paired else predicate.subject.id
+        row = self._row(template_id, paired)
+        current = row[position] if row is not None else np.nan
+        if np.isnan(current):
+            if self._is_uninformative(probability):
+                return
+            if row is None:
+                row = self.tensor.row(template_id, paired, self.observer, create=True)
+        elif current == np.float32(value):
+            return
+        row[position] = value
+        self._journal.record(pack_key(template_id, predicate.subject.id, predicate.target.id if paired else None))
+
+    def add_belief(self, predicate: Predicate, probability: float = 1.0):
+        if not isinstance(predicate, Predicate):
+            raise TypeError("Only Predicate instances can be added as traits.")
+        self.update(predicate, probability)
+
+    def _clear(self, entries) -> int:
+        keys = []
+        for template_id, subject_id, target_id, _ in list(entries):
+            row = self._row(template_id, target_id is not None)
+            row[(subject_id, target_id) if target_id is not None else subject_id] = np.nan
+            keys.append(pack_key(template_id, subject_id, target_id))
+        if keys:
+            self._journal.record_many(keys)
+        return len(keys)
+
+    def remove_predicate(self, pred_type: str, subtype: str) -> None:
+        self._clear(self._entries(codes=predicate_registry.ids_of_type(pred_type, subtype)))
+
+    def compact(self) -> int:
+        if self.sparse_epsilon is None:
+            return 0
+        return self._clear(entry for entry in self._entries() if self._is_uninformative(entry[3]))
+
+    def remove_belief(self, predicate: Predicate) -> None:
+        if predicate in self:
+            target_id = predicate.target.id if predicate.target else None
+            self._clear([(predicate.template.template_id, predicate.subject.id, target_id, None)])
+
+    def rename_predicate(self, pred_type: str, subtype: str, new_subtype: str) -> None:
+        if subtype == new_subtype:
+            return
+        codes = predicate_registry.ids_of_type(pred_type, subtype)
+        renamed_ids = {code: PredicateTemplate(pred_type=pred_type, subtype=new_subtype,
+                                               is_single=predicate_registry.template(code).is_single).template_id
+                       for code in codes}
+        entries = list(self._entries(codes=codes))
+        # stored values move as they are: a rename is not an update, so sparse mode drops nothing
+        moved = []
+        for template_id, subject_id, target_id, _ in entries:
+            position = (subject_id, target_id) if target_id is not None else subject_id
+            moved.append((renamed_ids[template_id], target_id is not None, position,
+                           self._row(template_id, target_id is not None)[position]))
+        self._clear(entries)
+        keys = []
+        for template_id, paired, position, value in moved:
+            # a belief already stored under the new name is overwritten by the renamed one
+            self.tensor.row(template_id, paired, self.observer, create=True)[position] = value
+            keys.append(pack_key(template_id, *position) if paired else pack_key(template_id, position, None))
+        if keys:
+            self._journal.record_many(keys)
+
+    def get_beliefs_about(self, subject: BNPCType) -> List[Belief]:
+        return [self._materialize(*entry) for entry in self._entries(subject_id=subject.id)]
+
+    def get_beliefs_of_type(self, pred_type: str, subtype: str) -> List[Belief]:
+        codes = predicate_registry.ids_of_type(pred_type, subtype)
+        return [self._materialize(*entry) for entry in self._entries(codes=codes)]
+
+    def get_traits_about(self, subject: BNPCType) -> List[Belief]:
+        codes = [code for code in self.tensor.subject_chunks if predicate_registry.template(code).is_single]
+        return [self._materialize(*entry) for entry in self._entries(codes=codes, subject_id=subject.id, target=None)]
+
+    def get_relationships_about(self, subject: BNPCType, target: BNPCType) -> List[Belief]:
+        target_id = target.id if target else None
+        chunks = self.tensor.pair_chunks if target_id is not None else self.tensor.subject_chunks
+        codes = [code for code in chunks if not predicate_registry.template(code).is_single]
+        return [self._materialize(*entry) for entry in self._entries(codes=codes, subject_id=subject.id, target=target_id)]
@@ -1,9 +1,17 @@
 from dataclasses import dataclass
 
 from src.social_exchange.BSocialExchange import BSocialExchange
+from src.social_exchange.BSocialExchangeTemplate import BSocialExchangeTemplate
+from src.types.NPCTypes import BNPCType
 
 
 @dataclass(slots=True, frozen=True)
 class BVolition:
-    social_exchange: BSocialExchange
+    template: BSocialExchangeTemplate
+    initiator: BNPCType
+    responder: BNPCType
     score: float
+
+    def instantiate(self) -> BSocialExchange:
+        # a new exchange per call; only the volition that gets selected ever needs one
+        return self.template.instantiate(self.initiator, self.responder)
@@ -0,0 +1,39 @@
+from collections.abc import Sequence
+from typing import List
+
+import numpy as np
+
+from src.desire_formation.BVolition import BVolition
+from src.social_exchange.BSocialExchangeTemplate import BSocialExchangeTemplate
+from src.types.NPCTypes import BNPCType
+
+
+class VolitionTable(Sequence):
+    # Scored (template, responder) candidates of one initiator, best first. Candidates are kept
+    # as index and score arrays; BVolition records are only built for the entries looked at.
+
+    def __init__(self, initiator: BNPCType, templates: List[BSocialExchangeTemplate], responders: List[BNPCType],
+                 template_index: np.ndarray, responder_index: np.ndarray, scores: np.ndarray):
+        # stable, so equal scores keep their candidate order like list.sort(reverse=True)
+        order = np.argsort(-scores, kind="stable")
+        self.initiator = initiator
+        self.templates = templates
+        self.responders = responders
+        self.template_index = template_index[order]
+        self.responder_index = responder_index[order]
+        self.scores = scores[order]
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[n] for n in range(*index.indices(len(self)))]
+        return BVolition(self.templates[self.template_index[index]], self.initiator,
+                         self.responders[self.responder_index[index]], float(self.scores[index]))
+
+    def best(self) -> List[BVolition]:
+        # every volition tied with the highest score
+        if not len(self):
+            return []
+        return self[:int(np.count_nonzero(self.scores == self.scores[0]))]
@@ -1,25 +1,89 @@
 from dataclasses import dataclass, field
-from typing import List
+from typing import TYPE_CHECKING, List, Optional, Sequence
+
+import numpy as np
 
 from src.belief.BeliefStore import BeliefStore
+from src.irs.CompiledIRS import CompiledIRS, Pair
 from src.rule.BRule import BRule
 from src.types.NPCTypes import BNPCType
+from src.utils.kernels import NUMPY, KernelBackend
 from src.utils.sigmoid import sigmoid
 
+if TYPE_CHECKING:
+    from src.signal_interpolation.LikelihoodTable import LikelihoodTable
+
 
 @dataclass(slots=True)
 class BInfluenceRuleSet:
     name: str
     rules: List[BRule] = field(default_factory=list)
+    bias: float = 0.0  # added to the weighted sum, e.g. constant-only rules folded in by the loader
+    _compiled: Optional[CompiledIRS] = field(default=None, init=False, repr=False, compare=False)
+    _compiled_for: tuple = field(default=(), init=False, repr=False, compare=False)
+    _likelihoods: Optional["LikelihoodTable"] = field(default=None, init=False, repr=False, compare=False)
+    _likelihoods_for: tuple = field(default=(), init=False, repr=False, compare=False)
+
+    def __getstate__(self):
+        return {"name": self.name, "rules": self.rules, "bias": self.bias}
+
+    def __setstate__(self, state):
+        # older saves pickled the default (None, slots) pair and had no bias
+        if isinstance(state, tuple):
+            state = state[1]
+        self.name = state["name"]
+        self.rules = state["rules"]
+        self.bias = state.get("bias", 0.0)
+        self._compiled = None
+        self._compiled_for = ()
+        self._likelihoods = None
+        self._likelihoods_for = ()
 
     def expected_value(self, beliefs: BeliefStore, i: BNPCType, r: BNPCType) -> float:
-        # E w_i · P(condition_i)
-        return sum(rule.weight * rule.probability(beliefs, i, r) for rule in self.rules)
+        total = self.bias
+        for rule in self.rules:
+            total += rule.weight * rule.probability(beliefs, i, r)
+        return total
 
     def acceptance_probability(self, beliefs: BeliefStore, i: BNPCType, r: BNPCType,
                                bias: float = 0.0) -> float:
         s = self.expected_value(beliefs, i, r)
         return sigmoid(x=s, bias=bias)
 
+    def _signature(self) -> tuple:
+        # changes whenever rules are added, removed, replaced or reweighted
+        return tuple((id(rule), rule.weight, tuple(map(id, rule.condition))) for rule in self.rules)
+
+    def compiled(self) -> CompiledIRS:
+        signature = self._signature()
+        if self._compiled is None or self._compiled_for != signature:
+            self._compiled = CompiledIRS.compile(self.rules)
+            self._compiled_for = signature
+        return self._compiled
+
+    def expected_values(self, beliefs: BeliefStore | Sequence[BeliefStore], pairs: Sequence[Pair],
+                        backend: KernelBackend = NUMPY) -> np.ndarray:
+        # expected_value for many (i, r) pairs at once; `beliefs` is one store or one store per pair
+        return self.compiled().expected_values(beliefs, pairs, bias=self.bias, backend=backend)
+
+    def acceptance_probabilities(self, beliefs: BeliefStore | Sequence[BeliefStore], pairs: Sequence[Pair],
+                                 bias: float = 0.0, backend: KernelBackend = NUMPY) -> np.ndarray:
+        # the scalar sigmoid per pair, so every entry equals acceptance_probability exactly
+        expected = self.expected_values(beliefs, pairs, backend)
+        return np.array([sigmoid(x=s, bias=bias) for s in expected.tolist()],
+                        dtype=np.float64)
+
+    def likelihood_table(self) -> "LikelihoodTable":
+        # observation likelihoods for signal interpolation, rebuilt on the same changes as compiled()
+        from src.signal_interpolation.LikelihoodTable import LikelihoodTable
+
+        signature = self._signature()
+        if self._likelihoods is None or self._likelihoods_for != signature:
+            self._likelihoods = LikelihoodTable.build(self)
+            self._likelihoods_for = signature
+        return self._likelihoods
+
     def add(self, *new_rules: BRule) -> None:
         self.rules.extend(new_rules)
+        self._compiled = None
+        self._likelihoods = None
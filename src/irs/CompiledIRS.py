@@ -0,0 +1,118 @@
+from dataclasses import dataclass, field
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from src.belief.BeliefStore import BeliefStore
+from src.predicates.BCondition import IBCondition, lookup_sign
+from src.predicates.PredicateRegistry import TEMPLATE_SHIFT
+from src.predicates.PredicateTemplate import PredicateTemplate
+from src.rule.BRule import BRule
+from src.types.NPCTypes import BNPCType
+from src.utils.kernels import NUMPY, KernelBackend
+
+Pair = Tuple[BNPCType, BNPCType]
+
+CONSTANT = -1  # op_columns entry of a constant condition
+
+
+def _constant_value(condition: IBCondition) -> float | None:
+    return float(condition.value) if getattr(condition, "is_constant", False) else None
+
+
+@dataclass
+class CompiledIRS:
+    # Array form of an influence rule set. Every condition becomes one op, in rule order:
+    #   op_columns[o] >= 0, op_signs[o] = +1 -> P        (has),     P = values[:, op_columns[o]]
+    #   op_columns[o] >= 0, op_signs[o] = -1 -> 1 - P    (has not)
+    #   op_columns[o] = CONSTANT            -> op_values[o]
+    # Columns are the looked-up probabilities of `templates` followed by one column per custom
+    # condition, called pair by pair. Rule k multiplies ops rule_ends[k-1]:rule_ends[k] in condition
+    # order, so every pair gets exactly what BRule.probability returns for it.
+    templates: List[PredicateTemplate]
+    custom: List[IBCondition]
+    op_columns: np.ndarray
+    op_signs: np.ndarray
+    op_values: np.ndarray
+    rule_ends: np.ndarray
+    weights: np.ndarray
+    template_ids: np.ndarray = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.template_ids = np.array([template.template_id for template in self.templates], dtype=np.int64)
+
+    @classmethod
+    def compile(cls, rules: Sequence[BRule]) -> "CompiledIRS":
+        columns = {}
+        templates: List[PredicateTemplate] = []
+        custom: List[IBCondition] = []
+        ops = []
+        rule_ends = []
+        for rule in rules:
+            if not rule.condition:
+                raise ValueError(f"Rule '{rule.name}' has no conditions.")
+            for cond in rule.condition:
+                sign = lookup_sign(cond)
+                if sign is not None:
+                    column = columns.setdefault(cond.req_predicate.template_id, len(templates))
+                    if column == len(templates):
+                        templates.append(cond.req_predicate)
+                    ops.append((column, sign, 0.0))
+                elif (value := _constant_value(cond)) is not None:
+                    ops.append((CONSTANT, 0, value))
+                else:
+                    ops.append((None, len(custom), 0.0))  # custom columns follow the templates'
+                    custom.append(cond)
+            rule_ends.append(len(ops))
+
+        op_columns = [len(templates) + index if column is None else column for column, index, _ in ops]
+        return cls(templates, custom, np.array(op_columns, dtype=np.int64),
+                   np.array([1 if column is None else sign for column, sign, _ in ops], dtype=np.int64),
+                   np.array([value for _, _, value in ops], dtype=np.float64),
+                   np.array(rule_ends, dtype=np.int64),
+                   np.array([rule.weight for rule in rules], dtype=np.float64))
+
+    def lookup(self, beliefs: BeliefStore | Sequence[BeliefStore], pairs: Sequence[Pair]) -> np.ndarray:
+        # pairs x templates matrix of looked-up probabilities; `beliefs` is one store or one store per pair
+        template_ids = self.template_ids
+        if not len(template_ids) or not pairs:
+            return np.zeros((len(pairs), len(template_ids)))
+        pair_keys = np.array([BeliefStore._pair_key(i, r) for i, r in pairs], dtype=np.int64)
+        keys = (template_ids[None, :] << TEMPLATE_SHIFT) | pair_keys[:, None]
+        if isinstance(beliefs, Sequence):
+            looked_up = np.empty(keys.shape)
+            for n, (store, row) in enumerate(zip(beliefs, keys.tolist())):
+                looked_up[n] = store.get_probabilities(row)
+            return looked_up
+        return beliefs.get_probabilities(keys.ravel()).reshape(keys.shape)
+
+    def condition_values(self, beliefs: BeliefStore | Sequence[BeliefStore], pairs: Sequence[Pair]) -> np.ndarray:
+        # pairs x columns: looked-up probabilities, then the custom conditions' values
+        looked_up = self.lookup(beliefs, pairs)
+        if BRule.debug_checks and ((looked_up < 0) | (looked_up > 1)).any():
+            raise ValueError("Condition probabilities must be within [0,1].")
+        if not self.custom:
+            return looked_up
+        values = np.empty((len(pairs), len(self.templates) + len(self.custom)))
+        values[:, :len(self.templates)] = looked_up
+        for n, (i, r) in enumerate(pairs):
+            store = beliefs[n] if isinstance(beliefs, Sequence) else beliefs
+            for c, cond in enumerate(self.custom, start=len(self.templates)):
+                values[n, c] = p = float(cond(store, i, r))
+                if p < 0 or p > 1:
+                    raise ValueError("Condition probabilities must be within [0,1].")
+        return values
+
+    def rule_probabilities(self, beliefs: BeliefStore | Sequence[BeliefStore], pairs: Sequence[Pair],
+                           backend: KernelBackend = NUMPY) -> np.ndarray:
+        return backend.rule_products(self.condition_values(beliefs, pairs), self.op_columns,
+                                              self.op_signs, self.op_values, self.rule_ends)
+
+    def expected_values(self, beliefs: BeliefStore | Sequence[BeliefStore], pairs: Sequence[Pair],
+                        bias: float = 0.0, backend: KernelBackend = NUMPY) -> np.ndarray:
+        # summed rule by rule from `bias`, in the same order as BInfluenceRuleSet.expected_value
+        probabilities = self.rule_probabilities(beliefs, pairs, backend)
+        total = np.full(len(pairs), bias, dtype=np.float64)
+        for k, weight in enumerate(self.weights.tolist()):
+            total += weight * probabilities[:, k]
+        return total
@@ -3,12 +3,19 @@ from dataclasses import dataclass, field
 import random
 from typing import Sequence, List, Optional, Dict
 
+import numpy as np
+
 from src.belief.BeliefStore import BeliefStore
+from src.belief.BeliefStoreView import BeliefStoreView
+from src.belief.MemoizedBeliefStore import MemoizedBeliefStore
 from src.desire_formation.BVolition import BVolition
+from src.desire_formation.VolitionTable import VolitionTable
 from src.signal_interpolation.SignalInterpolation import update_beliefs_from_observation
 from src.social_exchange.BSocialExchange import BSocialExchange
 from src.social_exchange.BSocialExchangeTemplate import BSocialExchangeTemplate
+from src.social_exchange.TemplateCompiler import compile_template
 from src.types.NPCTypes import BNPCType
+from src.utils.kernels import NUMPY, KernelBackend
 
 
 @dataclass
@@ -31,48 +38,77 @@ class BNPC(BNPCType):
     beliefStore: BeliefStore = field(default_factory=BeliefStore)
     relation_preferences: Dict[str, float] = field(default_factory=dict)
     goals: List[Goal] = field(default_factory=list)
+    compiled_templates: bool = False  # score exchanges with generated code (see TemplateCompiler)
 
     def __str__(self):
         return f"{self.name} (ID: {self.id})"
 
+    def __getstate__(self):
+        # memoised perspectives are keyed by per-process template ids
+        return {name: value for name, value in self.__dict__.items() if name != "_perspectives"}
+
     def perform_action(self, action: BSocialExchange):
         action.perform(self.beliefStore)
 
-    def desire_formation(self, targets: Sequence[BNPCType], actions_templates: Sequence[BSocialExchangeTemplate]) -> \
-            List[BVolition]:
-        volitions: List[BVolition] = []
-
-        for r in targets:
-            if r is self:
-                continue
-            for tpl in actions_templates:
-
-                exch = tpl.instantiate(self, r)
-
-                if not exch.is_playable(self.beliefStore):
+    def desire_formation(self, targets: Sequence[BNPCType], actions_templates: Sequence[BSocialExchangeTemplate],
+                         backend: KernelBackend = NUMPY) -> VolitionTable:
+        templates = list(actions_templates)
+        responders = [r for r in targets if r is not self]
+        # condition values shared between templates are looked up once per pair
+        state = MemoizedBeliefStore(self.beliefStore)
+        # unplayable (responder, template) pairs are dropped before anything is scored
+        playable = np.zeros((len(responders), len(templates)), dtype=bool)
+        for k, tpl in enumerate(templates):
+            playable[:, k] = tpl.playable_mask(state, self, responders)
+        compiled = [compile_template(tpl) for tpl in templates] if self.compiled_templates else None
+        pref_weights = np.array([self.relation_preferences.get(tpl.intent.subtype, 0.0) for tpl in templates])
+        goal_bonus = np.zeros((len(responders), len(templates)))
+        for g in self.goals:
+            for n, r in enumerate(responders):
+                if g.target_name == r.name:
+                    for k, tpl in enumerate(templates):
+                        if g.relation_type == tpl.intent.subtype:
+                            goal_bonus[n, k] += g.value
+
+        scored = np.zeros((len(responders), len(templates)))
+        if compiled is not None:
+            for n, r in enumerate(responders):
+                about_r = self.perspective_on(r)
+                for k in np.flatnonzero(playable[n]).tolist():
+                    scored[n, k] = compiled[k].initiator_probability(state, self, r) * \
+                        compiled[k].responder_probability(about_r, self, r)
+        else:
+            perspectives = [self.perspective_on(r) for r in responders]
+            for k, tpl in enumerate(templates):
+                playing = np.flatnonzero(playable[:, k]).tolist()
+                if not playing:
                     continue
-
-                score = exch.initiator_probability(self.beliefStore) * exch.responder_probability(self.estimate_belief_about(r))
-
-                pref_weight = self.relation_preferences.get(exch.intent.subtype, 0.0)
-                goal_bonus = sum(g.value for g in self.goals
-                                 if g.relation_type == exch.intent.subtype
-                                 and g.target_name == r.name)
-                score *= max(pref_weight + goal_bonus, 1e-3)
-                volitions.append(BVolition(exch, score))
-
-        volitions.sort(key=lambda t: t.score, reverse=True)
-        return volitions
+                # same as instantiate(self, r).initiator_probability(state) * .responder_probability(about_r),
+                # batched over every playable responder through the compiled influence rule sets
+                initiator = tpl.initiator_irs.acceptance_probabilities(
+                    state, [(self, responders[n]) for n in playing], backend=backend)
+                responder = tpl.responder_irs.acceptance_probabilities(
+                    [perspectives[n] for n in playing], [(responders[n], self) for n in playing], backend=backend)
+                scored[playing, k] = initiator * responder
+
+        # volitions stay in responder-major order
+        responder_index, template_index = np.nonzero(playable)
+        scores = scored[responder_index, template_index]
+        factor = np.maximum(pref_weights[template_index] + goal_bonus[responder_index, template_index], 1e-3)
+        return VolitionTable(self, templates, responders, template_index, responder_index,
+                             scores * factor)
 
     def select_intent(self, volitions: Sequence[BVolition], threshold: float = 0.0) -> Optional[BSocialExchange]:
         if not volitions:
             return None
 
-        best = max(volitions, key=lambda v: v.score)
-
-        choices: Sequence[BVolition] = [v for v in volitions if v.score == best.score]
+        if isinstance(volitions, VolitionTable):
+            choices: Sequence[BVolition] = volitions.best()
+        else:
+            best = max(volitions, key=lambda v: v.score)
+            choices = [v for v in volitions if v.score == best.score]
 
-        return random.choice(choices).social_exchange
+        return random.choice(choices).instantiate()
 
     def update_beliefs_from_observation(self, actions_done: Sequence[BSocialExchange]) -> None:
         for action in actions_done:
@@ -83,8 +119,9 @@ class BNPC(BNPCType):
                 continue
             update_beliefs_from_observation(self, action, action.is_accepted)
 
-    def iteration(self, targets: Sequence[BNPCType], actions_templates: Sequence[BSocialExchangeTemplate]):
-        volitions = self.desire_formation(targets, actions_templates)
+    def iteration(self, targets: Sequence[BNPCType], actions_templates: Sequence[BSocialExchangeTemplate],
+                  backend: KernelBackend = NUMPY):
+        volitions = self.desire_formation(targets, actions_templates, backend)
         action = self.select_intent(volitions)
 
         if action is None:
@@ -94,30 +131,29 @@ class BNPC(BNPCType):
 
         return action
 
-    def estimate_belief_about(self, other: BNPCType) -> BeliefStore:
-        beliefs_from_other_perspective_list = [belief.clone() for belief in self.beliefStore
-                                               if belief.predicate.subject == other]
-
-        beliefs_from_other_perspective = BeliefStore(beliefs=beliefs_from_other_perspective_list)
-
-        return beliefs_from_other_perspective
+    def estimate_belief_about(self, other: BNPCType) -> BeliefStoreView:
+        return BeliefStoreView(store=self.beliefStore, subject=other)
+
+    def perspective_on(self, other: BNPCType) -> MemoizedBeliefStore:
+        # memoised estimate_belief_about(other), shared by every template scored against `other`;
+        # all perspectives are dropped once this NPC's store changes or is replaced
+        store = self.beliefStore
+        cached = self.__dict__.get("_perspectives")
+        if cached is None or cached[0] is not store or cached[1] != store.version:
+            cached = self._perspectives = (store, store.version, {})
+        perspectives: Dict[int, MemoizedBeliefStore] = cached[2]
+        perspective = perspectives.get(other.id)
+        if perspective is None or perspective.subject is not other:
+            perspective = perspectives[other.id] = MemoizedBeliefStore(self.estimate_belief_about(other))
+        return perspective
 
     def get_traits(self, npc=None):
         subject = npc if npc is not None else self
 
-        res = []
-        for belief in self.beliefStore:
-            if belief.predicate.subject is subject and belief.predicate.is_single:
-                res.append(belief)
-
-        return res
+        return self.beliefStore.get_traits_about(subject)
 
     def get_relationships(self, subject, target):
-        res = []
-        for belief in self.beliefStore:
-            if not belief.predicate.is_single and belief.predicate.subject is subject and belief.predicate.target is target:
-                res.append(belief)
-        return res
+        return self.beliefStore.get_relationships_about(subject, target)
 
     @staticmethod
     def generate_random_goal(others: Sequence[BNPCType], relationships: List[str]) -> Goal:
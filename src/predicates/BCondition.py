@@ -49,8 +49,12 @@ class BHasNotCondition(IBCondition):
 
 # This class is used to represent a constant condition that always returns the same value. For tests
 class BConstantCondition(IBCondition):
+    is_constant = True  # lets CompiledIRS fold `value` in at compile time
+
     def __init__(self, value: float):
         super().__init__(req_predicate=PredicateTemplate("trait", "constant", True))
+        if value < 0 or value > 1:
+            raise ValueError("Condition probabilities must be within [0,1].")
         self.value = value
 
     def __call__(self, *args, **kwargs) -> float:
@@ -58,3 +62,14 @@ class BConstantCondition(IBCondition):
 
     def get_type(self) -> str:
         return f"Const"
+
+
+def lookup_sign(condition) -> int | None:
+    # +1 / -1 when the condition is a plain has / has-not lookup that a store can answer
+    # in bulk (see BeliefStore.get_probabilities), None for anything with its own __call__
+    call = type(condition).__call__
+    if call is BHasCondition.__call__ and condition.req_predicate:
+        return 1
+    if call is BHasNotCondition.__call__ and condition.req_predicate:
+        return -1
+    return None
@@ -11,6 +11,10 @@ class IBEffect:
     predicate: PredicateTemplate
     probability: float = 1.0
 
+    def __post_init__(self):
+        if self.probability < 0 or self.probability > 1:
+            raise ValueError("Effect probabilities must be within [0,1].")
+
     def __call__(self, state: BeliefStore, i: BNPCType, r: BNPCType) -> None:
         raise NotImplementedError("Effect must implement __call__ method.")
 
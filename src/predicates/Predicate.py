@@ -4,7 +4,8 @@ from src.predicates.PredicateTemplate import PredicateTemplate
 from src.types.NPCTypes import NPCType
 
 
-@dataclass(frozen=True, slots=True)
+# weakref_slot: the predicate registry interns instantiated predicates weakly
+@dataclass(frozen=True, slots=True, weakref_slot=True)
 class Predicate:
     pred_type: str        # "trait", "relationship" etc.
     subtype: str          # "trust", "friendship", "kind", "evil" etc.
@@ -21,6 +22,9 @@ class Predicate:
                 self.subject.id == other.subject.id and
                 (self.target.id if self.target else None) == (other.target.id if other.target else None))
 
+    def __hash__(self):
+        return hash((self.pred_type, self.subtype, self.subject.id, self.target.id if self.target else None))
+
     def matches_template(self, temp: PredicateTemplate):
         return (self.pred_type == temp.pred_type and
                 self.subtype == temp.subtype and
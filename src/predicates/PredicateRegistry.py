@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import weakref
+from typing import Dict, List, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from src.predicates.Predicate import Predicate
+    from src.predicates.PredicateTemplate import PredicateTemplate
+
+# A belief key packs (template id, subject id, target id) into one int:
+# | template id | subject id (NPC_ID_BITS) | target id + 1 (NPC_ID_BITS, 0 = no target) |
+NPC_ID_BITS = 20
+NPC_ID_MASK = (1 << NPC_ID_BITS) - 1
+PAIR_MASK = (1 << (2 * NPC_ID_BITS)) - 1
+TEMPLATE_SHIFT = 2 * NPC_ID_BITS
+
+
+class PredicateRegistry:
+    # Process-wide interning of predicate templates: equal templates share one small int id.
+    # Ids are not stable across processes, so anything pickled must re-register on load.
+    # Instantiated predicates are interned here too, by packed key; held weakly, since the
+    # registry lives for the whole process and would otherwise keep every NPC it saw alive.
+
+    def __init__(self):
+        self._ids: Dict[Tuple[str, str, bool], int] = {}
+        self._templates: List[PredicateTemplate] = []
+        self._instances: weakref.WeakValueDictionary[int, Predicate] = weakref.WeakValueDictionary()
+
+    def register(self, template: PredicateTemplate) -> int:
+        signature = (template.pred_type, template.subtype, template.is_single)
+        template_id = self._ids.get(signature)
+        if template_id is None:
+            template_id = len(self._templates)
+            self._ids[signature] = template_id
+            self._templates.append(template)
+        return template_id
+
+    def template(self, template_id: int) -> PredicateTemplate:
+        return self._templates[template_id]
+
+    def instance(self, key: int) -> Predicate | None:
+        return self._instances.get(key)
+
+    def intern(self, key: int, predicate: Predicate) -> None:
+        self._instances[key] = predicate
+
+    def ids_of_type(self, pred_type: str, subtype: str) -> List[int]:
+        return [template_id for (p, s, _), template_id in self._ids.items() if p == pred_type and s == subtype]
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+
+predicate_registry = PredicateRegistry()
+
+
+def pack_key(template_id: int, subject_id: int, target_id: int | None) -> int:
+    return (template_id << TEMPLATE_SHIFT) | (subject_id << NPC_ID_BITS) | (0 if target_id is None else target_id + 1)
+
+
+def unpack_key(key: int) -> Tuple[int, int, int | None]:
+    target = key & NPC_ID_MASK
+    return key >> TEMPLATE_SHIFT, (key >> NPC_ID_BITS) & NPC_ID_MASK, target - 1 if target else None
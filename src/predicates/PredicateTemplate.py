@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 
+from src.predicates.PredicateRegistry import pack_key, predicate_registry
 from src.types.NPCTypes import NPCType
 from typing import TYPE_CHECKING
 
@@ -15,9 +16,29 @@ class PredicateTemplate:
     subtype: str  # "trust", "friendship", "kind", "evil" etc.
     is_single: bool  # whether the predicate is single (applies to one NPC) or relational (applies to two NPCs)
 
+    def __post_init__(self):
+        # not a field: excluded from eq/hash/repr and re-assigned on unpickling
+        object.__setattr__(self, "template_id", predicate_registry.register(self))
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state.pop("template_id", None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        object.__setattr__(self, "template_id", predicate_registry.register(self))
+
     def instantiate(self, subject: NPCType, target: NPCType = None) -> "Predicate":
+        # flyweight: predicates are interned in the registry by packed key
+        key = pack_key(self.template_id, subject.id, target.id if target else None)
+        predicate = predicate_registry.instance(key)
+        # ids can be reused by other NPC objects (e.g. a freshly built world), so check identity too
+        if predicate is not None and predicate.subject is subject and predicate.target is target:
+            return predicate
+
         from src.predicates.Predicate import Predicate
-        return Predicate(
+        predicate = Predicate(
             pred_type=self.pred_type,
             subtype=self.subtype,
             subject=subject,
@@ -25,6 +46,8 @@ class PredicateTemplate:
             is_single=self.is_single,
             template=self,
         )
+        predicate_registry.intern(key, predicate)
+        return predicate
 
     def matches(self, other: PredicateTemplate) -> bool:
         return (self.pred_type == other.pred_type and
@@ -1,9 +1,8 @@
-import math
 from dataclasses import dataclass, field
-from typing import Sequence
+from typing import ClassVar, Sequence
 
 from src.belief.BeliefStore import BeliefStore
-from src.predicates.BCondition import IBCondition
+from src.predicates.BCondition import IBCondition, lookup_sign
 from src.predicates.BEffect import IBEffect
 from src.types.NPCTypes import BNPCType
 
@@ -14,14 +13,24 @@ class BRule:
     condition: Sequence[IBCondition]
     weight: float
     effects: Sequence[IBEffect] = field(default_factory=list)
+    # range-check every condition value; by default only conditions with their own __call__ are
+    # checked at runtime, constants and effects are validated when constructed / loaded and
+    # looked-up beliefs when written to a store
+    debug_checks: ClassVar[bool] = False
 
     def probability(self, beliefs: BeliefStore, i: BNPCType, r: BNPCType = None) -> float:
         if not self.condition:
             raise ValueError(f"Rule '{self.name}' has no conditions.")
 
-        cond_probs = [float(cond(beliefs, i, r)) for cond in self.condition]
-        if any(p < 0 or p > 1 for p in cond_probs):
-            raise ValueError("Condition probabilities must be within [0,1].")
+        prob = 1
+        for cond in self.condition:
+            p = float(cond(beliefs, i, r))
+            # which conditions are checked only matters once a value is out of range
+            if (p < 0 or p > 1) and (self.debug_checks or (lookup_sign(cond) is None
+                                                         and not getattr(cond, "is_constant", False))):
+                raise ValueError("Condition probabilities must be within [0,1].")
 
-        prob = math.prod(cond_probs)
+            prob *= p
+            if prob == 0 and not self.debug_checks:
+                return prob
         return prob
@@ -1,4 +1,6 @@
-from typing import List
+from typing import List, Sequence
+
+import numpy as np
 
 from src.irs.BIRS import BInfluenceRuleSet
 from src.predicates.BCondition import BHasCondition, BHasNotCondition
@@ -33,3 +35,8 @@ def estimate_likelihood(irs: BInfluenceRuleSet, predicate: PredicateTemplate, pr
         else:
             return prob
 
+
+def estimate_likelihoods(irs: BInfluenceRuleSet, predicates: Sequence[PredicateTemplate], pred_true: bool,
+                         accepted: bool) -> np.ndarray:
+    return np.array([estimate_likelihood(irs, predicate, pred_true, accepted) for predicate in predicates],
+                    dtype=np.float64)
@@ -0,0 +1,39 @@
+from dataclasses import dataclass
+from typing import Iterator, List, Tuple
+
+from src.irs.BIRS import BInfluenceRuleSet
+from src.predicates.PredicateTemplate import PredicateTemplate
+from src.signal_interpolation.EstimateLikelihood import estimate_likelihoods
+
+# (template, P(observation | predicate true), P(observation | predicate false))
+Likelihood = Tuple[PredicateTemplate, float, float]
+
+
+@dataclass(frozen=True)
+class LikelihoodTable:
+    # Everything update_beliefs_from_observation needs from one IRS: the templates of its
+    # weighted rules, in first-seen order without repeats, and their estimate_likelihood values.
+    accepted: Tuple[Likelihood, ...]
+    rejected: Tuple[Likelihood, ...]
+
+    @classmethod
+    def build(cls, irs: BInfluenceRuleSet) -> "LikelihoodTable":
+        templates: List[PredicateTemplate] = list(dict.fromkeys(
+            cond.req_predicate for rule in irs.rules if rule.weight is not None for cond in rule.condition))
+        # P(obs | true) when accepted is P(obs | false) when rejected and vice versa, and
+        # P(obs | false) is 1 - P(obs | true) either way
+        accepted = estimate_likelihoods(irs, templates, pred_true=True, accepted=True)
+        p_true, p_false = accepted.tolist(), (1 - accepted).tolist()
+        return cls(
+            accepted=tuple(zip(templates, p_true, p_false)),
+            rejected=tuple(zip(templates, p_false, p_true)),
+        )
+
+    def __iter__(self) -> Iterator[PredicateTemplate]:
+        return (tmpl for tmpl, _, _ in self.accepted)
+
+    def __len__(self) -> int:
+        return len(self.accepted)
+
+    def for_outcome(self, accepted: bool) -> Tuple[Likelihood, ...]:
+        return self.accepted if accepted else self.rejected
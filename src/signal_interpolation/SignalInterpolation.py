@@ -1,59 +1,157 @@
-from typing import List
+import logging
+import math
+from typing import List, Sequence
 
+import numpy as np
+
+from src.belief.BeliefStore import DEFAULT_PRIOR
+from src.belief.BeliefTensor import BeliefTensor
+from src.belief.TensorBeliefStore import TensorBeliefStore
+from src.predicates.Predicate import Predicate
 from src.predicates.PredicateTemplate import PredicateTemplate
-from src.signal_interpolation.EstimateLikelihood import estimate_likelihood
 from src.social_exchange.BSocialExchange import BSocialExchange
 from src.types.NPCTypes import BNPCType
+from src.utils.kernels import NUMPY, KernelBackend
 
 
-def update_beliefs_from_observation(observer: BNPCType, exchange: BSocialExchange, accepted: bool):
+def _log(p: float) -> float:
+    return math.log(p) if p > 0 else -math.inf
+
+
+def _update_log_odds(observer: BNPCType, pred: Predicate, p_template: PredicateTemplate, subject: BNPCType,
+                     target: BNPCType, p_obs_given_true: float, p_obs_given_false: float) -> None:
+    # stores keeping log-odds take the observation as one addition of the log-likelihood ratio;
+    # the prior is read with the same key as the probability update below
+    if p_obs_given_true == 0 and p_obs_given_false == 0:
+        return
+    store = observer.beliefStore
+    prior = store.get_log_odds(p_template, subject, target)
+    store.set_log_odds(pred, prior + (_log(p_obs_given_true) - _log(p_obs_given_false)))
+
+
+def _sides(exchange: BSocialExchange, accepted: bool):
+    # (subject, target, likelihoods) of both participants; the initiator chose to act, so its
+    # side of the exchange is always seen as accepted
     i = exchange.initiator
     r = exchange.responder
+    return ((i, r, exchange.initiator_irs.likelihood_table().for_outcome(True)),
+            (r, i, exchange.responder_irs.likelihood_table().for_outcome(accepted)))
 
-    influencing_conditions_i: List[PredicateTemplate] = []
-    for rule in exchange.initiator_irs.rules:
-        if rule.weight is not None:
-            for cond in rule.condition:
-                if cond.req_predicate not in influencing_conditions_i:
-                    influencing_conditions_i.append(cond.req_predicate)
 
-    for tmp in influencing_conditions_i:
-        p_template = tmp
-        pred = p_template.instantiate(subject=i, target=r) if not p_template.is_single else p_template.instantiate(subject=i)
+def update_beliefs_from_observation(observer: BNPCType, exchange: BSocialExchange, accepted: bool):
+    store = observer.beliefStore
+    log_odds = getattr(store, "log_odds", False)
 
-        p_obs_given_true = estimate_likelihood(exchange.initiator_irs, predicate=p_template, pred_true=True, accepted=True)
-        p_obs_given_false = estimate_likelihood(exchange.initiator_irs, predicate=p_template, pred_true=False, accepted=True)
+    for subject, target, likelihoods in _sides(exchange, accepted):
+        for p_template, p_obs_given_true, p_obs_given_false in likelihoods:
+            pred = p_template.instantiate(subject=subject, target=target) if not p_template.is_single \
+                else p_template.instantiate(subject=subject)
 
-        prior_prob = observer.beliefStore.get_probability(p_template, i, r)
-        numerator = p_obs_given_true * prior_prob
+            if log_odds:
+                _update_log_odds(observer, pred, p_template, subject, target, p_obs_given_true, p_obs_given_false)
+                continue
 
-        denominator = p_obs_given_true * prior_prob + p_obs_given_false * (1 - prior_prob)
-        if denominator == 0:
-            continue
-        posterior_prob = numerator / denominator
+            prior_prob = store.get_probability(p_template, subject, target)
+            numerator = p_obs_given_true * prior_prob
 
-        observer.beliefStore.update(pred, posterior_prob)
+            denominator = numerator + p_obs_given_false * (1 - prior_prob)
+            if denominator == 0:
+                continue
+            posterior_prob = numerator / denominator
 
-    influencing_conditions_r = []
-    for rule in exchange.responder_irs.rules:
-        if rule.weight is not None:
-            for cond in rule.condition:
-                if cond.req_predicate not in influencing_conditions_r:
-                    influencing_conditions_r.append(cond.req_predicate)
+            store.update(pred, posterior_prob)
 
-    for tmp in influencing_conditions_r:
-        p_template = tmp
-        pred = p_template.instantiate(subject=r, target=i) if not p_template.is_single else p_template.instantiate(subject=r)
 
-        p_obs_given_true = estimate_likelihood(exchange.responder_irs, predicate=p_template, pred_true=True, accepted=accepted)
-        p_obs_given_false = estimate_likelihood(exchange.responder_irs, predicate=p_template, pred_true=False, accepted=accepted)
+def _shared_tensor(observers: Sequence[BNPCType]) -> BeliefTensor | None:
+    stores = [observer.beliefStore for observer in observers]
+    if all(isinstance(store, TensorBeliefStore) for store in stores) and len({id(s.tensor) for s in stores}) == 1:
+        return stores[0].tensor
+    return None
 
-        prior_prob = observer.beliefStore.get_probability(p_template, r, i)
-        numerator = p_obs_given_true * prior_prob
 
-        denominator = numerator + p_obs_given_false * (1 - prior_prob)
-        if denominator == 0:
-            continue
-        posterior_prob = numerator / denominator
+def _update_tensor(tensor: BeliefTensor, observers: np.ndarray, pred: Predicate, p_template: PredicateTemplate,
+                   subject: BNPCType, target: BNPCType, p_obs_given_true: float, p_obs_given_false: float,
+                   backend: KernelBackend) -> None:
+    if tensor.log_odds:
+        # same as _update_log_odds for every observer
+        if p_obs_given_true == 0 and p_obs_given_false == 0:
+            return
+        prior = tensor.gather(observers, p_template.template_id, subject.id, target.id)
+        prior[np.isnan(prior)] = 0.0  # log-odds of DEFAULT_PRIOR
+        posterior = prior + (_log(p_obs_given_true) - _log(p_obs_given_false))
+        updated = ~np.isnan(posterior)
+    else:
+        prior = tensor.gather(observers, p_template.template_id, subject.id, target.id)
+        prior[np.isnan(prior)] = DEFAULT_PRIOR
+        posterior, updated = backend.bayes_update(prior, p_obs_given_true, p_obs_given_false)
+    tensor.scatter(observers[updated], pred, posterior[updated])
+
+
+def _update_stores(observers: Sequence[BNPCType], pred: Predicate, p_template: PredicateTemplate,
+                   subject: BNPCType, target: BNPCType, p_obs_given_true: float, p_obs_given_false: float,
+                   backend: KernelBackend) -> None:
+    plain = []
+    for observer in observers:
+        if getattr(observer.beliefStore, "log_odds", False):
+            _update_log_odds(observer, pred, p_template, subject, target, p_obs_given_true, p_obs_given_false)
+        else:
+            plain.append(observer.beliefStore)
+    if not plain:
+        return
+    prior = np.array([store.get_probability(p_template, subject, target) for store in plain], dtype=np.float64)
+    posterior, updated = backend.bayes_update(prior, p_obs_given_true, p_obs_given_false)
+    for store, posterior_prob, is_updated in zip(plain, posterior.tolist(), updated.tolist()):
+        if is_updated:
+            store.update(pred, posterior_prob)
 
-        observer.beliefStore.update(pred, posterior_prob)
+
+def update_observers_from_observation(observers: Sequence[BNPCType], exchange: BSocialExchange, accepted: bool,
+                                      backend: KernelBackend = NUMPY):
+    # update_beliefs_from_observation for several observers with distinct stores at once: each
+    # prior is gathered for all observers, updated in one array operation and scattered back
+    i = exchange.initiator
+    r = exchange.responder
+    observers = [observer for observer in observers if observer is not i and observer is not r]
+    if not observers:
+        return
+    tensor = _shared_tensor(observers)
+    observer_ids = np.array([observer.beliefStore.observer for observer in observers]) if tensor is not None else None
+
+    for subject, target, likelihoods in _sides(exchange, accepted):
+        for p_template, p_obs_given_true, p_obs_given_false in likelihoods:
+            pred = p_template.instantiate(subject=subject, target=target) if not p_template.is_single \
+                else p_template.instantiate(subject=subject)
+            if tensor is not None:
+                _update_tensor(tensor, observer_ids, pred, p_template, subject, target,
+                               p_obs_given_true, p_obs_given_false, backend)
+            else:
+                _update_stores(observers, pred, p_template, subject, target,
+                               p_obs_given_true, p_obs_given_false, backend)
+
+
+def actions_seen_by(observer: BNPCType, actions_done: Sequence[BSocialExchange],
+                    audiences: Sequence[Sequence[BNPCType]] | None) -> List[BSocialExchange]:
+    if audiences is None:
+        return list(actions_done)
+    return [action for action, audience in zip(actions_done, audiences)
+            if any(npc is observer for npc in audience)]
+
+
+def observe_exchanges(observers: Sequence[BNPCType], actions_done: Sequence[BSocialExchange],
+                      audiences: Sequence[Sequence[BNPCType]] | None = None,
+                      backend: KernelBackend = NUMPY) -> None:
+    # same result as observer.update_beliefs_from_observation(actions_seen_by(observer, ...)) for
+    # every observer; audiences[n] is who saw actions_done[n] (everyone in `observers` when None)
+    stores = [observer.beliefStore for observer in observers]
+    if len({id(store) for store in stores}) != len(stores):
+        # observers sharing a store see each other's updates, so keep the per-observer order
+        for observer in observers:
+            observer.update_beliefs_from_observation(actions_seen_by(observer, actions_done, audiences))
+        return
+
+    for n, action in enumerate(actions_done):
+        if action.is_accepted is None:
+            logging.warning(f"Action {action.name} has no acceptance status, skipping belief update.")
+            continue
+        audience = observers if audiences is None else audiences[n]
+        update_observers_from_observation(audience, action, action.is_accepted, backend)
@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import Sequence
+from typing import List, Optional, Sequence
 
 from src.belief.BeliefStore import BeliefStore
 from src.irs.BIRS import BInfluenceRuleSet
@@ -22,6 +22,7 @@ class BSocialExchange:
     text: str   # text that will be used to describe the exchange in the UI (npc i {text} npc r)
     is_accepted: bool = None
     playability_threshold: float = 0.4
+    witnesses: Optional[List[BNPCType]] = None  # NPCs that saw the exchange, when the game tracks it
 
     def is_playable(self, state: BeliefStore) -> bool:
         return all(cond(state, self.initiator, self.responder) >= self.playability_threshold for cond in self.preconditions)
@@ -1,14 +1,23 @@
-from dataclasses import dataclass
-from typing import Sequence, List
+from __future__ import annotations
 
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, TYPE_CHECKING
+
+import numpy as np
+
+from src.belief.BeliefStore import BeliefStore
 from src.irs.BIRS import BInfluenceRuleSet
-from src.predicates.BCondition import IBCondition, BHasCondition
+from src.predicates.BCondition import IBCondition, BHasCondition, lookup_sign
+from src.predicates.PredicateRegistry import TEMPLATE_SHIFT
 from src.predicates.PredicateTemplate import PredicateTemplate
 from src.rule.BRule import BRule
 from src.social_exchange.BExchangeEffects import BExchangeEffects
 from src.social_exchange.BSocialExchange import BSocialExchange
 from src.types.NPCTypes import BNPCType
 
+if TYPE_CHECKING:
+    from src.social_exchange.TemplateCompiler import CompiledExchange
+
 
 @dataclass
 class BSocialExchangeTemplate:
@@ -19,6 +28,32 @@ class BSocialExchangeTemplate:
     responder_irs: BInfluenceRuleSet
     effects: BExchangeEffects
     text: str = ""  # text that will be used to describe the exchange in the UI (npc i {text} npc r)
+    playability_threshold: float = 0.4
+    # generated code, set by TemplateCompiler.compile_template on first use
+    _compiled: Optional[CompiledExchange] = field(default=None, init=False, repr=False, compare=False)
+
+    def __getstate__(self):
+        # generated functions are rebuilt on demand after loading
+        return {name: value for name, value in self.__dict__.items() if name != "_compiled"}
+
+    def playable_mask(self, state: BeliefStore, initiator: BNPCType, candidates: Sequence[BNPCType]) -> np.ndarray:
+        # same answer as instantiate(initiator, r).is_playable(state) for every r in candidates;
+        # plain has / has-not preconditions are looked up for all candidates in one batch
+        mask = np.ones(len(candidates), dtype=bool)
+        pair_keys = np.array([BeliefStore._pair_key(initiator, r) for r in candidates], dtype=np.int64)
+        custom = []
+        for cond in self.preconditions:
+            sign = lookup_sign(cond)
+            if sign is None:
+                custom.append(cond)
+                continue
+            probabilities = state.get_probabilities((cond.req_predicate.template_id << TEMPLATE_SHIFT) | pair_keys)
+            mask &= (probabilities if sign > 0 else 1.0 - probabilities) >= self.playability_threshold
+        for cond in custom:
+            for n in np.flatnonzero(mask):
+                if not cond(state, initiator, candidates[n]) >= self.playability_threshold:
+                    mask[n] = False
+        return mask
 
     def instantiate(self, initiator: BNPCType, responder: BNPCType) -> BSocialExchange:
         intent = self.intent.instantiate(subject=initiator, target=responder)
@@ -32,7 +67,8 @@ class BSocialExchangeTemplate:
             initiator_irs=self.initiator_irs,
             responder_irs=self.responder_irs,
             effects=self.effects,
-            text=self.text
+            text=self.text,
+            playability_threshold=self.playability_threshold,
         )
 
 
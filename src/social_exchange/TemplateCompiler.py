@@ -0,0 +1,179 @@
+import weakref
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Sequence
+
+from src.irs.BIRS import BInfluenceRuleSet
+from src.predicates.BCondition import lookup_sign
+from src.predicates.BEffect import BAddPredicateEffect, BRemovePredicateEffect, IBEffect
+from src.social_exchange.BSocialExchangeTemplate import BSocialExchangeTemplate
+from src.utils.sigmoid import sigmoid
+
+_PLAIN_EFFECTS = (BAddPredicateEffect.__call__, BRemovePredicateEffect.__call__)
+
+
+@dataclass(frozen=True)
+class CompiledExchange:
+    # Straight-line Python generated for one template. Every function takes (state, i, r) in
+    # initiator/responder order and gives the same result as the BSocialExchange method of that name.
+    is_playable: Callable
+    initiator_score: Callable
+    initiator_probability: Callable
+    responder_probability: Callable
+    accept: Callable
+    reject: Callable
+    source: str
+
+
+def _condition_signature(cond) -> tuple:
+    sign = lookup_sign(cond)
+    if sign is not None:
+        return sign, cond.req_predicate
+    if getattr(cond, "is_constant", False):
+        return "constant", cond.value
+    return "custom", id(cond)
+
+
+def _effect_signature(effect: IBEffect) -> tuple:
+    if type(effect).__call__ in _PLAIN_EFFECTS:
+        return "update", effect.predicate, effect.probability
+    return "custom", id(effect)
+
+
+def _irs_signature(irs: BInfluenceRuleSet) -> tuple:
+    return irs.bias, tuple((rule.weight, tuple(map(_condition_signature, rule.condition))) for rule in irs.rules)
+
+
+def template_signature(template: BSocialExchangeTemplate) -> tuple:
+    # structural: two templates with the same conditions, rules and effects share generated code
+    return (template.playability_threshold,
+            tuple(map(_condition_signature, template.preconditions)),
+            _irs_signature(template.initiator_irs),
+            _irs_signature(template.responder_irs),
+            tuple(map(_effect_signature, template.effects.accept_effects)),
+            tuple(map(_effect_signature, template.effects.reject_effects)))
+
+
+class _Emitter:
+    # collects generated lines and the objects they reference by name
+    def __init__(self):
+        self.lines: List[str] = []
+        self.namespace: Dict[str, object] = {}
+
+    def const(self, value) -> str:
+        name = f"k{len(self.namespace)}"
+        self.namespace[name] = value
+        return name
+
+    def emit(self, line: str, depth: int = 1) -> None:
+        self.lines.append("    " * depth + line)
+
+
+def _emit_value(out: _Emitter, cond, lookups: Dict[int, str], depth: int = 1) -> str:
+    # expression for one condition's value; lookups of one template are shared within a function
+    sign = lookup_sign(cond)
+    if sign is None:
+        if getattr(cond, "is_constant", False):
+            return repr(float(cond.value))
+        out.emit(f"c = float({out.const(cond)}(state, i, r))", depth)
+        out.emit("if c < 0 or c > 1:", depth)
+        out.emit("raise ValueError('Condition probabilities must be within [0,1].')", depth + 1)
+        return "c"
+    template = cond.req_predicate
+    name = lookups.get(template.template_id)
+    if name is None:
+        name = lookups[template.template_id] = f"p{len(lookups)}"
+        out.emit(f"{name} = get({out.const(template)}, i, r)", depth)
+    return name if sign > 0 else f"(1.0 - {name})"
+
+
+def _emit_playable(out: _Emitter, template: BSocialExchangeTemplate) -> None:
+    out.emit("def is_playable(state, i, r):", 0)
+    out.emit("get = state.get_probability")
+    threshold = out.const(template.playability_threshold)
+    lookups: Dict[int, str] = {}
+    for cond in template.preconditions:
+        if lookup_sign(cond) is None and not getattr(cond, "is_constant", False):
+            # arbitrary callables are compared as-is, like in BSocialExchange.is_playable
+            out.emit(f"if not {out.const(cond)}(state, i, r) >= {threshold}:")
+        else:
+            out.emit(f"if not {_emit_value(out, cond, lookups)} >= {threshold}:")
+        out.emit("return False", 2)
+    out.emit("return True")
+
+
+def _emit_score(out: _Emitter, name: str, irs: BInfluenceRuleSet) -> None:
+    out.emit(f"def {name}(state, i, r):", 0)
+    out.emit("get = state.get_probability")
+    lookups: Dict[int, str] = {}
+    for rule in irs.rules:
+        for cond in rule.condition:
+            if lookup_sign(cond) is not None:
+                _emit_value(out, cond, lookups)
+    out.emit(f"total = {out.const(irs.bias)}")
+    for rule in irs.rules:
+        if not rule.condition:
+            out.emit(f"raise ValueError({out.const(f'Rule {rule.name!r} has no conditions.')})")
+            return
+        # same left-to-right product and zero short-circuit as BRule.probability
+        out.emit("prob = 1")
+        depth = 1
+        for n, cond in enumerate(rule.condition):
+            if n:
+                out.emit("if prob != 0:", depth)
+                depth += 1
+            out.emit(f"prob *= {_emit_value(out, cond, lookups, depth)}", depth)
+        out.emit(f"total += {out.const(rule.weight)} * prob")
+    out.emit("return total")
+
+
+def _emit_effects(out: _Emitter, name: str, effects: Sequence[IBEffect]) -> None:
+    out.emit(f"def {name}(state, i, r):", 0)
+    for effect in effects:
+        if type(effect).__call__ in _PLAIN_EFFECTS:
+            template = out.const(effect.predicate)
+            instantiate = (f"{template}.instantiate(subject=i)" if effect.predicate.is_single
+                           else f"{template}.instantiate(subject=i, target=r)")
+            out.emit(f"state.update({instantiate}, {out.const(effect.probability)})")
+        else:
+            out.emit(f"{out.const(effect)}(state, i, r)")
+    out.emit("return None")
+
+
+def _generate(template: BSocialExchangeTemplate) -> CompiledExchange:
+    out = _Emitter()
+    _emit_playable(out, template)
+    _emit_score(out, "initiator_score", template.initiator_irs)
+    _emit_score(out, "responder_score", template.responder_irs)
+    _emit_effects(out, "accept", template.effects.accept_effects)
+    _emit_effects(out, "reject", template.effects.reject_effects)
+    source = "\n".join(out.lines) + "\n"
+    exec(compile(source, f"<compiled exchange {template.name}>", "exec"), out.namespace)
+
+    initiator_score = out.namespace["initiator_score"]
+    responder_score = out.namespace["responder_score"]
+    return CompiledExchange(
+        is_playable=out.namespace["is_playable"],
+        initiator_score=initiator_score,
+        initiator_probability=lambda state, i, r: sigmoid(x=initiator_score(state, i, r), bias=0.0),
+        # the responder evaluates from its own side: (state, initiator, responder) -> IRS(responder, initiator)
+        responder_probability=lambda state, i, r: sigmoid(x=responder_score(state, r, i), bias=0.0),
+        accept=out.namespace["accept"],
+        reject=out.namespace["reject"],
+        source=source,
+    )
+
+
+# structurally equal templates share generated code while any of them still holds it
+_shared: "weakref.WeakValueDictionary[tuple, CompiledExchange]" = weakref.WeakValueDictionary()
+
+
+def compile_template(template: BSocialExchangeTemplate) -> CompiledExchange:
+    # compiled once and kept on the template: edits made to it afterwards are not picked up
+    compiled = template._compiled
+    if compiled is None:
+        signature = template_signature(template)
+        compiled = _shared.get(signature)
+        if compiled is None:
+            compiled = _shared[signature] = _generate(template)
+        template._compiled = compiled
+    return compiled
@@ -1,8 +1,10 @@
+import math
+
 import yaml
-from typing import List, Sequence
+from typing import Dict, List, Sequence
 
 from src.predicates.PredicateTemplate import PredicateTemplate
-from src.predicates.BCondition import BHasCondition, BHasNotCondition
+from src.predicates.BCondition import BHasCondition, BHasNotCondition, lookup_sign
 from src.rule.BRule import BRule
 from src.irs.BIRS import BInfluenceRuleSet
 from src.predicates.BEffect import BAddPredicateEffect, BRemovePredicateEffect
@@ -11,8 +13,12 @@ from src.social_exchange.BSocialExchangeTemplate import BSocialExchangeTemplate
 
 
 class BConstantCondition(BHasCondition):
+    is_constant = True  # lets CompiledIRS fold `value` in at compile time
+
     def __init__(self, value: float):
         super().__init__(req_predicate=PredicateTemplate("trait", "constant", True))
+        if value < 0 or value > 1:
+            raise ValueError("Condition probabilities must be within [0,1].")
         self.value = value
 
     def __call__(self, *args, **kwargs) -> float:
@@ -39,6 +45,8 @@ def _parse_condition(data: dict):
 
 def _parse_rule(data: dict) -> BRule:
     conds = [_parse_condition(c) for c in data.get("conditions", [])]
+    if not conds:
+        raise ValueError(f"Rule '{data.get('name', '')}' has no conditions.")
     return BRule(name=data.get("name", ""), condition=conds, weight=data.get("weight"))
 
 
@@ -87,7 +95,61 @@ def _parse_exchange(data: dict) -> BSocialExchangeTemplate:
     )
 
 
-def load_exchange_templates(path: str) -> List[BSocialExchangeTemplate]:
+def _is_constant(condition) -> bool:
+    return getattr(condition, "is_constant", False)
+
+
+def _rule_signature(conditions) -> tuple | None:
+    # order-insensitive: conditions are multiplied. Only constants and plain has / has-not lookups
+    # are known by their fields; a rule with any other condition is never merged (None)
+    parts = []
+    for c in conditions:
+        if _is_constant(c):
+            parts.append(("constant", c.value))
+        elif (sign := lookup_sign(c)) is not None:
+            parts.append((sign, c.req_predicate))
+        else:
+            return None
+    return tuple(sorted(parts, key=repr))
+
+
+def _optimize_irs(irs: BInfluenceRuleSet) -> None:
+    rules: List[BRule] = []
+    merged: Dict[tuple, BRule] = {}
+    for rule in irs.rules:
+        if rule.weight is None or rule.effects:
+            rules.append(rule)
+            continue
+        # constant 1.0 factors do not change the product
+        conditions = [c for c in rule.condition if not (_is_constant(c) and c.value == 1.0)]
+        if all(_is_constant(c) for c in conditions):
+            irs.bias += rule.weight * math.prod(c.value for c in conditions)
+            continue
+        signature = _rule_signature(conditions)
+        if signature is None:
+            rules.append(BRule(name=rule.name, condition=conditions, weight=rule.weight))
+            continue
+        if signature in merged:
+            merged[signature].weight += rule.weight
+            continue
+        merged[signature] = BRule(name=rule.name, condition=conditions, weight=rule.weight)
+        rules.append(merged[signature])
+    irs.rules = rules
+
+
+def optimize_exchange_template(template: BSocialExchangeTemplate) -> BSocialExchangeTemplate:
+    # Folds constant-only rules into the IRS bias, drops constant 1.0 factors and always-satisfied
+    # constant preconditions, and merges rules with the same conditions (weights summed).
+    # Scores are unchanged up to float rounding; the folded 'trait:constant' placeholder no longer
+    # takes part in signal interpolation.
+    template.preconditions = [c for c in template.preconditions
+                              if not (_is_constant(c) and c.value >= template.playability_threshold)]
+    for irs in {id(irs): irs for irs in (template.initiator_irs, template.responder_irs)}.values():
+        _optimize_irs(irs)
+    return template
+
+
+def load_exchange_templates(path: str, optimize: bool = False) -> List[BSocialExchangeTemplate]:
     import os
 
     if not os.path.isabs(path) and not os.path.exists(path):
@@ -100,4 +162,7 @@ def load_exchange_templates(path: str) -> List[BSocialExchangeTemplate]:
         data = yaml.safe_load(f) or []
     if not isinstance(data, list):
         raise ValueError("Exchanges YAML must be a list of exchanges")
-    return [_parse_exchange(entry) for entry in data]
+    templates = [_parse_exchange(entry) for entry in data]
+    if optimize:
+        templates = [optimize_exchange_template(template) for template in templates]
+    return templates
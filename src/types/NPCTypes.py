@@ -7,6 +7,7 @@ if TYPE_CHECKING:
     from src.desire_formation.BVolition import BVolition
     from src.social_exchange.BSocialExchange import BSocialExchange
     from src.social_exchange.BSocialExchangeTemplate import BSocialExchangeTemplate
+    from src.utils.kernels import KernelBackend
 
 
 class NPCType(Protocol):
@@ -22,8 +23,8 @@ class BNPCType(Protocol):
     def perform_action(self, action: BSocialExchange):
         raise NotImplementedError
 
-    def desire_formation(self, targets: Sequence[BNPCType], actions_templates: Sequence[BSocialExchangeTemplate]) -> \
-            List[BVolition]:
+    def desire_formation(self, targets: Sequence[BNPCType], actions_templates: Sequence[BSocialExchangeTemplate],
+                         backend: Optional[KernelBackend] = None) -> List[BVolition]:
         raise NotImplementedError
 
     def select_intent(self, volitions: Sequence[BVolition], threshold: float = 0.0) -> Optional[BSocialExchange]:
@@ -32,5 +33,6 @@ class BNPCType(Protocol):
     def update_beliefs_from_observation(self, actions_done: Sequence[BSocialExchange]) -> None:
         raise NotImplementedError
 
-    def iteration(self, targets: Sequence[BNPCType], actions_templates: Sequence[BSocialExchangeTemplate]):
+    def iteration(self, targets: Sequence[BNPCType], actions_templates: Sequence[BSocialExchangeTemplate],
+                  backend: Optional[KernelBackend] = None):
         raise NotImplementedError
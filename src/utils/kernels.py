@@ -0,0 +1,117 @@
+import logging
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:  # optional: only needed for the "numba" backend
+    numba = None
+
+
+# Array kernels behind the batched paths (CompiledIRS, batched observation updates).
+#   rule_products(values[pairs, columns], op_columns[ops], op_signs[ops], op_values[ops],
+#                 rule_ends[rules]) -> [pairs, rules]
+# multiplies each rule's ops in order starting from 1 (see CompiledIRS for the op encoding);
+#   bayes_update(prior, p_obs_given_true, p_obs_given_false) -> (posterior, updated)
+# where `updated` is False wherever the evidence has zero probability and the prior is kept;
+# the likelihoods may be arrays shaped like `prior` or scalars.
+# Nothing is selected globally: a world (BCiF) resolves its backend with get_backend and passes
+# it down to desire formation and observation; callers that pass none get NUMPY.
+
+
+@dataclass(frozen=True)
+class KernelBackend:
+    name: str
+    rule_products: Callable[[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray], np.ndarray]
+    bayes_update: Callable[[np.ndarray, np.ndarray, np.ndarray], Tuple[np.ndarray, np.ndarray]]
+
+
+def _rule_products_numpy(values, op_columns, op_signs, op_values, rule_ends):
+    out = np.empty((values.shape[0], len(rule_ends)))
+    ops = list(zip(op_columns.tolist(), op_signs.tolist(), op_values.tolist()))
+    start = 0
+    for k, end in enumerate(rule_ends.tolist()):
+        prob = np.ones(values.shape[0])
+        for column, sign, value in ops[start:end]:
+            if column < 0:
+                prob *= value
+            elif sign > 0:
+                prob *= values[:, column]
+            else:
+                prob *= 1.0 - values[:, column]
+        out[:, k] = prob
+        start = end
+    return out
+
+
+def _bayes_update_numpy(prior, p_true, p_false):
+    prior = np.asarray(prior, dtype=np.float64)
+    numerator = p_true * prior
+    denominator = numerator + p_false * (1 - prior)
+    updated = denominator != 0
+    posterior = np.divide(numerator, denominator, out=prior.copy(), where=updated)
+    return posterior, updated
+
+
+_backends: Dict[str, KernelBackend] = {
+    "numpy": KernelBackend("numpy", _rule_products_numpy, _bayes_update_numpy),
+}
+
+if numba is not None:
+    @numba.njit(cache=True)
+    def _rule_products_numba(values, op_columns, op_signs, op_values, rule_ends):
+        out = np.empty((values.shape[0], rule_ends.shape[0]))
+        for n in range(values.shape[0]):
+            start = 0
+            for k in range(rule_ends.shape[0]):
+                prob = 1.0
+                for o in range(start, rule_ends[k]):
+                    column = op_columns[o]
+                    if column < 0:
+                        prob *= op_values[o]
+                    elif op_signs[o] > 0:
+                        prob *= values[n, column]
+                    else:
+                        prob *= 1.0 - values[n, column]
+                out[n, k] = prob
+                start = rule_ends[k]
+        return out
+
+    @numba.njit(cache=True)
+    def _bayes_update_numba_kernel(prior, p_true, p_false):
+        posterior = prior.astype(np.float64)
+        updated = np.zeros(prior.shape[0], dtype=np.bool_)
+        for n in range(prior.shape[0]):
+            numerator = p_true[n] * prior[n]
+            denominator = numerator + p_false[n] * (1 - prior[n])
+            if denominator != 0:
+                posterior[n] = numerator / denominator
+                updated[n] = True
+        return posterior, updated
+
+    def _bayes_update_numba(prior, p_true, p_false):
+        # the kernel indexes the likelihoods per entry, so scalars are broadcast first
+        prior = np.asarray(prior)
+        return _bayes_update_numba_kernel(prior, np.broadcast_to(np.asarray(p_true, dtype=np.float64), prior.shape),
+                                          np.broadcast_to(np.asarray(p_false, dtype=np.float64), prior.shape))
+
+    _backends["numba"] = KernelBackend("numba", _rule_products_numba, _bayes_update_numba)
+
+NUMPY = _backends["numpy"]
+
+
+def available_backends() -> List[str]:
+    return list(_backends)
+
+
+def get_backend(name: str) -> KernelBackend:
+    # "auto" picks numba when it is installed; an unavailable backend falls back to numpy
+    if name == "auto":
+        name = "numba" if "numba" in _backends else "numpy"
+    backend = _backends.get(name)
+    if backend is None:
+        logging.warning(f"Kernel backend '{name}' is not available, using numpy.")
+        backend = NUMPY
+    return backend
@@ -0,0 +1,33 @@
+import numpy as np
+
+# Array-aware, numerically stable logistic helpers for batched IRS and likelihood evaluation.
+# Scalars go in and come out as 0-d arrays; use src.utils.sigmoid.sigmoid on the scalar path.
+
+
+def sigmoid(x, bias=0.0) -> np.ndarray:
+    z = np.asarray(x, dtype=np.float64) + bias
+    # exp is only ever taken of a non-positive number, so nothing overflows
+    e = np.exp(-np.abs(z))
+    return np.where(z >= 0, 1.0 / (1.0 + e), e / (1.0 + e))
+
+
+def log_sigmoid(x) -> np.ndarray:
+    return -np.logaddexp(0.0, -np.asarray(x, dtype=np.float64))
+
+
+def logit(p, eps: float | None = None) -> np.ndarray:
+    # inverse of sigmoid; 0 and 1 map to -inf / +inf unless clipped to [eps, 1 - eps]
+    p = np.asarray(p, dtype=np.float64)
+    if eps is not None:
+        p = np.clip(p, eps, 1.0 - eps)
+    with np.errstate(divide="ignore"):
+        return np.log(p) - np.log1p(-p)
+
+
+def log_sum_exp(a, axis=None) -> np.ndarray:
+    a = np.asarray(a, dtype=np.float64)
+    peak = np.max(a, axis=axis, keepdims=True)
+    peak = np.where(np.isfinite(peak), peak, 0.0)
+    with np.errstate(divide="ignore"):
+        result = np.log(np.sum(np.exp(a - peak), axis=axis, keepdims=True)) + peak
+    return np.squeeze(result, axis=axis) if axis is not None else result.reshape(())
@@ -1,4 +1,12 @@
 import math
 
+# below this exp(-x) overflows a float; switch to the equivalent exp(x) / (1 + exp(x))
+_OVERFLOW_EDGE = -700.0
+
+
 def sigmoid(x, bias=0.0):
-    return 1.0 / (1.0 + math.exp(-(bias + x)))
+    z = bias + x
+    if z < _OVERFLOW_EDGE:
+        e = math.exp(z)
+        return e / (1.0 + e)
+    return 1.0 / (1.0 + math.exp(-z))
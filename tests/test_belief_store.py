@@ -58,3 +58,206 @@ def test_initial_beliefs_indexing():
 
     assert list(store)  # iterable
     assert store.get_probability(tmpl, npc, None) == pytest.approx(0.8)
+
+
+def test_secondary_indexes_follow_updates_and_removal():
+    npc, other = make_npcs()
+    store = BeliefStore()
+    kind = PredicateTemplate('trait', 'kind', True)
+    friend = PredicateTemplate('relationship', 'friend', False)
+    store.add_belief(kind.instantiate(subject=npc), 0.9)
+    store.add_belief(friend.instantiate(subject=npc, target=other), 0.8)
+    store.add_belief(friend.instantiate(subject=other, target=npc), 0.4)
+
+    assert [b.predicate.subtype for b in store.get_traits_about(npc)] == ['kind']
+    assert store.get_traits_about(other) == []
+    assert [b.probability for b in store.get_relationships_about(npc, other)] == [0.8]
+    assert len(store.get_beliefs_about(npc)) == 2
+    assert len(store.get_beliefs_of_type('relationship', 'friend')) == 2
+
+    store.update(friend.instantiate(subject=npc, target=other), 0.1)
+    assert [b.probability for b in store.get_relationships_about(npc, other)] == [0.1]
+
+    store.remove_predicate('relationship', 'friend')
+    assert store.get_relationships_about(npc, other) == []
+    assert store.get_beliefs_of_type('relationship', 'friend') == []
+    assert len(store.get_beliefs_about(npc)) == 1
+    assert len(store) == len(store.beliefs) == 1
+
+
+def test_indexes_rebuilt_after_pickling():
+    import pickle
+
+    npc, other = make_npcs()
+    store = BeliefStore()
+    friend = PredicateTemplate('relationship', 'friend', False)
+    store.add_belief(friend.instantiate(subject=npc, target=other), 0.8)
+
+    restored = pickle.loads(pickle.dumps(store))
+    assert restored.get_probability(friend, npc, other) == pytest.approx(0.8)
+    assert len(restored.get_relationships_about(npc, other)) == 1
+
+
+def test_remove_belief_swaps_last_into_place():
+    npcs = make_npcs(4)
+    store = BeliefStore()
+    friend = PredicateTemplate('relationship', 'friend', False)
+    preds = [friend.instantiate(subject=npcs[0], target=other) for other in npcs[1:]]
+    for n, pred in enumerate(preds):
+        store.add_belief(pred, 0.1 * (n + 1))
+
+    store.remove_belief(preds[0])
+    assert preds[0] not in store
+    assert len(store) == len(store.beliefs) == 2
+    assert store.get_probability(friend, npcs[0], npcs[3]) == pytest.approx(0.3)
+
+    store.remove_belief(preds[0])  # already gone
+    store.remove_belief(preds[2])
+    assert [b.predicate for b in store] == [preds[1]]
+
+
+def test_rename_predicate_moves_beliefs():
+    npc, other = make_npcs()
+    store = BeliefStore()
+    friend = PredicateTemplate('relationship', 'friend', False)
+    buddy = PredicateTemplate('relationship', 'buddy', False)
+    store.add_belief(friend.instantiate(subject=npc, target=other), 0.8)
+    store.add_belief(buddy.instantiate(subject=other, target=npc), 0.2)
+    store.add_belief(friend.instantiate(subject=other, target=npc), 0.6)
+
+    store.rename_predicate('relationship', 'friend', 'buddy')
+    assert store.get_beliefs_of_type('relationship', 'friend') == []
+    assert store.get_probability(buddy, npc, other) == pytest.approx(0.8)
+    assert store.get_probability(buddy, other, npc) == pytest.approx(0.6)
+    assert len(store) == len(store.beliefs) == 2
+    assert all(b.predicate_template == buddy for b in store)
+
+
+def test_sparse_store_skips_and_compacts_uninformative_beliefs():
+    npc, other = make_npcs()
+    store = BeliefStore(sparse_epsilon=0.05)
+    friend = PredicateTemplate('relationship', 'friend', False)
+    enemy = PredicateTemplate('relationship', 'enemy', False)
+
+    store.update(friend.instantiate(subject=npc, target=other), 0.52)
+    assert len(store) == 0
+    assert store.get_probability(friend, npc, other) == 0.5
+
+    store.update(friend.instantiate(subject=npc, target=other), 0.9)
+    store.update(enemy.instantiate(subject=npc, target=other), 0.1)
+    store.update(friend.instantiate(subject=npc, target=other), 0.48)
+    assert len(store) == 2
+
+    assert store.compact() == 1
+    assert len(store) == len(store.beliefs) == 1
+    assert store.get_probability(friend, npc, other) == 0.5
+    assert store.get_probability(enemy, npc, other) == pytest.approx(0.1)
+
+
+def test_batched_probabilities_match_single_lookups():
+    npc, other = make_npcs()
+    store = BeliefStore()
+    friend = PredicateTemplate('relationship', 'friend', False)
+    enemy = PredicateTemplate('relationship', 'enemy', False)
+    ally = PredicateTemplate('relationship', 'ally', False)
+    store.add_belief(friend.instantiate(subject=npc, target=other), 0.9)
+    store.add_belief(enemy.instantiate(subject=npc, target=other), 0.2)
+
+    templates = [friend, enemy, ally, friend]
+    batch = store.get_probabilities_for(templates, npc, other)
+    assert batch.tolist() == [store.get_probability(t, npc, other) for t in templates]
+
+    keys = store.keys_for(templates, npc, other) + store.keys_for([friend], other, npc)
+    assert store.get_probabilities(keys).tolist() == [0.9, 0.2, 0.5, 0.9, 0.5]
+
+
+def test_version_and_change_journal():
+    npc, other = make_npcs()
+    store = BeliefStore(journal_size=8)
+    friend = PredicateTemplate('relationship', 'friend', False)
+    kind = PredicateTemplate('trait', 'kind', True)
+    friend_pred = friend.instantiate(subject=npc, target=other)
+    kind_pred = kind.instantiate(subject=other)
+
+    start = store.version
+    store.update(friend_pred, 0.8)
+    store.update(kind_pred, 0.3)
+    assert store.version == start + 2
+    assert store.changes_since(start) == set(store.keys_for([friend], npc, other) + store.keys_for([kind], other, None))
+
+    checkpoint = store.version
+    store.update(friend_pred, 0.8)
+    assert store.version == checkpoint
+    store.remove_belief(kind_pred)
+    assert store.changes_since(checkpoint) == set(store.keys_for([kind], other, None))
+    assert store.changes_since(store.version) == set()
+
+
+def test_change_journal_reports_overflow():
+    npcs = make_npcs(4)
+    bounded = BeliefStore(journal_size=2)
+    unlogged = BeliefStore()
+    tmpl = PredicateTemplate('trait', 'brave', True)
+    for store in (bounded, unlogged):
+        start = store.version
+        for npc in npcs:
+            store.update(tmpl.instantiate(subject=npc), 0.9)
+        assert store.changes_since(start) is None
+
+    assert bounded.changes_since(bounded.version - 1) == set(bounded.keys_for([tmpl], npcs[3], None))
+    assert bounded.changes_since(bounded.version - 3) is None
+    assert unlogged.changes_since(unlogged.version - 1) is None
+
+
+def test_belief_is_slotted_and_defaults_template():
+    npc, _ = make_npcs()
+    tmpl = PredicateTemplate('trait', 'kind', True)
+    belief = Belief(predicate=tmpl.instantiate(subject=npc), probability=0.4)
+
+    assert belief.predicate_template is tmpl
+    assert not hasattr(belief, '__dict__')
+
+    restored = Belief.__new__(Belief)
+    restored.__setstate__({'predicate': belief.predicate, 'probability': 0.4, 'predicate_template': tmpl})
+    assert restored == belief
+
+
+def test_compact_round_trip():
+    import pickle
+    from src.belief.CompactBelief import CompactBelief
+
+    npc, other = make_npcs()
+    friend = PredicateTemplate('relationship', 'friend', False)
+    kind = PredicateTemplate('trait', 'kind', True)
+    store = BeliefStore()
+    store.add_belief(friend.instantiate(subject=npc, target=other), 0.75)
+    store.add_belief(kind.instantiate(subject=other), 0.25)
+
+    compact = pickle.loads(pickle.dumps(store.to_compact()))
+    assert compact[0] == CompactBelief(friend.template_id, npc.id, other.id, 0.75)
+    assert compact[1].key == store.keys_for([kind], other, None)[0]
+
+    rebuilt = BeliefStore.from_compact(compact, {npc.id: npc, other.id: other}, sparse_epsilon=0.01)
+    assert rebuilt.sparse_epsilon == 0.01
+    assert rebuilt.get_probability(friend, npc, other) == 0.75
+    assert [b.predicate.subtype for b in rebuilt.get_traits_about(other)] == ['kind']
+
+
+@pytest.mark.parametrize("kind", ["object", "columnar", "tensor"])
+def test_stores_reject_out_of_range_probabilities(kind):
+    from src.belief.BeliefTensor import BeliefTensor
+    from src.belief.ColumnarBeliefStore import ColumnarBeliefStore
+
+    npcs = make_npcs()
+    store = {"object": BeliefStore, "columnar": ColumnarBeliefStore,
+             "tensor": lambda: BeliefTensor(npcs).stores[0]}[kind]()
+    pred = PredicateTemplate(pred_type="relationship", subtype="friend", is_single=False).instantiate(*npcs)
+
+    for probability in (1.7, -0.1, float("nan")):
+        with pytest.raises(ValueError):
+            store.update(pred, probability)
+        with pytest.raises(ValueError):
+            store.add_belief(pred, probability)
+    assert pred not in store
+    with pytest.raises(ValueError):
+        BeliefStore(beliefs=[Belief(pred, 1.7)])
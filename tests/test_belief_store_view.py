@@ -0,0 +1,88 @@
+import pytest
+
+from src.belief.BeliefStore import BeliefStore
+from src.belief.BeliefStoreView import BeliefStoreView
+from src.irs.BIRS import BInfluenceRuleSet
+from src.npc.BNPC import BNPC
+from src.predicates.BCondition import BHasCondition, BHasNotCondition
+from src.predicates.PredicateTemplate import PredicateTemplate
+from src.rule.BRule import BRule
+
+
+def make_npcs(n=3):
+    return [BNPC(i, f"NPC{i}") for i in range(n)]
+
+
+def test_view_filters_by_subject_without_copying():
+    owner, other, third = make_npcs()
+    kind = PredicateTemplate('trait', 'kind', True)
+    friend = PredicateTemplate('relationship', 'friend', False)
+    owner.beliefStore.add_belief(kind.instantiate(subject=other), 0.9)
+    owner.beliefStore.add_belief(friend.instantiate(subject=other, target=owner), 0.7)
+    owner.beliefStore.add_belief(friend.instantiate(subject=third, target=owner), 0.2)
+
+    view = owner.estimate_belief_about(other)
+    assert isinstance(view, BeliefStoreView)
+    assert len(view) == 2
+    assert all(any(b is s for s in owner.beliefStore) for b in view)
+
+    assert view.get_probability(kind, other, None) == pytest.approx(0.9)
+    assert view.get_probability(friend, other, owner) == pytest.approx(0.7)
+    assert view.get_probability(friend, third, owner) == 0.5
+    assert friend.instantiate(subject=other, target=owner) in view
+    assert friend.instantiate(subject=third, target=owner) not in view
+    assert view.get_traits_about(third) == []
+
+    # the view follows later changes of the underlying store
+    owner.beliefStore.update(friend.instantiate(subject=other, target=owner), 0.1)
+    assert view.get_probability(friend, other, owner) == pytest.approx(0.1)
+
+
+def test_view_is_read_only():
+    owner, other, _ = make_npcs()
+    view = owner.estimate_belief_about(other)
+    with pytest.raises(TypeError):
+        view.update(PredicateTemplate('trait', 'kind', True).instantiate(subject=other), 1.0)
+
+
+def test_view_supports_acceptance_probability():
+    owner, other, third = make_npcs()
+    friend = PredicateTemplate('relationship', 'friend', False)
+    enemy = PredicateTemplate('relationship', 'enemy', False)
+    owner.beliefStore.add_belief(friend.instantiate(subject=other, target=owner), 0.8)
+    owner.beliefStore.add_belief(enemy.instantiate(subject=other, target=owner), 0.3)
+    owner.beliefStore.add_belief(friend.instantiate(subject=third, target=owner), 0.1)
+    irs = BInfluenceRuleSet(name='irs', rules=[
+        BRule(name='r1', condition=[BHasCondition(friend)], weight=1.0),
+        BRule(name='r2', condition=[BHasNotCondition(enemy)], weight=0.5),
+    ])
+
+    view = owner.estimate_belief_about(other)
+    expected = irs.acceptance_probability(owner.beliefStore, other, owner)
+    assert irs.acceptance_probability(view, other, owner) == pytest.approx(expected)
+
+
+def test_view_batched_probabilities():
+    owner, other, third = make_npcs()
+    friend = PredicateTemplate('relationship', 'friend', False)
+    owner.beliefStore.add_belief(friend.instantiate(subject=other, target=owner), 0.8)
+    owner.beliefStore.add_belief(friend.instantiate(subject=third, target=owner), 0.3)
+    view = owner.estimate_belief_about(other)
+
+    assert view.get_probabilities_for([friend], other, owner).tolist() == [0.8]
+    assert view.get_probabilities_for([friend], third, owner).tolist() == [0.5]
+    keys = owner.beliefStore.keys_for([friend], other, owner) + owner.beliefStore.keys_for([friend], third, owner)
+    assert view.get_probabilities(keys).tolist() == [0.8, 0.5]
+
+
+def test_view_filters_changes_by_subject():
+    npc, other, _ = make_npcs()
+    store = BeliefStore(journal_size=8)
+    kind = PredicateTemplate('trait', 'kind', True)
+    start = store.version
+    store.update(kind.instantiate(subject=npc), 0.9)
+    store.update(kind.instantiate(subject=other), 0.1)
+
+    view = BeliefStoreView(store=store, subject=other)
+    assert view.version == store.version
+    assert view.changes_since(start) == set(store.keys_for([kind], other, None))
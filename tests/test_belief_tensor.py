@@ -0,0 +1,169 @@
+import pickle
+import random
+
+import numpy as np
+import pytest
+
+from src.belief.BeliefStore import BeliefStore
+from src.belief.BeliefTensor import BeliefTensor
+from src.predicates.PredicateTemplate import PredicateTemplate
+from src.npc.BNPC import BNPC
+
+
+def make_npcs(n=3):
+    return [BNPC(i, f"NPC{i}") for i in range(n)]
+
+
+def test_requires_dense_ids():
+    with pytest.raises(ValueError):
+        BeliefTensor([BNPC(0, 'A'), BNPC(2, 'B')])
+
+
+def test_views_match_object_store():
+    npcs = make_npcs(4)
+    tensor = BeliefTensor(npcs)
+    store = tensor.stores[1]
+    reference = BeliefStore()
+    templates = [PredicateTemplate('trait', 'kind', True), PredicateTemplate('relationship', 'friend', False),
+                 PredicateTemplate('relationship', 'enemy', False)]
+    rng = random.Random(3)
+    for _ in range(60):
+        tmpl = rng.choice(templates)
+        subject, target = rng.sample(npcs, 2)
+        pred = tmpl.instantiate(subject=subject, target=None if tmpl.is_single else target)
+        probability = rng.choice([0.25, 0.5, 0.75, 1.0])
+        for s in (store, reference):
+            s.update(pred, probability)
+
+    assert len(store) == len(reference)
+    for tmpl in templates:
+        for i in npcs:
+            for r in [None] + npcs:
+                assert store.get_probability(tmpl, i, r) == reference.get_probability(tmpl, i, r)
+        keys = reference.keys_for(templates, npcs[0], npcs[2])
+        assert store.get_probabilities(keys).tolist() == reference.get_probabilities(keys).tolist()
+
+    def summary(beliefs):
+        return sorted((b.predicate.subtype, b.predicate.subject.id, b.predicate.target.id if b.predicate.target else None,
+                       b.probability) for b in beliefs)
+
+    assert summary(store) == summary(reference)
+    for npc in npcs:
+        assert summary(store.get_beliefs_about(npc)) == summary(reference.get_beliefs_about(npc))
+        assert summary(store.get_traits_about(npc)) == summary(reference.get_traits_about(npc))
+        assert summary(store.get_relationships_about(npc, npcs[3])) == \
+            summary(reference.get_relationships_about(npc, npcs[3]))
+    assert tensor.stores[0].beliefs == []
+
+
+def test_world_remove_and_rename():
+    npcs = make_npcs()
+    tensor = BeliefTensor(npcs)
+    friend = PredicateTemplate('relationship', 'friend', False)
+    buddy = PredicateTemplate('relationship', 'buddy', False)
+    tensor.stores[0].add_belief(friend.instantiate(subject=npcs[1], target=npcs[2]), 0.8)
+    tensor.stores[2].add_belief(friend.instantiate(subject=npcs[0], target=npcs[1]), 0.4)
+    tensor.stores[2].add_belief(buddy.instantiate(subject=npcs[0], target=npcs[1]), 0.1)
+    version = tensor.stores[0].version
+
+    tensor.rename_predicate('relationship', 'friend', 'buddy')
+    assert tensor.stores[0].get_probability(buddy, npcs[1], npcs[2]) == pytest.approx(0.8)
+    assert tensor.stores[2].get_probability(buddy, npcs[0], npcs[1]) == pytest.approx(0.4)
+    assert tensor.stores[2].get_beliefs_of_type('relationship', 'friend') == []
+    assert tensor.stores[0].changes_since(version) is None
+
+    slice_ = tensor.probabilities(buddy)
+    assert slice_.shape == (3, 3, 3)
+    assert slice_[0, 1, 2] == pytest.approx(0.8) and slice_[1, 1, 2] == 0.5
+
+    tensor.remove_predicate('relationship', 'buddy')
+    assert all(len(store) == 0 for store in tensor.stores)
+
+
+def test_pickle_round_trip():
+    npcs = make_npcs(2)
+    tensor = BeliefTensor(npcs)
+    tensor.attach()
+    kind = PredicateTemplate('trait', 'kind', True)
+    npcs[0].beliefStore.add_belief(kind.instantiate(subject=npcs[1]), 0.25)
+
+    restored = pickle.loads(pickle.dumps(npcs))
+    assert restored[0].beliefStore.get_probability(kind, restored[1], None) == pytest.approx(0.25)
+    assert restored[0].beliefStore.tensor is restored[1].beliefStore.tensor
+    assert isinstance(restored[0].beliefStore.tensor.subject_chunks[kind.template_id], np.ndarray)
+
+
+def test_log_odds_tensor():
+    npcs = make_npcs()
+    tensor = BeliefTensor(npcs, sparse_epsilon=0.01, log_odds=True)
+    store = tensor.stores[0]
+    ally = PredicateTemplate('relationship', 'ally', False)
+    pred = ally.instantiate(subject=npcs[1], target=npcs[2])
+    store.update(pred, 0.8)
+    store.update_log_odds(pred, np.log(0.25))
+
+    assert store.log_odds
+    assert store.get_probability(ally, npcs[1], npcs[2]) == pytest.approx(0.5, abs=1e-6)
+    assert store.get_log_odds(ally, npcs[1], npcs[2]) == pytest.approx(0.0, abs=1e-6)
+    assert tensor.probabilities(ally)[0, 1, 2] == pytest.approx(0.5, abs=1e-6)
+    assert tensor.compact() == 1
+    assert len(store) == 0
+
+    store.update_log_odds(pred, np.log(4.0))
+    assert store.get_probabilities(store.keys_for([ally], npcs[1], npcs[2]))[0] == pytest.approx(0.8, rel=1e-6)
+    restored = pickle.loads(pickle.dumps(tensor))
+    assert restored.stores[0].get_probability(ally, npcs[1], npcs[2]) == pytest.approx(0.8, rel=1e-6)
+
+
+def test_relational_slabs_are_allocated_per_observer():
+    npcs = make_npcs(4)
+    tensor = BeliefTensor(npcs)
+    ally = PredicateTemplate('relationship', 'ally', False)
+    tensor.stores[2].update(ally.instantiate(npcs[0], npcs[1]), 0.9)
+
+    slabs = tensor.pair_chunks[ally.template_id]
+    assert [observer for observer, _ in slabs] == [2]
+    assert slabs.slab(2).shape == (4, 4) and slabs.size == 1
+    assert tensor.gather(np.arange(4), ally.template_id, 0, 1)[2] == pytest.approx(0.9)
+    assert tensor.stores[0].get_probability(ally, npcs[0], npcs[1]) == 0.5
+
+    # growing the pool keeps the slabs already handed out
+    big = BeliefTensor(make_npcs(9))
+    for observer in (0, 7, 3, 1, 8, 5):
+        big.stores[observer].update(ally.instantiate(big.npcs[2], big.npcs[3]), 0.1 * (observer + 1))
+    assert big.pair_chunks[ally.template_id].size == 6
+    assert big.gather(np.arange(9), ally.template_id, 2, 3) == pytest.approx(
+        [0.1, 0.2, np.nan, 0.4, np.nan, 0.6, np.nan, 0.8, 0.9], nan_ok=True)
+
+    # saves from before the split kept one dense observer x subject x target chunk
+    dense = np.full((4, 4, 4), np.nan, dtype=np.float32)
+    dense[1, 2, 3] = 0.3
+    state = tensor.__getstate__()
+    state["pair_chunks"] = [(ally, dense)]
+    restored = BeliefTensor.__new__(BeliefTensor)
+    restored.__setstate__(state)
+    assert [observer for observer, _ in restored.pair_chunks[ally.template_id]] == [1]
+    assert restored.row(ally.template_id, True, 1)[2, 3] == pytest.approx(0.3)
+
+
+@pytest.mark.parametrize("log_odds", [False, True])
+def test_sparse_store_rename_keeps_uninformative_values(log_odds):
+    npcs = make_npcs()
+    store = BeliefTensor(npcs, sparse_epsilon=0.05, log_odds=log_odds).stores[0]
+    reference = BeliefStore(sparse_epsilon=0.05)
+    friend = PredicateTemplate('relationship', 'friend', False)
+    buddy = PredicateTemplate('relationship', 'buddy', False)
+    for s in (store, reference):
+        s.update(friend.instantiate(npcs[1], npcs[2]), 0.9)
+        s.update(friend.instantiate(npcs[1], npcs[2]), 0.5)  # existing beliefs may sit at the prior
+        s.update(friend.instantiate(npcs[2], npcs[0]), 0.8)
+        s.update(buddy.instantiate(npcs[2], npcs[0]), 0.1)
+        s.rename_predicate('relationship', 'friend', 'buddy')
+
+    def summary(beliefs):
+        return sorted((b.predicate.subtype, b.predicate.subject.id, b.predicate.target.id if b.predicate.target else None,
+                       round(b.probability, 5)) for b in beliefs)
+
+    assert len(store) == len(reference) == 2
+    assert summary(store) == summary(reference)
+    assert store.get_probability(buddy, npcs[1], npcs[2]) == pytest.approx(0.5)
@@ -0,0 +1,237 @@
+import numpy as np
+import pytest
+
+from src.belief.Belief import Belief
+from src.belief.BeliefStore import BeliefStore
+from src.belief.ColumnarBeliefStore import ColumnarBeliefStore
+from src.predicates.PredicateTemplate import PredicateTemplate
+from src.npc.BNPC import BNPC
+
+
+def make_npcs(n=2):
+    return [BNPC(i, f"NPC{i}") for i in range(n)]
+
+
+def test_add_and_get_probability():
+    npc, other = make_npcs()
+    store = ColumnarBeliefStore()
+    kind = PredicateTemplate('trait', 'kind', True)
+    friend = PredicateTemplate('relationship', 'friend', False)
+
+    store.add_belief(kind.instantiate(subject=npc), probability=0.7)
+    store.add_belief(friend.instantiate(subject=npc, target=other), probability=0.9)
+
+    assert store.get_probability(kind, npc, None) == pytest.approx(0.7)
+    assert store.get_probability(friend, npc, other) == pytest.approx(0.9)
+    assert store.get_probability(friend, other, npc) == 0.5
+    assert store.get_probability(PredicateTemplate('trait', 'brave', True), npc, None) == 0.5
+    assert store._probability_col.dtype == np.float32
+    assert store._subject_col.dtype == np.int32
+
+
+def test_contains_update_and_iter():
+    npc, _ = make_npcs()
+    store = ColumnarBeliefStore()
+    tmpl = PredicateTemplate('trait', 'smart', True)
+    pred = tmpl.instantiate(subject=npc)
+    store.add_belief(pred)
+    belief = next(iter(store))
+
+    assert pred in store
+    assert belief in store
+    assert belief.predicate == pred
+
+    store.update(pred, 0.3)
+    assert len(store) == 1
+    assert store.get_probability(tmpl, npc, None) == pytest.approx(0.3)
+
+
+def test_grows_past_capacity():
+    npcs = make_npcs(10)
+    store = ColumnarBeliefStore(capacity=2)
+    tmpl = PredicateTemplate('relationship', 'friend', False)
+    for a in npcs:
+        for b in npcs:
+            if a is not b:
+                store.add_belief(tmpl.instantiate(subject=a, target=b), probability=a.id / 10)
+
+    assert len(store) == 90
+    assert store.get_probability(tmpl, npcs[7], npcs[2]) == pytest.approx(0.7)
+
+
+def test_remove_predicate_and_bulk_queries():
+    npc, other = make_npcs()
+    kind = PredicateTemplate('trait', 'kind', True)
+    brave = PredicateTemplate('trait', 'brave', True)
+    friend = PredicateTemplate('relationship', 'friend', False)
+    beliefs = [
+        Belief(predicate=kind.instantiate(subject=npc), probability=0.8, predicate_template=kind),
+        Belief(predicate=brave.instantiate(subject=npc), probability=0.6, predicate_template=brave),
+        Belief(predicate=friend.instantiate(subject=npc, target=other), probability=0.9, predicate_template=friend),
+    ]
+    store = ColumnarBeliefStore(beliefs=beliefs)
+
+    assert {b.predicate.subtype for b in store.get_traits_about(npc)} == {'kind', 'brave'}
+    assert [b.predicate.subtype for b in store.get_relationships_about(npc, other)] == ['friend']
+    assert store.get_traits_about(other) == []
+
+    store.remove_predicate('trait', 'kind')
+    assert len(store) == 2
+    assert kind.instantiate(subject=npc) not in store
+    assert store.get_probability(brave, npc, None) == pytest.approx(0.6)
+    assert store.get_probability(friend, npc, other) == pytest.approx(0.9)
+
+
+def test_matches_object_store():
+    npc, other = make_npcs()
+    tmpl = PredicateTemplate('relationship', 'ally', False)
+    reference = BeliefStore()
+    columnar = ColumnarBeliefStore()
+    for store in (reference, columnar):
+        store.update(tmpl.instantiate(subject=npc, target=other), 0.25)
+        store.update(tmpl.instantiate(subject=other, target=npc), 0.75)
+
+    for a, b in ((npc, other), (other, npc)):
+        assert columnar.get_probability(tmpl, a, b) == pytest.approx(reference.get_probability(tmpl, a, b))
+
+
+def test_remove_belief_and_rename():
+    npcs = make_npcs(3)
+    store = ColumnarBeliefStore()
+    friend = PredicateTemplate('relationship', 'friend', False)
+    buddy = PredicateTemplate('relationship', 'buddy', False)
+    store.add_belief(friend.instantiate(subject=npcs[0], target=npcs[1]), 0.8)
+    store.add_belief(friend.instantiate(subject=npcs[0], target=npcs[2]), 0.4)
+    store.add_belief(buddy.instantiate(subject=npcs[0], target=npcs[2]), 0.1)
+
+    store.remove_belief(friend.instantiate(subject=npcs[0], target=npcs[1]))
+    assert len(store) == 2
+    assert store.get_probability(friend, npcs[0], npcs[1]) == 0.5
+    assert store.get_probability(buddy, npcs[0], npcs[2]) == pytest.approx(0.1)
+
+    store.rename_predicate('relationship', 'friend', 'buddy')
+    assert len(store) == 1
+    assert store.get_probability(buddy, npcs[0], npcs[2]) == pytest.approx(0.4)
+    assert store.get_beliefs_of_type('relationship', 'friend') == []
+
+
+def test_sparse_mode_and_compact():
+    npc, other = make_npcs()
+    store = ColumnarBeliefStore(sparse_epsilon=0.05)
+    friend = PredicateTemplate('relationship', 'friend', False)
+    enemy = PredicateTemplate('relationship', 'enemy', False)
+
+    store.update(enemy.instantiate(subject=npc, target=other), 0.53)
+    assert len(store) == 0
+
+    store.update(friend.instantiate(subject=npc, target=other), 0.9)
+    store.update(enemy.instantiate(subject=npc, target=other), 0.2)
+    store.update(friend.instantiate(subject=npc, target=other), 0.51)
+    assert store.compact() == 1
+    assert len(store) == 1
+    assert store.get_probability(enemy, npc, other) == pytest.approx(0.2)
+
+
+def test_pickle_round_trip_reregisters_templates():
+    import pickle
+
+    npc, other = make_npcs()
+    store = ColumnarBeliefStore()
+    friend = PredicateTemplate('relationship', 'friend', False)
+    kind = PredicateTemplate('trait', 'kind', True)
+    store.add_belief(friend.instantiate(subject=npc, target=other), 0.75)
+    store.add_belief(kind.instantiate(subject=other), 0.25)
+
+    restored = pickle.loads(pickle.dumps(store))
+    assert len(restored) == 2
+    assert restored.get_probability(friend, npc, other) == pytest.approx(0.75)
+    assert [b.predicate.subtype for b in restored.get_traits_about(other)] == ['kind']
+    restored.add_belief(kind.instantiate(subject=npc), 0.5)
+    assert len(restored) == 3
+
+
+def test_batched_probabilities():
+    npc, other = make_npcs()
+    store = ColumnarBeliefStore()
+    friend = PredicateTemplate('relationship', 'friend', False)
+    enemy = PredicateTemplate('relationship', 'enemy', False)
+    store.add_belief(friend.instantiate(subject=npc, target=other), 0.75)
+
+    batch = store.get_probabilities_for([friend, enemy, friend], npc, other)
+    assert batch.tolist() == [0.75, 0.5, 0.75]
+    assert store.get_probabilities(np.array(store.keys_for([friend], other, npc))).tolist() == [0.5]
+
+
+def test_change_journal_tracks_bulk_operations():
+    npc, other = make_npcs()
+    store = ColumnarBeliefStore(journal_size=16)
+    friend = PredicateTemplate('relationship', 'friend', False)
+    buddy = PredicateTemplate('relationship', 'buddy', False)
+    store.update(friend.instantiate(subject=npc, target=other), 0.8)
+
+    checkpoint = store.version
+    store.update(friend.instantiate(subject=npc, target=other), 0.8)
+    assert store.version == checkpoint
+
+    store.rename_predicate('relationship', 'friend', 'buddy')
+    renamed = store.keys_for([friend, buddy], npc, other)
+    assert store.changes_since(checkpoint) == set(renamed)
+
+    checkpoint = store.version
+    store.remove_predicate('relationship', 'buddy')
+    assert store.changes_since(checkpoint) == set(renamed[1:])
+
+
+def test_compact_conversion_matches_object_store():
+    npc, other = make_npcs()
+    friend = PredicateTemplate('relationship', 'friend', False)
+    store = ColumnarBeliefStore()
+    store.add_belief(friend.instantiate(subject=npc, target=other), 0.75)
+
+    compact = store.to_compact()
+    assert compact == BeliefStore(beliefs=list(store)).to_compact()
+    rebuilt = ColumnarBeliefStore.from_compact(compact, {npc.id: npc, other.id: other})
+    assert rebuilt.get_probability(friend, npc, other) == pytest.approx(0.75)
+
+
+def test_log_odds_mode_reads_probabilities():
+    a, b = make_npcs()
+    kind = PredicateTemplate('trait', 'kind', True)
+    ally = PredicateTemplate('relationship', 'ally', False)
+    store = ColumnarBeliefStore(log_odds=True)
+    store.update(kind.instantiate(subject=a), 0.9)
+    store.update(ally.instantiate(subject=a, target=b), 1.0)
+
+    assert store.get_probability(kind, a, None) == pytest.approx(0.9, rel=1e-6)
+    assert store.get_log_odds(kind, a, None) == pytest.approx(np.log(9), rel=1e-6)
+    assert store.get_probability(ally, a, b) == 1.0
+    assert store.get_log_odds(kind, b, None) == 0.0
+    assert store.get_probabilities(store.keys_for([kind, ally], a, b)).tolist() == \
+        pytest.approx([0.5, 1.0])
+    assert sorted(belief.probability for belief in store) == pytest.approx([0.9, 1.0], rel=1e-6)
+
+
+def test_update_log_odds_is_bayes_rule():
+    a, _ = make_npcs()
+    kind = PredicateTemplate('trait', 'kind', True)
+    pred = kind.instantiate(subject=a)
+    p_true, p_false = 0.7, 0.2
+    plain = ColumnarBeliefStore()
+    logs = ColumnarBeliefStore(log_odds=True)
+    for store in (plain, logs):
+        store.update(pred, 0.3)
+        for _ in range(3):
+            store.update_log_odds(pred, np.log(p_true) - np.log(p_false))
+
+    prior = 0.3
+    for _ in range(3):
+        prior = p_true * prior / (p_true * prior + p_false * (1 - prior))
+    assert plain.get_probability(kind, a, None) == pytest.approx(prior, rel=1e-6)
+    assert logs.get_probability(kind, a, None) == pytest.approx(prior, rel=1e-6)
+
+    # impossible evidence against a certain belief leaves it alone
+    logs.update(pred, 1.0)
+    version = logs.version
+    logs.update_log_odds(pred, -np.inf)
+    assert logs.get_probability(kind, a, None) == 1.0
+    assert logs.version == version
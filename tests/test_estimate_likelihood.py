@@ -26,3 +26,19 @@ def test_estimate_likelihood_no_relevant_rules():
     tmpl = PredicateTemplate('trait', 'kind', True)
     irs = BInfluenceRuleSet(name='irs', rules=[])
     assert estimate_likelihood(irs, tmpl, True, True) == 0.5
+
+
+def test_batched_likelihoods_match_scalar():
+    from src.signal_interpolation.EstimateLikelihood import estimate_likelihoods
+
+    ally = PredicateTemplate('relationship', 'ally', False)
+    kind = PredicateTemplate('trait', 'kind', True)
+    brave = PredicateTemplate('trait', 'brave', True)
+    irs = BInfluenceRuleSet(name='irs', rules=[
+        BRule(name='r1', condition=[BHasCondition(ally), BHasNotCondition(kind)], weight=1.5),
+        BRule(name='r2', condition=[BHasCondition(kind)], weight=-0.25),
+    ])
+    for pred_true in (True, False):
+        for accepted in (True, False):
+            expected = [estimate_likelihood(irs, p, pred_true, accepted) for p in (ally, kind, brave)]
+            assert estimate_likelihoods(irs, [ally, kind, brave], pred_true, accepted).tolist() == expected
@@ -1,3 +1,5 @@
+import pytest
+
 from src.predicates.BCondition import BHasCondition, BHasNotCondition
 from src.predicates.PredicateTemplate import PredicateTemplate
 from src.social_exchange.BSocialExchangeTemplate import BSocialExchangeTemplate
@@ -40,3 +42,108 @@ def test_load_exchange_templates():
     assert reject_effects[0].label == 'remove'
     pred_rj_add = reject_effects[1].predicate
     assert pred_rj_add.subtype == 'rival'
+
+
+def test_loader_rejects_invalid_values(tmp_path):
+    bad_constant = tmp_path / 'bad_constant.yaml'
+    bad_constant.write_text(
+        "- name: x\n"
+        "  intent: {pred_type: relationship, subtype: ally, is_single: false}\n"
+        "  preconditions: [{constant: 1.5}]\n"
+    )
+    empty_rule = tmp_path / 'empty_rule.yaml'
+    empty_rule.write_text(
+        "- name: x\n"
+        "  intent: {pred_type: relationship, subtype: ally, is_single: false}\n"
+        "  initiator_irs: {rules: [{name: r, weight: 1.0, conditions: []}]}\n"
+    )
+    bad_effect = tmp_path / 'bad_effect.yaml'
+    bad_effect.write_text(
+        "- name: x\n"
+        "  intent: {pred_type: relationship, subtype: ally, is_single: false}\n"
+        "  effects: {accept: [{add: {pred_type: relationship, subtype: ally, is_single: false, probability: 2}}]}\n"
+    )
+
+    for path in (bad_constant, empty_rule, bad_effect):
+        with pytest.raises(ValueError):
+            load_exchange_templates(str(path))
+
+
+def test_optimized_templates_score_the_same():
+    import random
+    from src.belief.BeliefStore import BeliefStore
+    from src.npc.BNPC import BNPC
+
+    plain = load_exchange_templates('../configs/exchanges_example.yaml')
+    optimized = load_exchange_templates('../configs/exchanges_example.yaml', optimize=True)
+    tmpl = optimized[0]
+    assert len(tmpl.preconditions) == 2
+    assert tmpl.initiator_irs.bias == 1.0
+    assert not any(isinstance(c, BConstantCondition) for rule in tmpl.initiator_irs.rules for c in rule.condition)
+
+    npcs = [BNPC(i, f"NPC{i}") for i in range(3)]
+    store = BeliefStore()
+    rng = random.Random(1)
+    templates = {c.req_predicate for t in plain for c in t.preconditions}
+    templates |= {c.req_predicate for t in plain for irs in (t.initiator_irs, t.responder_irs)
+                  for rule in irs.rules for c in rule.condition}
+    for template in templates:
+        for a in npcs:
+            for b in npcs:
+                if a is not b:
+                    pred = template.instantiate(a) if template.is_single else template.instantiate(a, b)
+                    store.update(pred, rng.random())
+
+    i, r = npcs[0], npcs[1]
+    for before, after in zip(plain, optimized):
+        assert after.initiator_irs.expected_value(store, i, r) == pytest.approx(
+            before.initiator_irs.expected_value(store, i, r), rel=1e-12)
+        assert after.responder_irs.acceptance_probability(store, r, i) == pytest.approx(
+            before.responder_irs.acceptance_probability(store, r, i), rel=1e-12)
+        assert after.playable_mask(store, i, npcs[1:]).tolist() == before.playable_mask(store, i, npcs[1:]).tolist()
+
+
+def test_optimize_merges_duplicate_rules():
+    from src.irs.BIRS import BInfluenceRuleSet
+    from src.rule.BRule import BRule
+    from src.social_exchange.BExchangeEffects import BExchangeEffects
+    from src.social_exchange.exchange_loader import optimize_exchange_template
+
+    kind = PredicateTemplate('trait', 'kind', True)
+    enemy = PredicateTemplate('relationship', 'enemy', False)
+    irs = BInfluenceRuleSet(name='irs', rules=[
+        BRule('a', [BHasCondition(kind), BHasNotCondition(enemy)], 0.5),
+        BRule('b', [BHasNotCondition(enemy), BConstantCondition(1.0), BHasCondition(kind)], 0.25),
+        BRule('c', [BConstantCondition(0.5), BConstantCondition(0.5)], 2.0),
+    ])
+    template = BSocialExchangeTemplate('x', [BConstantCondition(0.3)], enemy, irs, irs, BExchangeEffects([], []))
+
+    optimize_exchange_template(template)
+    assert [(rule.name, rule.weight) for rule in irs.rules] == [('a', 0.75)]
+    assert irs.bias == 0.5
+    assert len(template.preconditions) == 1
+
+
+def test_optimize_keeps_rules_with_custom_conditions_apart():
+    from src.irs.BIRS import BInfluenceRuleSet
+    from src.rule.BRule import BRule
+    from src.social_exchange.BExchangeEffects import BExchangeEffects
+    from src.social_exchange.exchange_loader import optimize_exchange_template
+
+    class AtLeast(BHasCondition):
+        def __init__(self, req_predicate, floor):
+            super().__init__(req_predicate)
+            self.floor = floor
+
+        def __call__(self, state, i, r):
+            return max(self.floor, state.get_probability(self.req_predicate, i, r))
+
+    kind = PredicateTemplate('trait', 'kind', True)
+    irs = BInfluenceRuleSet(name='irs', rules=[
+        BRule('a', [AtLeast(kind, 0.2)], 1.0),
+        BRule('b', [AtLeast(kind, 0.8)], 1.0),
+    ])
+    template = BSocialExchangeTemplate('x', [], kind, irs, irs, BExchangeEffects([], []))
+
+    optimize_exchange_template(template)
+    assert [(rule.name, rule.weight) for rule in irs.rules] == [('a', 1.0), ('b', 1.0)]
@@ -0,0 +1,141 @@
+import numpy as np
+import pytest
+
+from src.CiF.BCiF import BCiF
+from src.utils import kernels
+
+
+@pytest.mark.parametrize("name", kernels.available_backends())
+def test_rule_products_match_reference(name):
+    backend = kernels.get_backend(name)
+    rng = np.random.default_rng(0)
+    values = rng.random((5, 3))
+    # rule 0: P0 * (1 - P1); rule 1: P0 * 0.5 * P0 * P2; rule 2: 0.25
+    op_columns = np.array([0, 1, 0, -1, 0, 2, -1])
+    op_signs = np.array([1, -1, 1, 0, 1, 1, 0])
+    op_values = np.array([0.0, 0.0, 0.0, 0.5, 0.0, 0.0, 0.25])
+    rule_ends = np.array([2, 6, 7])
+
+    result = backend.rule_products(values, op_columns, op_signs, op_values, rule_ends)
+    p = values
+    expected = np.stack([p[:, 0] * (1 - p[:, 1]), p[:, 0] * 0.5 * p[:, 0] * p[:, 2], np.full(5, 0.25)], axis=1)
+    assert result.tolist() == expected.tolist()
+
+
+@pytest.mark.parametrize("name", kernels.available_backends())
+def test_bayes_update_matches_scalar_formula(name):
+    backend = kernels.get_backend(name)
+    prior = np.array([0.5, 0.2, 0.9, 1.0])
+    p_true = np.array([0.7, 0.5, 0.1, 0.0])
+    p_false = np.array([0.3, 0.5, 0.9, 0.6])
+
+    posterior, updated = backend.bayes_update(prior, p_true, p_false)
+    assert updated.tolist() == [True, True, True, False]
+    for n in range(3):
+        numerator = p_true[n] * prior[n]
+        assert posterior[n] == numerator / (numerator + p_false[n] * (1 - prior[n]))
+    assert posterior[3] == 1.0
+
+
+def test_backend_selected_by_cif():
+    cif = BCiF(NPCs=[], actions=[], traits=[], relationships=[], backend="auto")
+    assert cif.kernels.name == ("numba" if kernels.numba is not None else "numpy")
+    assert BCiF(NPCs=[], actions=[], traits=[], relationships=[]).kernels is kernels.NUMPY
+
+    cif.backend = "numpy"
+    assert cif.kernels is kernels.NUMPY
+
+
+@pytest.mark.skipif(kernels.numba is not None, reason="numba is installed")
+def test_missing_numba_falls_back_to_numpy(caplog):
+    assert kernels.get_backend("numba") is kernels.NUMPY
+    assert "not available" in caplog.text
+
+
+def make_cif(backend, use_tensor):
+    from src.belief.BeliefTensor import BeliefTensor
+    from src.irs.BIRS import BInfluenceRuleSet
+    from src.npc.BNPC import BNPC
+    from src.predicates.BCondition import BHasCondition, BHasNotCondition
+    from src.predicates.PredicateTemplate import PredicateTemplate
+    from src.rule.BRule import BRule
+    from src.social_exchange.BExchangeEffects import BExchangeEffects
+    from src.social_exchange.BSocialExchangeTemplate import BSocialExchangeTemplate
+
+    ally = PredicateTemplate('relationship', 'ally', False)
+    kind = PredicateTemplate('trait', 'kind', True)
+    npcs = [BNPC(k, f'N{k}') for k in range(4)]
+    tensor = BeliefTensor(npcs) if use_tensor else None
+    if tensor is not None:
+        tensor.attach()
+    for npc in npcs:
+        for other in npcs:
+            npc.beliefStore.update(kind.instantiate(other), 0.2 + 0.15 * other.id)
+    template = BSocialExchangeTemplate(
+        name='ally', preconditions=[], intent=ally,
+        initiator_irs=BInfluenceRuleSet(name='i', rules=[BRule(name='a', condition=[BHasCondition(kind)], weight=1.0)]),
+        responder_irs=BInfluenceRuleSet(name='r', rules=[
+            BRule(name='b', condition=[BHasNotCondition(ally), BHasCondition(kind)], weight=2.0)]),
+        effects=BExchangeEffects([], []))
+    return BCiF(NPCs=npcs, actions=[template], traits=['kind'], relationships=['ally'],
+                belief_tensor=tensor, backend=backend)
+
+
+@pytest.mark.parametrize("use_tensor", [False, True])
+@pytest.mark.parametrize("name", kernels.available_backends() + ["auto"])
+def test_cif_iterates_under_every_backend(name, use_tensor):
+    import random
+
+    def snapshot(cif):
+        return [sorted((b.predicate.subtype, b.predicate.subject.id,
+                        b.predicate.target.id if b.predicate.target else None, b.probability)
+                       for b in npc.beliefStore) for npc in cif.NPCs]
+
+    results = []
+    for backend in ("numpy", name):
+        random.seed(0)
+        cif = make_cif(backend, use_tensor)
+        for _ in range(3):
+            cif.iteration()
+        results.append(snapshot(cif))
+    assert results[1] == results[0]
+    assert any(results[1])
+
+
+def test_each_cif_keeps_its_own_backend(monkeypatch):
+    calls = []
+
+    def recording(kernel):
+        return lambda *args: calls.append(kernel.__name__) or kernel(*args)
+
+    numpy = kernels.NUMPY
+    spy = kernels.KernelBackend("spy", recording(numpy.rule_products), recording(numpy.bayes_update))
+    monkeypatch.setitem(kernels._backends, "spy", spy)
+
+    watched = make_cif("spy", False)
+    plain = make_cif("numpy", False)
+    plain.iteration()
+    assert calls == []
+    watched.iteration()
+    assert set(calls) == {numpy.rule_products.__name__, numpy.bayes_update.__name__}
+
+
+def test_numba_matches_numpy():
+    pytest.importorskip("numba")
+    numba, numpy = kernels.get_backend("numba"), kernels.NUMPY
+    assert numba.name == "numba"
+    rng = np.random.default_rng(1)
+
+    values = rng.random((40, 4))
+    ops = (np.array([0, 1, -1, 2, 3, 3, -1]), np.array([1, -1, 0, 1, -1, 1, 0]),
+           np.array([0.0, 0.0, 0.3, 0.0, 0.0, 0.0, 0.9]), np.array([3, 4, 7]))
+    assert numba.rule_products(values, *ops).tolist() == numpy.rule_products(values, *ops).tolist()
+
+    prior = rng.random(40)
+    p_true, p_false = rng.random(40), rng.random(40)
+    p_true[:5] = p_false[:5] = 0.0
+    for likelihoods in ((p_true, p_false), (0.7, 0.2)):
+        expected = numpy.bayes_update(prior, *likelihoods)
+        result = numba.bayes_update(prior, *likelihoods)
+        assert result[0].tolist() == expected[0].tolist()
+        assert result[1].tolist() == expected[1].tolist()
@@ -0,0 +1,38 @@
+import math
+import warnings
+
+import numpy as np
+import pytest
+
+from src.utils import logistic
+from src.utils.sigmoid import sigmoid
+
+
+def test_array_sigmoid_matches_scalar():
+    x = np.linspace(-30, 30, 121)
+    assert logistic.sigmoid(x, bias=0.5) == pytest.approx([sigmoid(v, bias=0.5) for v in x], rel=1e-12)
+    assert logistic.sigmoid(0.0).shape == ()
+
+
+def test_extreme_inputs_do_not_overflow():
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        result = logistic.sigmoid([-1e4, -800.0, 800.0, 1e4])
+    assert result.tolist() == [0.0, pytest.approx(math.exp(-800.0)), 1.0, 1.0]
+    assert sigmoid(-1e4) == 0.0
+    assert sigmoid(-800.0) == pytest.approx(math.exp(-800.0))
+    assert logistic.log_sigmoid(-1e4) == pytest.approx(-1e4)
+
+
+def test_logit_inverts_sigmoid():
+    p = np.array([1e-9, 0.1, 0.5, 0.9, 1 - 1e-9])
+    assert logistic.sigmoid(logistic.logit(p)) == pytest.approx(p, rel=1e-9)
+    assert logistic.logit([0.0, 1.0]).tolist() == [-math.inf, math.inf]
+    assert np.isfinite(logistic.logit([0.0, 1.0], eps=1e-6)).all()
+
+
+def test_log_sum_exp_is_stable():
+    a = np.array([[1000.0, 1000.0], [-math.inf, 0.0]])
+    assert logistic.log_sum_exp(a, axis=1) == pytest.approx([1000.0 + math.log(2), 0.0])
+    assert logistic.log_sum_exp([0.0, math.log(3)]) == pytest.approx(math.log(4))
+    assert logistic.log_sum_exp([-math.inf, -math.inf]) == -math.inf
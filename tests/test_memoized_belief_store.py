@@ -0,0 +1,45 @@
+import pytest
+
+from src.belief.BeliefStore import BeliefStore
+from src.belief.MemoizedBeliefStore import MemoizedBeliefStore
+from src.irs.BIRS import BInfluenceRuleSet
+from src.npc.BNPC import BNPC
+from src.predicates.BCondition import BHasCondition, BHasNotCondition
+from src.predicates.PredicateTemplate import PredicateTemplate
+from src.rule.BRule import BRule
+
+
+def make_npcs(n=2):
+    return [BNPC(i, f"NPC{i}") for i in range(n)]
+
+
+def test_shared_conditions_are_looked_up_once():
+    i, r = make_npcs()
+    predicates = [PredicateTemplate('relationship', f'rel{k}', False) for k in range(10)]
+    store = BeliefStore()
+    for k, tmpl in enumerate(predicates):
+        store.update(tmpl.instantiate(i, r), k / 10)
+    rule_sets = [BInfluenceRuleSet(name=f'irs{n}', rules=[
+        BRule('a', [BHasCondition(predicates[n % 10]), BHasNotCondition(predicates[(n + 3) % 10])], 1.0),
+        BRule('b', [BHasCondition(predicates[(n + 5) % 10])], 0.5),
+    ]) for n in range(50)]
+
+    memo = MemoizedBeliefStore(store)
+    values = [irs.expected_value(memo, i, r) for irs in rule_sets]
+
+    assert values == pytest.approx([irs.expected_value(store, i, r) for irs in rule_sets])
+    assert memo.misses == 10
+
+
+def test_memo_is_dropped_when_the_store_changes():
+    i, r = make_npcs()
+    friend = PredicateTemplate('relationship', 'friend', False)
+    store = BeliefStore()
+    memo = MemoizedBeliefStore(store)
+
+    assert memo.get_probability(friend, i, r) == 0.5
+    memo.update(friend.instantiate(i, r), 0.9)
+    assert memo.get_probability(friend, i, r) == 0.9
+    assert memo.get_probabilities_for([friend, friend], i, r).tolist() == [0.9, 0.9]
+    assert memo.misses == 2
+    assert len(memo) == 1 and memo.store is store
@@ -102,3 +102,154 @@ def test_cifbuilder_opposites(monkeypatch):
     # assert npc1.beliefStore.get_probability(enemy_tpl, npc1, npc2) == 0.5
     # assert npc1.beliefStore.get_probability(friend_tpl, npc1, npc2) == 1.0
     # assert npc1.beliefStore.get_probability(family_tpl, npc1, npc2) == 1.0
+
+
+def test_cif_schema_changes_reach_every_store(monkeypatch):
+    monkeypatch.setattr('src.CiFBuilder.BCiFBuilder.random', lambda: 0.0)
+    builder = CiFBuilder(
+        traits=[('kind', 1.0)],
+        relationships=[('friend', 1.0), ('enemy', 0.0)],
+        exchanges=[make_template()],
+        names=['A', 'B', 'C'],
+        n=3,
+        relationship_opposites={'enemy': ['friend']},
+    )
+    cif = builder.build()
+    npc1, npc2, _ = cif.NPCs
+    npc1.set_relation_preference('friend', 0.5)
+
+    cif.rename_relationship('friend', 'buddy')
+    buddy_tmpl = PredicateTemplate('relationship', 'buddy', False)
+    assert cif.relationships == ['buddy', 'enemy']
+    assert cif.relationship_opposites == {'enemy': ['buddy']}
+    assert npc1.relation_preferences == {'buddy': 0.5}
+    assert npc1.beliefStore.get_probability(buddy_tmpl, npc1, npc2) == 1.0
+
+    cif.remove_relationship('buddy')
+    cif.remove_relationship('enemy')
+    cif.remove_trait('kind')
+    assert all(len(npc.beliefStore) == 0 for npc in cif.NPCs)
+
+
+def test_cif_periodic_compaction(monkeypatch):
+    monkeypatch.setattr('src.CiFBuilder.BCiFBuilder.random', lambda: 0.0)
+    from src.belief.BeliefStore import BeliefStore
+
+    builder = CiFBuilder(
+        traits=[('kind', 1.0)],
+        relationships=[('friend', 1.0)],
+        exchanges=[make_template()],
+        names=['A', 'B'],
+        n=2,
+        belief_store_factory=lambda: BeliefStore(sparse_epsilon=0.01),
+        compaction_interval=2,
+    )
+    cif = builder.build()
+    npc1, npc2 = cif.NPCs
+    rel_tmpl = PredicateTemplate('relationship', 'friend', False)
+    npc1.beliefStore.update(rel_tmpl.instantiate(subject=npc1, target=npc2), 0.505)
+
+    cif.iteration()
+    assert len(npc1.beliefStore.get_relationships_about(npc1, npc2)) == 1
+    cif.iteration()
+    assert cif.tick == 2
+    assert npc1.beliefStore.get_relationships_about(npc1, npc2) == []
+
+
+def test_cifbuilder_belief_tensor(monkeypatch):
+    monkeypatch.setattr('src.CiFBuilder.BCiFBuilder.random', lambda: 0.0)
+    builder = CiFBuilder(
+        traits=[('kind', 1.0)],
+        relationships=[('friend', 1.0)],
+        exchanges=[make_template()],
+        names=['A', 'B', 'C'],
+        n=3,
+        use_belief_tensor=True,
+    )
+    cif = builder.build()
+    npc1, npc2, _ = cif.NPCs
+    assert cif.belief_tensor is not None
+    assert npc1.beliefStore is cif.belief_tensor.stores[0]
+    assert npc1.beliefStore.get_probability(PredicateTemplate('relationship', 'friend', False), npc1, npc2) == 1.0
+
+    cif.rename_trait('kind', 'gentle')
+    assert npc2.beliefStore.get_probability(PredicateTemplate('trait', 'gentle', True), npc2, None) == 1.0
+    cif.remove_relationship('friend')
+    cif.remove_trait('gentle')
+    assert all(len(npc.beliefStore) == 0 for npc in cif.NPCs)
+
+
+def test_desire_formation_scores_without_instantiating(monkeypatch):
+    import random
+
+    from src.belief.BeliefStore import BeliefStore
+    from src.npc.BNPC import Goal
+    from src.social_exchange.exchange_loader import load_exchange_templates
+
+    npcs = [BNPC(i, f"NPC{i}") for i in range(5)]
+    templates = load_exchange_templates('../configs/exchanges_example.yaml') + [make_template()]
+    rng = random.Random(1)
+    store = BeliefStore()
+    for tpl in templates:
+        rules = tpl.initiator_irs.rules + tpl.responder_irs.rules
+        for cond in tpl.preconditions + [c for rule in rules for c in rule.condition]:
+            template = getattr(cond, 'req_predicate', None)
+            if template is None or template.pred_type == 'trait' and template.subtype == 'constant':
+                continue
+            for a in npcs:
+                for b in npcs:
+                    if a is not b:
+                        store.update(template.instantiate(a, None if template.is_single else b), rng.random())
+    npc = npcs[0]
+    npc.beliefStore = store
+    npc.set_relation_preference(templates[0].intent.subtype, 0.7)
+    npc.add_goal(Goal(target_name='NPC2', relation_type=templates[-1].intent.subtype, value=0.4))
+
+    # the eager version this replaced
+    expected = []
+    for r in npcs[1:]:
+        for tpl in templates:
+            exch = tpl.instantiate(npc, r)
+            if not exch.is_playable(store):
+                continue
+            score = exch.initiator_probability(store) * exch.responder_probability(npc.estimate_belief_about(r))
+            weight = npc.relation_preferences.get(exch.intent.subtype, 0.0) + sum(
+                g.value for g in npc.goals if g.relation_type == exch.intent.subtype and g.target_name == r.name)
+            expected.append((exch.name, r.id, score * max(weight, 1e-3)))
+    expected.sort(key=lambda t: t[2], reverse=True)
+
+    instantiated = []
+    original = BSocialExchangeTemplate.instantiate
+    monkeypatch.setattr(BSocialExchangeTemplate, 'instantiate',
+                        lambda self, i, r: instantiated.append(self) or original(self, i, r))
+    volitions = npc.desire_formation(npcs, templates)
+    assert instantiated == []
+    assert [(v.template.name, v.responder.id, v.score) for v in volitions] == expected
+
+    action = npc.select_intent(volitions)
+    assert len(instantiated) == 1
+    assert (action.name, action.responder.id) == (volitions[0].template.name, volitions[0].responder.id)
+
+
+def test_perspective_cache_follows_store_version():
+    import pickle
+
+    from src.belief.BeliefStore import BeliefStore
+
+    npc1, npc2, npc3 = BNPC(0, 'A'), BNPC(1, 'B'), BNPC(2, 'C')
+    kind = PredicateTemplate('trait', 'kind', True)
+    npc1.beliefStore.update(kind.instantiate(npc2), 0.9)
+
+    about_b = npc1.perspective_on(npc2)
+    assert about_b.get_probability(kind, npc2, None) == 0.9
+    assert about_b.get_probability(kind, npc3, None) == 0.5
+    assert npc1.perspective_on(npc2) is about_b
+    assert npc1.perspective_on(npc3) is not about_b
+
+    npc1.beliefStore.update(kind.instantiate(npc2), 0.1)
+    assert npc1.perspective_on(npc2) is not about_b
+    assert npc1.perspective_on(npc2).get_probability(kind, npc2, None) == 0.1
+
+    npc1.beliefStore = BeliefStore()
+    assert npc1.perspective_on(npc2).get_probability(kind, npc2, None) == 0.5
+    assert '_perspectives' not in pickle.loads(pickle.dumps(npc1)).__dict__
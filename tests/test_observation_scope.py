@@ -0,0 +1,109 @@
+import random
+
+import pytest
+
+from src.CiF.BCiF import BCiF
+from src.CiF.ObservationScope import BEveryoneScope, BNeighborhoodScope, BSampledScope, BWitnessScope
+from src.irs.BIRS import BInfluenceRuleSet
+from src.npc.BNPC import BNPC
+from src.predicates.BCondition import BHasCondition
+from src.predicates.PredicateTemplate import PredicateTemplate
+from src.rule.BRule import BRule
+from src.social_exchange.BExchangeEffects import BExchangeEffects
+from src.social_exchange.BSocialExchange import BSocialExchange
+from src.social_exchange.BSocialExchangeTemplate import BSocialExchangeTemplate
+
+ALLY = PredicateTemplate('relationship', 'ally', False)
+RIVAL = PredicateTemplate('relationship', 'rival', False)
+
+
+def make_npcs(n=6):
+    return [BNPC(i, f"NPC{i}") for i in range(n)]
+
+
+def make_exchange(i, r, witnesses=None):
+    irs = BInfluenceRuleSet(name='irs', rules=[BRule(name='r', condition=[BHasCondition(ALLY)], weight=1.0)])
+    exchange = BSocialExchange(name='ex', initiator=i, responder=r, intent=ALLY.instantiate(i, r), preconditions=[],
+                               initiator_irs=irs, responder_irs=irs, effects=BExchangeEffects([], []), text='',
+                               witnesses=witnesses)
+    exchange.is_accepted = True
+    return exchange
+
+
+def ids(npcs):
+    return [npc.id for npc in npcs]
+
+
+def test_everyone_and_witness_scopes():
+    npcs = make_npcs()
+    exchange = make_exchange(npcs[0], npcs[1], witnesses=[npcs[1], npcs[4], npcs[2]])
+    assert ids(BEveryoneScope().observers(exchange, npcs)) == [2, 3, 4, 5]
+    assert ids(BWitnessScope().observers(exchange, npcs)) == [2, 4]
+
+    unwitnessed = make_exchange(npcs[0], npcs[1])
+    assert BWitnessScope().observers(unwitnessed, npcs) == []
+    assert ids(BWitnessScope(fallback=BEveryoneScope()).observers(unwitnessed, npcs)) == [2, 3, 4, 5]
+
+
+def test_neighborhood_scope():
+    npcs = make_npcs()
+    npcs[0].beliefStore.update(ALLY.instantiate(npcs[0], npcs[2]), 0.9)
+    npcs[0].beliefStore.update(ALLY.instantiate(npcs[0], npcs[3]), 0.2)
+    npcs[5].beliefStore.update(RIVAL.instantiate(npcs[5], npcs[1]), 0.7)
+    exchange = make_exchange(npcs[0], npcs[1])
+
+    assert ids(BNeighborhoodScope().observers(exchange, npcs)) == [2, 5]
+    assert ids(BNeighborhoodScope(relationships=['ally']).observers(exchange, npcs)) == [2]
+    assert ids(BNeighborhoodScope(threshold=0.1).observers(exchange, npcs)) == [2, 3, 5]
+
+
+def test_sampled_scope_is_seeded_and_bounded():
+    npcs = make_npcs(12)
+    exchange = make_exchange(npcs[0], npcs[1])
+    first = [ids(BSampledScope(fraction=0.5, seed=7).observers(exchange, npcs)) for _ in range(3)]
+    assert first[0] == first[1] == first[2]
+    assert len(first[0]) == 5 and not {0, 1} & set(first[0])
+
+    scope = BSampledScope(fraction=0.5, max_observers=2, seed=7)
+    assert [len(scope.observers(exchange, npcs)) for _ in range(4)] == [2, 2, 2, 2]
+    assert BSampledScope(fraction=0.0).observers(exchange, npcs) == []
+    with pytest.raises(ValueError):
+        BSampledScope(fraction=1.5)
+
+
+@pytest.mark.parametrize('batched', [True, False])
+def test_cif_only_updates_the_audience(batched):
+    random.seed(0)  # some draws put one NPC in every exchange, leaving it nothing to observe
+    npcs = make_npcs(5)
+    template = BSocialExchangeTemplate(
+        name='ally', preconditions=[], intent=ALLY,
+        initiator_irs=BInfluenceRuleSet(name='i', rules=[BRule(name='r', condition=[BHasCondition(ALLY)], weight=1.0)]),
+        responder_irs=BInfluenceRuleSet(name='r', rules=[BRule(name='r', condition=[BHasCondition(ALLY)], weight=1.0)]),
+        effects=BExchangeEffects([], []))
+    cif = BCiF(NPCs=npcs, actions=[template], traits=[], relationships=['ally'],
+               batched_observation=batched, observation_scope=BWitnessScope())
+    cif.iteration()
+    assert all(len(npc.beliefStore) == 0 for npc in npcs)
+
+    everyone = BCiF(NPCs=make_npcs(5), actions=[template], traits=[], relationships=['ally'],
+                    batched_observation=batched, observation_scope=BEveryoneScope())
+    everyone.iteration()
+    assert all(len(npc.beliefStore) > 0 for npc in everyone.NPCs)
+
+
+def test_cif_keeps_overridden_observation_updates():
+    class Gossip(BNPC):
+        def update_beliefs_from_observation(self, actions_done):
+            self.seen = list(actions_done)
+            super().update_beliefs_from_observation(actions_done)
+
+    npcs = make_npcs(3) + [Gossip(3, 'Gossip')]
+    template = BSocialExchangeTemplate(
+        name='ally', preconditions=[], intent=ALLY,
+        initiator_irs=BInfluenceRuleSet(name='i', rules=[BRule(name='r', condition=[BHasCondition(ALLY)], weight=1.0)]),
+        responder_irs=BInfluenceRuleSet(name='r', rules=[BRule(name='r', condition=[BHasCondition(ALLY)], weight=1.0)]),
+        effects=BExchangeEffects([], []))
+    cif = BCiF(NPCs=npcs, actions=[template], traits=[], relationships=['ally'])
+    cif.iteration()
+    assert cif.batched_observation
+    assert len(npcs[3].seen) == len(cif.actions_done) > 0
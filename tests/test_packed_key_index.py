@@ -0,0 +1,34 @@
+import random
+
+import numpy as np
+
+from src.belief.PackedKeyIndex import MISSING, PackedKeyIndex
+from src.predicates.PredicateRegistry import pack_key
+
+
+def test_matches_dict_under_random_operations():
+    rng = random.Random(0)
+    keys = [pack_key(t, s, rng.choice([None, rng.randrange(50)])) for t in range(5) for s in range(60)]
+    index = PackedKeyIndex(capacity=8)
+    reference = {}
+    for step in range(5000):
+        key = rng.choice(keys)
+        if rng.random() < 0.3:
+            assert index.pop(key) == reference.pop(key, None)
+        else:
+            index.set(key, step)
+            reference[key] = step
+        if step % 500 == 0:
+            assert len(index) == len(reference)
+            assert all(index.get(k) == reference.get(k) for k in keys)
+            assert index.get_many(keys).tolist() == [reference.get(k, MISSING) for k in keys]
+
+
+def test_rebuild_and_memory():
+    keys = np.array([pack_key(t, s, r) for t in range(10) for s in range(100) for r in range(100)], dtype=np.int64)
+    index = PackedKeyIndex()
+    index.rebuild(keys)
+    assert len(index) == len(keys)
+    assert index.get_many(keys[::-7]).tolist() == list(range(len(keys)))[::-7]
+    assert index.get(pack_key(11, 0, None)) is None
+    assert index.nbytes / len(keys) < 40  # 12 bytes per slot at 35-70% load
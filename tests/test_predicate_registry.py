@@ -0,0 +1,81 @@
+import pickle
+
+from src.npc.BNPC import BNPC
+from src.predicates.PredicateRegistry import pack_key, predicate_registry, unpack_key
+from src.predicates.PredicateTemplate import PredicateTemplate
+
+
+def test_equal_templates_share_an_id():
+    a = PredicateTemplate('relationship', 'ally', False)
+    b = PredicateTemplate('relationship', 'ally', False)
+    c = PredicateTemplate('relationship', 'ally', True)
+
+    assert a.template_id == b.template_id
+    assert a.template_id != c.template_id
+    assert predicate_registry.template(a.template_id) == a
+    assert set(predicate_registry.ids_of_type('relationship', 'ally')) == {a.template_id, c.template_id}
+
+
+def test_template_id_is_not_part_of_identity():
+    tmpl = PredicateTemplate('trait', 'kind', True)
+    restored = pickle.loads(pickle.dumps(tmpl))
+
+    assert restored == tmpl and hash(restored) == hash(tmpl)
+    assert restored.template_id == tmpl.template_id
+    assert 'template_id' not in repr(tmpl)
+
+
+def test_pack_and_unpack_key():
+    assert unpack_key(pack_key(7, 3, 12)) == (7, 3, 12)
+    assert unpack_key(pack_key(7, 3, None)) == (7, 3, None)
+    assert unpack_key(pack_key(0, 0, 0)) == (0, 0, 0)
+    assert pack_key(1, 2, None) != pack_key(1, 2, 0)
+
+
+def test_instantiate_reuses_predicates():
+    a, b = BNPC(0, 'A'), BNPC(1, 'B')
+    friend = PredicateTemplate('relationship', 'friend', False)
+
+    pred = friend.instantiate(subject=a, target=b)
+    assert friend.instantiate(subject=a, target=b) is pred
+    assert friend.instantiate(subject=b, target=a) is not pred
+    assert {pred: 1}[PredicateTemplate('relationship', 'friend', False).instantiate(subject=a, target=b)] == 1
+
+    # a different NPC object with the same id gets its own predicate
+    a2 = BNPC(0, 'A')
+    assert friend.instantiate(subject=a2, target=b).subject is a2
+
+    restored = pickle.loads(pickle.dumps(friend))
+    assert restored.instantiate(subject=a, target=b) == pred
+
+
+def test_instantiated_predicates_do_not_keep_worlds_alive():
+    import gc
+    import weakref
+
+    from src.CiF.BCiF import BCiF
+    from src.irs.BIRS import BInfluenceRuleSet
+    from src.predicates.BCondition import BHasCondition
+    from src.rule.BRule import BRule
+    from src.social_exchange.BExchangeEffects import BExchangeEffects
+    from src.social_exchange.BSocialExchangeTemplate import BSocialExchangeTemplate
+
+    ally = PredicateTemplate('relationship', 'ally', False)
+    kind = PredicateTemplate('trait', 'kind', True)
+    refs = []
+    for _ in range(3):
+        npcs = [BNPC(k, f'N{k}') for k in range(4)]
+        for npc in npcs:
+            npc.beliefStore.update(kind.instantiate(npc), 0.8)
+        template = BSocialExchangeTemplate(
+            name='ally', preconditions=[], intent=ally,
+            initiator_irs=BInfluenceRuleSet(name='i', rules=[BRule(name='a', condition=[BHasCondition(kind)], weight=1.0)]),
+            responder_irs=BInfluenceRuleSet(name='r', rules=[BRule(name='b', condition=[BHasCondition(ally)], weight=1.0)]),
+            effects=BExchangeEffects([], []))
+        cif = BCiF(NPCs=npcs, actions=[template], traits=['kind'], relationships=['ally'])
+        cif.iteration()
+        refs += [weakref.ref(npc) for npc in npcs]
+        del npcs, npc, template, cif
+
+    gc.collect()
+    assert [ref() for ref in refs] == [None] * len(refs)
@@ -70,3 +70,134 @@ def test_birs_add():
     rule = BRule(name='r', condition=[DummyCondition(1.0)], weight=1.0)
     irs.add(rule)
     assert rule in irs.rules
+
+
+def test_lookup_sign():
+    from src.predicates.BCondition import BHasNotCondition, BConstantCondition, lookup_sign
+
+    tmpl = PredicateTemplate('trait', 'kind', True)
+    assert lookup_sign(BHasCondition(tmpl)) == 1
+    assert lookup_sign(BHasNotCondition(tmpl)) == -1
+    assert lookup_sign(DummyCondition(0.3)) is None
+    assert lookup_sign(BConstantCondition(1.0)) is None
+
+
+def test_irs_matches_per_condition_evaluation():
+    from src.predicates.BCondition import BHasNotCondition
+
+    i, r = make_npcs()
+    friend = PredicateTemplate('relationship', 'friend', False)
+    enemy = PredicateTemplate('relationship', 'enemy', False)
+    store = BeliefStore()
+    store.add_belief(friend.instantiate(subject=i, target=r), 0.9)
+    store.add_belief(enemy.instantiate(subject=i, target=r), 0.3)
+    irs = BInfluenceRuleSet(name='irs', rules=[
+        BRule(name='r1', condition=[BHasCondition(friend), DummyCondition(0.5)], weight=1.0),
+        BRule(name='r2', condition=[BHasNotCondition(enemy), BHasCondition(friend)], weight=-0.5),
+        BRule(name='r3', condition=[DummyCondition(0.2)], weight=2.0),
+    ])
+
+    expected = sum(rule.weight * math.prod(cond(store, i, r) for cond in rule.condition) for rule in irs.rules)
+    assert irs.expected_value(store, i, r) == pytest.approx(expected)
+
+
+def test_compiled_irs_matches_scalar_path_exactly():
+    import random
+    from src.belief.BeliefStoreView import BeliefStoreView
+    from src.predicates.BCondition import BConstantCondition, BHasNotCondition
+
+    npcs = make_npcs(4)
+    kind = PredicateTemplate('trait', 'kind', True)
+    friend = PredicateTemplate('relationship', 'friend', False)
+    rival = PredicateTemplate('relationship', 'rival', False)
+    irs = BInfluenceRuleSet(name='irs', rules=[
+        BRule('a', [BHasCondition(friend), BHasNotCondition(rival)], 2.0),
+        BRule('b', [BHasCondition(friend), BHasCondition(friend), BConstantCondition(0.5)], -1.5),
+        BRule('c', [BHasCondition(kind), DummyCondition(0.25)], 0.7),
+        BRule('d', [BConstantCondition(0.3)], 1.0),
+    ])
+    store = BeliefStore()
+    rng = random.Random(7)
+    for a in npcs:
+        for b in npcs:
+            if a is not b:
+                store.update(friend.instantiate(subject=a, target=b), rng.random())
+                store.update(rival.instantiate(subject=a, target=b), rng.random())
+    pairs = [(a, b) for a in npcs for b in npcs if a is not b]
+
+    expected = [irs.expected_value(store, i, r) for i, r in pairs]
+    assert irs.expected_values(store, pairs).tolist() == expected
+    compiled = irs.compiled()
+    assert compiled.op_columns.tolist() == [0, 1, 0, 0, -1, 2, 3, -1]
+    assert compiled.op_signs.tolist() == [1, -1, 1, 1, 0, 1, 1, 0]
+    assert compiled.rule_ends.tolist() == [2, 5, 7, 8]
+
+    views = [BeliefStoreView(store=store, subject=r) for _, r in pairs]
+    expected = [irs.acceptance_probability(view, i, r) for view, (i, r) in zip(views, pairs)]
+    assert irs.acceptance_probabilities(views, pairs).tolist() == expected
+
+
+def test_compiled_irs_is_refreshed_and_validated():
+    irs = BInfluenceRuleSet(name='irs', rules=[BRule('a', [DummyCondition(0.5)], 1.0)])
+    i, r = make_npcs()
+    compiled = irs.compiled()
+    assert irs.compiled() is compiled
+
+    irs.add(BRule('b', [DummyCondition(1.0)], 1.0))
+    assert irs.expected_values(BeliefStore(), [(i, r)]).tolist() == [1.5]
+    irs.rules[0].weight = 3.0
+    assert irs.expected_values(BeliefStore(), [(i, r)]).tolist() == [2.5]
+
+    irs.rules[1].condition = [DummyCondition(1.5)]
+    with pytest.raises(ValueError):
+        irs.expected_values(BeliefStore(), [(i, r)])
+
+
+def test_rule_probability_short_circuits_on_zero(monkeypatch):
+    from src.predicates.BCondition import BHasNotCondition
+
+    calls = []
+
+    class Recording(DummyCondition):
+        def __call__(self, *args, **kwargs) -> float:
+            calls.append(self.value)
+            return self.value
+
+    i, r = make_npcs()
+    friend = PredicateTemplate('relationship', 'friend', False)
+    store = BeliefStore()
+    store.update(friend.instantiate(i, r), 1.0)
+    rule = BRule(name='r', condition=[BHasNotCondition(friend), Recording(1.5)], weight=1.0)
+
+    assert rule.probability(store, i, r) == 0
+    assert calls == []
+
+    monkeypatch.setattr(BRule, 'debug_checks', True)
+    with pytest.raises(ValueError):
+        rule.probability(store, i, r)
+
+
+def test_debug_checks_cover_looked_up_values(monkeypatch):
+    i, r = make_npcs()
+    friend = PredicateTemplate('relationship', 'friend', False)
+    store = BeliefStore()
+    store.update(friend.instantiate(i, r), 1.0)
+    store.beliefs[0].probability = 1.5  # bypasses the store's write check
+    irs = BInfluenceRuleSet(name='irs', rules=[BRule(name='r', condition=[BHasCondition(friend)], weight=1.0)])
+
+    assert irs.expected_value(store, i, r) == 1.5
+    monkeypatch.setattr(BRule, 'debug_checks', True)
+    with pytest.raises(ValueError):
+        irs.expected_value(store, i, r)
+    with pytest.raises(ValueError):
+        irs.expected_values(store, [(i, r)])
+
+
+def test_constants_and_effects_validated_on_construction():
+    from src.predicates.BCondition import BConstantCondition
+    from src.predicates.BEffect import BAddPredicateEffect
+
+    with pytest.raises(ValueError):
+        BConstantCondition(1.2)
+    with pytest.raises(ValueError):
+        BAddPredicateEffect(label='a', predicate=PredicateTemplate('trait', 'kind', True), probability=-0.1)
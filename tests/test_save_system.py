@@ -68,3 +68,14 @@ def test_save_and_load_model(monkeypatch):
     # ensure we can continue simulation
     loaded.iteration()
     assert len(loaded.actions_done) > first_len
+
+
+def test_load_existing_save_file():
+    path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'saves', 'test_save.sav')
+    loaded = load_model(path)
+    npc = loaded.NPCs[0]
+
+    assert npc.get_traits()
+    assert len(npc.beliefStore) == len(npc.beliefStore.beliefs)
+    assert not hasattr(npc.beliefStore.beliefs[0], '__dict__')
+    loaded.iteration()
@@ -104,3 +104,136 @@ def test_update_beliefs_complex_environment():
 
     assert observer.beliefStore.get_probability(cond_pred, i, r) == pytest.approx(expected_i)
     assert observer.beliefStore.get_probability(cond_pred, r, i) == pytest.approx(expected_r)
+
+
+def test_log_odds_store_matches_probability_update():
+    from src.belief.BeliefTensor import BeliefTensor
+    from src.belief.ColumnarBeliefStore import ColumnarBeliefStore
+
+    i = BNPC(0, 'I')
+    r = BNPC(1, 'R')
+    exchange, cond_pred = make_exchange(i, r, weight=1.3)
+    kind = PredicateTemplate('trait', 'kind', True)
+    exchange.responder_irs.add(BRule(name='trait', condition=[BHasCondition(kind)], weight=0.9))
+    plain = BNPC(2, 'P')
+    logs = BNPC(3, 'L', beliefStore=ColumnarBeliefStore(log_odds=True))
+    tensor_logs = BNPC(4, 'T')
+    tensor_logs.beliefStore = BeliefTensor([i, r, plain, logs, tensor_logs], log_odds=True).stores[4]
+    for observer in (plain, logs, tensor_logs):
+        observer.beliefStore.add_belief(cond_pred.instantiate(i, r), probability=0.2)
+        observer.beliefStore.add_belief(kind.instantiate(i), probability=0.7)
+        for accepted in (True, False, True):
+            update_beliefs_from_observation(observer, exchange, accepted=accepted)
+
+    for observer in (logs, tensor_logs):
+        for template, subject, target in ((cond_pred, i, r), (cond_pred, r, i), (kind, i, None), (kind, r, None)):
+            assert observer.beliefStore.get_probability(template, subject, target) == \
+                pytest.approx(plain.beliefStore.get_probability(template, subject, target), rel=1e-6)
+
+
+def test_likelihood_table_is_cached_per_irs():
+    from src.signal_interpolation.EstimateLikelihood import estimate_likelihood
+
+    ally = PredicateTemplate('relationship', 'ally', False)
+    kind = PredicateTemplate('trait', 'kind', True)
+    irs = BInfluenceRuleSet(name='irs', rules=[
+        BRule(name='a', condition=[BHasCondition(ally), BHasNotCondition(kind)], weight=0.8),
+        BRule(name='b', condition=[BHasNotCondition(PredicateTemplate('relationship', 'ally', False))], weight=0.3),
+    ])
+    table = irs.likelihood_table()
+    assert list(table) == [ally, kind]
+    for accepted in (True, False):
+        assert table.for_outcome(accepted) == tuple(
+            (tmpl, estimate_likelihood(irs, tmpl, True, accepted), estimate_likelihood(irs, tmpl, False, accepted))
+            for tmpl in (ally, kind))
+    assert irs.likelihood_table() is table
+
+    irs.rules[0].weight = -1.0
+    reweighted = irs.likelihood_table()
+    assert reweighted is not table
+    assert reweighted.accepted[0][1] == pytest.approx(1.0 / (1.0 + math.exp(1.3)))
+
+    brave = PredicateTemplate('trait', 'brave', True)
+    irs.add(BRule(name='c', condition=[BHasCondition(brave)], weight=1.0))
+    assert list(irs.likelihood_table()) == [ally, kind, brave]
+
+
+def make_world(store_kind, seed=0, n=5):
+    import random
+
+    from src.belief.BeliefTensor import BeliefTensor
+    from src.belief.ColumnarBeliefStore import ColumnarBeliefStore
+
+    npcs = [BNPC(k, f'N{k}') for k in range(n)]
+    if store_kind.startswith('tensor'):
+        BeliefTensor(npcs, sparse_epsilon=0.05 if 'sparse' in store_kind else None,
+                     log_odds='log' in store_kind).attach()
+    elif store_kind.startswith('columnar'):
+        for npc in npcs:
+            npc.beliefStore = ColumnarBeliefStore(log_odds='log' in store_kind)
+    rng = random.Random(seed)
+    ally = PredicateTemplate('relationship', 'ally', False)
+    kind = PredicateTemplate('trait', 'kind', True)
+    for npc in npcs:
+        for a in npcs:
+            npc.beliefStore.update(kind.instantiate(a), rng.random())
+            for b in npcs:
+                if a is not b:
+                    npc.beliefStore.update(ally.instantiate(a, b), rng.choice([0.0, 1.0, rng.random()]))
+
+    irs_i = BInfluenceRuleSet(name='i', rules=[
+        BRule(name='a', condition=[BHasCondition(ally), BHasNotCondition(kind)], weight=1.2),
+        BRule(name='b', condition=[BHasCondition(kind)], weight=-0.7),
+    ])
+    irs_r = BInfluenceRuleSet(name='r', rules=[BRule(name='c', condition=[BHasNotCondition(ally)], weight=2.5)])
+    actions = []
+    for _ in range(12):
+        i, r = rng.sample(npcs, 2)
+        exchange = BSocialExchange(name='ex', initiator=i, responder=r, intent=ally.instantiate(i, r),
+                                   preconditions=[], initiator_irs=irs_i, responder_irs=irs_r,
+                                   effects=BExchangeEffects([], []), text='')
+        exchange.is_accepted = rng.random() < 0.5
+        actions.append(exchange)
+    return npcs, actions
+
+
+@pytest.mark.parametrize('store_kind', ['object', 'columnar', 'columnar-log', 'tensor', 'tensor-log',
+                                        'tensor-sparse', 'tensor-sparse-log'])
+def test_batched_observation_matches_per_observer(store_kind):
+    from src.signal_interpolation.SignalInterpolation import observe_exchanges
+
+    def snapshot(npcs):
+        return [sorted((b.predicate.subtype, b.predicate.subject.id,
+                        b.predicate.target.id if b.predicate.target else None, b.probability)
+                       for b in npc.beliefStore) for npc in npcs]
+
+    expected, actions = make_world(store_kind)
+    for npc in expected:
+        npc.update_beliefs_from_observation(actions)
+    batched, actions = make_world(store_kind)
+    versions = [npc.beliefStore.version for npc in batched]
+    observe_exchanges(batched, actions)
+
+    assert snapshot(batched) == snapshot(expected)
+    assert [npc.beliefStore.version > v for npc, v in zip(batched, versions)] == \
+        [any(npc is not a.initiator and npc is not a.responder for a in actions) for npc in batched]
+
+
+def test_batched_observation_keeps_order_for_shared_stores():
+    from src.signal_interpolation.SignalInterpolation import observe_exchanges
+
+    expected, actions = make_world('object', seed=4)
+    for npc in expected[1:]:
+        npc.beliefStore = expected[0].beliefStore
+    for npc in expected:
+        npc.update_beliefs_from_observation(actions)
+    batched, actions = make_world('object', seed=4)
+    for npc in batched[1:]:
+        npc.beliefStore = batched[0].beliefStore
+    observe_exchanges(batched, actions)
+
+    def snapshot(store):
+        return sorted((b.predicate.subtype, b.predicate.subject.id,
+                       b.predicate.target.id if b.predicate.target else None, b.probability) for b in store)
+
+    assert snapshot(batched[0].beliefStore) == snapshot(expected[0].beliefStore)
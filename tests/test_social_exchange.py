@@ -57,3 +57,37 @@ def test_social_exchange_perform_accept():
     exch.perform(state)
     assert exch.is_accepted is True
     assert state.get_probability(tmpl, initiator, responder) == pytest.approx(1.0)
+
+
+def test_playable_mask_matches_is_playable():
+    from src.predicates.BCondition import BHasNotCondition
+    from src.social_exchange.BSocialExchangeTemplate import BSocialExchangeTemplate
+
+    npcs = make_npcs(5)
+    initiator = npcs[0]
+    friend = PredicateTemplate('relationship', 'friend', False)
+    rival = PredicateTemplate('relationship', 'rival', False)
+    state = BeliefStore()
+    for n, r in enumerate(npcs[1:]):
+        state.update(friend.instantiate(initiator, r), 0.2 * n + 0.1)
+        state.update(rival.instantiate(initiator, r), 0.9 - 0.2 * n)
+
+    calls = []
+
+    def custom(store, i, r):
+        calls.append(r.id)
+        return 0.0 if r.id == 4 else 1.0
+
+    template = BSocialExchangeTemplate(
+        name='befriend',
+        preconditions=[BHasCondition(friend), custom, BHasNotCondition(rival)],
+        intent=friend,
+        initiator_irs=make_irs(1.0),
+        responder_irs=make_irs(1.0),
+        effects=BExchangeEffects([], []),
+    )
+    mask = template.playable_mask(state, initiator, npcs[1:])
+    assert sorted(calls) == [3, 4]
+
+    assert mask.tolist() == [False, False, True, False]
+    assert mask.tolist() == [template.instantiate(initiator, r).is_playable(state) for r in npcs[1:]]
@@ -0,0 +1,141 @@
+import random
+
+import pytest
+
+from src.belief.BeliefStore import BeliefStore
+from src.irs.BIRS import BInfluenceRuleSet
+from src.npc.BNPC import BNPC
+from src.predicates.BCondition import BConstantCondition, BHasCondition, BHasNotCondition
+from src.predicates.BEffect import BAddPredicateEffect, BRemovePredicateEffect
+from src.predicates.PredicateTemplate import PredicateTemplate
+from src.rule.BRule import BRule
+from src.social_exchange.BExchangeEffects import BExchangeEffects
+from src.social_exchange.BSocialExchangeTemplate import BSocialExchangeTemplate
+from src.social_exchange.TemplateCompiler import compile_template
+from src.social_exchange.exchange_loader import load_exchange_templates
+
+
+class DummyCondition(BHasCondition):
+    def __init__(self, value: float):
+        super().__init__(req_predicate=PredicateTemplate('trait', 'dummy', True))
+        self.value = value
+
+    def __call__(self, *args, **kwargs) -> float:
+        return self.value
+
+
+def make_npcs(n=3):
+    return [BNPC(i, f"NPC{i}") for i in range(n)]
+
+
+KIND = PredicateTemplate('trait', 'kind', True)
+FRIEND = PredicateTemplate('relationship', 'friend', False)
+ENEMY = PredicateTemplate('relationship', 'enemy', False)
+
+
+def make_template(threshold=0.4):
+    irs = BInfluenceRuleSet(name='irs', rules=[
+        BRule('a', [BHasCondition(FRIEND), BHasNotCondition(ENEMY), BHasCondition(FRIEND)], 1.5),
+        BRule('b', [BConstantCondition(0.5), DummyCondition(0.8)], -0.5),
+        BRule('c', [BHasNotCondition(FRIEND), BHasCondition(KIND)], 2.0),
+    ])
+    effects = BExchangeEffects(
+        accept_effects=[BAddPredicateEffect('a', FRIEND, 0.9), BAddPredicateEffect('k', KIND, 0.7)],
+        reject_effects=[BRemovePredicateEffect('r', FRIEND)],
+    )
+    return BSocialExchangeTemplate('befriend', [BHasNotCondition(ENEMY), lambda *a, **k: 1.0], FRIEND,
+                                   irs, irs, effects, playability_threshold=threshold)
+
+
+def random_store(npcs, seed=0):
+    rng = random.Random(seed)
+    store = BeliefStore()
+    for a in npcs:
+        store.update(KIND.instantiate(a), rng.random())
+        for b in npcs:
+            if a is not b:
+                store.update(FRIEND.instantiate(a, b), rng.choice([0.0, 1.0, rng.random()]))
+                store.update(ENEMY.instantiate(a, b), rng.random())
+    return store
+
+
+def test_compiled_functions_match_exchange_methods():
+    npcs = make_npcs()
+    templates = [make_template()] + load_exchange_templates('../configs/exchanges_example.yaml')
+    for seed in range(5):
+        store = random_store(npcs, seed)
+        for template in templates:
+            compiled = compile_template(template)
+            for i in npcs:
+                for r in npcs:
+                    if i is r:
+                        continue
+                    exch = template.instantiate(i, r)
+                    assert compiled.is_playable(store, i, r) == exch.is_playable(store)
+                    assert compiled.initiator_score(store, i, r) == exch.initiator_score(store)
+                    assert compiled.initiator_probability(store, i, r) == exch.initiator_probability(store)
+                    assert compiled.responder_probability(store, i, r) == exch.responder_probability(store)
+
+
+def test_compiled_effects_match():
+    i, r, _ = make_npcs()
+    template = make_template()
+    compiled = compile_template(template)
+    for apply, reference in ((compiled.accept, template.effects.accept), (compiled.reject, template.effects.reject)):
+        a, b = BeliefStore(), BeliefStore()
+        apply(a, i, r)
+        reference(b, i, r)
+        assert [(x.predicate, x.probability) for x in a] == [(x.predicate, x.probability) for x in b]
+
+
+def test_compiled_code_is_shared_by_structure():
+    first, second = make_template(), make_template()
+    second.initiator_irs = first.initiator_irs
+    second.responder_irs = first.responder_irs
+    second.preconditions = first.preconditions
+    assert compile_template(first) is compile_template(second)
+    assert compile_template(make_template(threshold=0.1)) is not compile_template(first)
+
+
+def test_compiled_code_lives_with_its_template(monkeypatch):
+    import gc
+
+    from src.social_exchange import TemplateCompiler
+
+    template = make_template()
+    compiled = compile_template(template)
+    monkeypatch.setattr(TemplateCompiler, 'template_signature', lambda _: pytest.fail('signature recomputed'))
+    assert compile_template(template) is compiled
+    assert '_compiled' not in template.__getstate__()
+    monkeypatch.undo()
+
+    signature = TemplateCompiler.template_signature(template)
+    assert TemplateCompiler._shared[signature] is compiled
+    del template, compiled
+    gc.collect()
+    assert signature not in TemplateCompiler._shared
+
+
+def test_invalid_custom_condition_still_raises():
+    i, r, _ = make_npcs()
+    irs = BInfluenceRuleSet(name='irs', rules=[BRule('bad', [DummyCondition(1.5)], 1.0)])
+    template = BSocialExchangeTemplate('x', [], FRIEND, irs, irs, BExchangeEffects([], []))
+    with pytest.raises(ValueError):
+        compile_template(template).initiator_score(BeliefStore(), i, r)
+
+
+def test_desire_formation_with_compiled_templates():
+    npcs = make_npcs(4)
+    store = random_store(npcs)
+    templates = [make_template()] + load_exchange_templates('../configs/exchanges_example.yaml')
+    plain = npcs[0]
+    plain.beliefStore = store
+    compiled = BNPC(0, 'NPC0', beliefStore=store, compiled_templates=True)
+    others = npcs[1:]
+
+    expected = [(v.template.name, v.responder.id, v.score)
+                for v in plain.desire_formation(others, templates)]
+    actual = [(v.template.name, v.responder.id, v.score)
+              for v in compiled.desire_formation(others, templates)]
+    assert expected
+    assert actual == expected